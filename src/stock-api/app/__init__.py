@@ -1,3 +1,7 @@
+import time
+# Durée d'import de l'application (Flask, pymongo, flasgger...), reportée par /ready
+_import_started = time.perf_counter()
+
 from flask import Flask
 from flask_cors import CORS
 from flask_restful import Api
@@ -6,11 +10,26 @@ from prometheus_flask_exporter import PrometheusMetrics
 import logging
 from pythonjsonlogger import jsonlogger
 import os
+import threading
 
 from app.services.mongo_service import init_mongo_service
+from app.services.cache_codec import CacheCodec
+from app.services.history_repository import init_history_repository
+from app.services.history_writer import HistoryWriter
+from app.services.inventory_aggregates import InventoryAggregates
+from app.services.periodic_job import PeriodicJob
 from app.services.redis_service import init_redis_service
+from app.services.registry import registry
+from app.services.stock_alerts import StockAlertIndex
+from app.services.startup import init_warm_up, startup_report
+from app.services.stock_repository import init_stock_repository
+from app.services.tiered_cache import TieredCacheService
+from app.utils.compression import init_compression
+from app.utils.json_provider import FastJSONProvider
 from config import config
 
+startup_report.record_import(time.perf_counter() - _import_started)
+
 def setup_logging(app):
     """Configuration du logging structuré"""
     log_handler = logging.StreamHandler()
@@ -85,9 +104,17 @@ def setup_swagger(app):
     
     Swagger(app, config=swagger_config, template=swagger_template)
 
+def build_swagger_spec(app):
+    """Construit (et met en cache) la spec OpenAPI, normalement faite à la première requête /apispec.json"""
+    with app.test_request_context():
+        app.swag.get_apispecs('apispec')
+    return True
+
 def create_app(config_name='default'):
     """Factory de l'application Flask"""
+    startup_report.start()
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     
     # Configuration
     app.config.from_object(config[config_name])
@@ -100,33 +127,109 @@ def create_app(config_name='default'):
     
     # Logging
     setup_logging(app)
+    startup_report.lap('extensions')
     
-    # Swagger
+    # Swagger: la spec est construite au préchauffage ou à la première requête, pas ici
     setup_swagger(app)
+    startup_report.lap('swagger')
+    
+    # Compression négociée des réponses
+    init_compression(app)
+    startup_report.lap('compression')
+    
+    # Services déclarés dans le registre: aucune connexion n'est ouverte ici, chaque
+    # processus (worker gunicorn forké après preload_app) crée ses clients au premier usage
+    registry.reset()
+    mongo_service = init_mongo_service(app.config['MONGODB_URI'], app.config['MONGODB_DB'])
+    redis_service = init_redis_service(
+        host=app.config['REDIS_HOST'],
+        port=app.config['REDIS_PORT'],
+        password=app.config['REDIS_PASSWORD'],
+        db=app.config['REDIS_DB'],
+        ttl=app.config['REDIS_TTL'],
+        failure_threshold=app.config['REDIS_BREAKER_FAILURE_THRESHOLD'],
+        base_backoff=app.config['REDIS_BREAKER_BASE_BACKOFF'],
+        max_backoff=app.config['REDIS_BREAKER_MAX_BACKOFF'],
+        codec=CacheCodec(
+            codec=app.config['CACHE_CODEC'],
+            compression_threshold=app.config['CACHE_COMPRESSION_THRESHOLD'],
+            compression_level=app.config['CACHE_COMPRESSION_LEVEL']
+        )
+    )
     
-    # Initialisation MongoDB
-    try:
-        init_mongo_service(app.config['MONGODB_URI'], app.config['MONGODB_DB'])
-        app.logger.info("✅ MongoDB initialisé avec succès")
-    except Exception as e:
-        app.logger.error(f"❌ Erreur d'initialisation MongoDB: {e}")
-        raise
-    
-    # Initialisation Redis
-    try:
-        init_redis_service(
-            host=app.config['REDIS_HOST'],
-            port=app.config['REDIS_PORT'],
-            password=app.config['REDIS_PASSWORD'],
-            db=app.config['REDIS_DB'],
-            ttl=app.config['REDIS_TTL']
+    # Cache: Redis seul, ou L1 en mémoire + Redis si activé (abonnement pub/sub propre à chaque processus)
+    cache_service = redis_service if app.config['CACHE_ENABLED'] else None
+    if cache_service is not None and app.config['L1_CACHE_ENABLED']:
+        cache_service = registry.register(
+            'cache',
+            lambda: TieredCacheService(
+                redis_service,
+                max_size=app.config['L1_CACHE_MAX_SIZE'],
+                ttl=app.config['L1_CACHE_TTL'],
+                channel=app.config['CACHE_INVALIDATION_CHANNEL']
+            ),
+            close=TieredCacheService.stop_listener
         )
-        app.logger.info("✅ Redis initialisé avec succès")
-    except Exception as e:
-        app.logger.error(f"❌ Erreur d'initialisation Redis: {e}")
-        # Ne pas bloquer le démarrage si Redis échoue
-        if app.config['CACHE_ENABLED']:
-            app.logger.warning("⚠️ Cache désactivé suite à l'erreur Redis")
+    
+    # Historique: écriture différée par lots (vidée à l'arrêt du worker) + agrégats heure/jour
+    history_repository = init_history_repository(mongo_service)
+    if app.config['HISTORY_WRITE_BEHIND']:
+        history_repository.writer = HistoryWriter(
+            lambda: history_repository.collection,
+            batch_size=app.config['HISTORY_BATCH_SIZE'],
+            flush_interval=app.config['HISTORY_FLUSH_INTERVAL'],
+            max_queue=app.config['HISTORY_MAX_QUEUE'],
+            on_flush=history_repository.apply_rollups
+        )
+        # Vidée avant la fermeture des clients du registre
+        registry.on_close(history_repository.writer.close)
+    
+    # Agrégats par catégorie et index d'alertes maintenus dans Redis, agrégats d'historique récents:
+    # réconciliés périodiquement depuis MongoDB
+    aggregates = InventoryAggregates(redis_service, mongo_service)
+    alerts = StockAlertIndex(redis_service, mongo_service)
+    reconcile_job = PeriodicJob(
+        'inventory-reconcile',
+        [aggregates.reconcile, alerts.rebuild,
+         lambda: history_repository.rebuild_rollups(app.config['HISTORY_ROLLUP_RECONCILE_DAYS'])],
+        app.config['AGGREGATES_RECONCILE_INTERVAL'],
+        redis_service
+    )
+    
+    # Repository des stocks (MongoDB + cache Redis read-through, évincé à chaque écriture)
+    stock_repository = init_stock_repository(
+        mongo_service,
+        cache_service=cache_service,
+        cache_ttl=app.config['CACHE_TTL'],
+        history_repository=history_repository,
+        aggregates=aggregates,
+        alerts=alerts
+    )
+    
+    # Tâches de fond démarrées une fois par processus (post_fork gunicorn, ou première requête)
+    registry.on_process_start(reconcile_job.start)
+    # Indexation de la recherche des stocks existants, sans bloquer le démarrage
+    registry.on_process_start(
+        lambda: threading.Thread(target=stock_repository.backfill_search_tokens, daemon=True).start()
+    )
+    
+    # Préchauffage par processus: ping MongoDB, réconciliation des index, ping Redis, spec Swagger
+    # (lambdas: résoudre une méthode d'un service du registre créerait son client dès maintenant)
+    warm_up = init_warm_up([
+        ('mongodb', lambda: mongo_service.health_check(), True),
+        # Index unique d'abord: les routes de création l'exigent (require) avant d'écrire
+        ('unique_indexes', lambda: mongo_service.ensure_unique_indexes(), True),
+        ('indexes', lambda: mongo_service.ensure_indexes(), True),
+        ('redis', lambda: redis_service.warm_up(), False),
+        ('swagger', lambda: build_swagger_spec(app), False),
+    ])
+    registry.on_process_start(warm_up.start)
+    
+    @app.before_request
+    def start_background_tasks():
+        registry.start_process()
+    
+    startup_report.lap('services')
     
     # Routes
     from app.routes.stocks import stocks_bp
@@ -148,6 +251,10 @@ def create_app(config_name='default'):
             'cache_enabled': app.config['CACHE_ENABLED']
         }
     
-    app.logger.info("✅ Application Flask initialisée avec succès")
+    startup_report.lap('routes')
+    app.logger.info(
+        f"✅ Application Flask initialisée avec succès "
+        f"(import {startup_report.import_seconds}s, create_app {startup_report.create_app_seconds}s)"
+    )
     
     return app
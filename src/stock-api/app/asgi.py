@@ -0,0 +1,258 @@
+import asyncio
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from flask import Flask
+from werkzeug.exceptions import HTTPException
+
+from app import create_app
+from app.routes.async_stocks import ASYNC_VIEWS
+from app.services.async_mongo_service import init_async_mongo_service
+from app.services.async_redis_service import AsyncRedisCacheService
+from app.services.async_stock_repository import init_async_stock_repository
+from app.services.redis_service import get_redis_service
+from app.services.stock_repository import get_stock_repository
+
+logger = logging.getLogger(__name__)
+
+
+def build_environ(scope: Dict[str, Any], body) -> Dict[str, Any]:
+    """Environ WSGI (PEP 3333) d'une requête HTTP ASGI"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for raw_name, raw_value in scope.get('headers', []):
+        name, value = raw_name.decode('latin-1').upper().replace('-', '_'), raw_value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+def _start_message(status: int, headers) -> Dict[str, Any]:
+    return {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    }
+
+
+class _ReceiveStream(io.RawIOBase):
+    """wsgi.input lu depuis un thread: les morceaux du corps ASGI sont demandés à la boucle à la volée"""
+
+    def __init__(self, receive, loop: asyncio.AbstractEventLoop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b''
+        self._more_body = True
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and self._more_body:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._more_body = False
+                break
+            self._buffer = message.get('body', b'')
+            self._more_body = message.get('more_body', False)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class AsyncDispatcher:
+    """Application ASGI: routes d'E/S des stocks en asyncio, les autres déléguées à Flask.
+
+    Le routage est celui de l'application Flask (url_map): un endpoint présent dans
+    ``views`` est exécuté comme coroutine dans un contexte de requête Flask (request,
+    jsonify, hooks before/after_request: métriques, CORS, compression); tout autre
+    endpoint passe par l'application WSGI dans un pool de threads, en streaming.
+    """
+
+    def __init__(self, flask_app: Flask, views: Dict[str, Any], wsgi_threads: int = 32,
+                 startup=None, shutdown=None):
+        self.flask_app = flask_app
+        self.views = views
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix='wsgi')
+        self._startup = startup
+        self._shutdown = shutdown
+        self._started: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f"Type de connexion ASGI non supporté: {scope['type']}")
+
+        await self._ensure_started()
+        view, view_args = self._match(scope)
+        if view is None:
+            await self._call_wsgi(scope, receive, send)
+        else:
+            await self._call_view(view, view_args, scope, receive, send)
+
+    async def _ensure_started(self) -> None:
+        # Sans lifespan (serveur ASGI minimal), l'initialisation a lieu à la première requête
+        if self._started is None:
+            self._started = asyncio.ensure_future(self._startup() if self._startup else asyncio.sleep(0))
+        await asyncio.shield(self._started)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self._ensure_started()
+                except Exception as e:
+                    logger.error(f"❌ Erreur de démarrage ASGI: {e}")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._shutdown is not None:
+                    await self._shutdown()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _match(self, scope):
+        adapter = self.flask_app.url_map.bind(
+            '', script_name=scope.get('root_path') or None, url_scheme=scope.get('scheme', 'http')
+        )
+        try:
+            endpoint, view_args = adapter.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return None, None
+        return self.views.get(endpoint), view_args
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks, more_body = [], True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    async def _call_view(self, view, view_args, scope, receive, send) -> None:
+        app = self.flask_app
+        environ = build_environ(scope, io.BytesIO(await self._read_body(receive)))
+        context = app.request_context(environ)
+        error = None
+        try:
+            context.push()
+            try:
+                result = app.preprocess_request()
+                if result is None:
+                    result = await view(**view_args)
+            except Exception as e:
+                result = app.handle_user_exception(e)
+            response = app.finalize_request(result)
+        except Exception as e:
+            error = e
+            response = app.handle_exception(e)
+        finally:
+            context.pop(error)
+
+        try:
+            await send(_start_message(response.status_code, response.headers.items()))
+            for chunk in response.iter_encoded():
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            response.close()
+
+    async def _call_wsgi(self, scope, receive, send) -> None:
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, io.BufferedReader(_ReceiveStream(receive, loop)))
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = {}
+
+            def start_response(status, headers, exc_info=None):
+                started['message'] = _start_message(int(status.split(' ', 1)[0]), headers)
+
+            chunks = self.flask_app(environ, start_response)
+            try:
+                sent = False
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if not sent:
+                        send_from_thread(started['message'])
+                        sent = True
+                    send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if not sent:
+                    send_from_thread(started['message'])
+                send_from_thread({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            finally:
+                close = getattr(chunks, 'close', None)
+                if close is not None:
+                    close()
+
+        await loop.run_in_executor(self.executor, run)
+
+
+def create_asgi_app(config_name='default') -> AsyncDispatcher:
+    """Application ASGI: l'application Flask complète, plus les clients asyncio des routes d'E/S"""
+    flask_app = create_app(config_name)
+    config = flask_app.config
+    services = {}
+
+    async def startup():
+        # Clients asyncio créés dans le processus et la boucle qui servent les requêtes
+        mongo_service = init_async_mongo_service(config['MONGODB_URI'], config['MONGODB_DB'],
+                                                 max_pool_size=config['ASYNC_MONGODB_MAX_POOL_SIZE'])
+        services['mongo'] = mongo_service
+        sync_repository = get_stock_repository()
+        # Client redis.asyncio pour le cache et pour les agrégats / l'index d'alertes
+        redis_service = AsyncRedisCacheService(
+            get_redis_service(),
+            max_connections=config['ASYNC_REDIS_MAX_CONNECTIONS'],
+            channel=config['CACHE_INVALIDATION_CHANNEL'] if config['L1_CACHE_ENABLED'] else None
+        )
+        services['redis'] = redis_service
+        cache_service = redis_service if sync_repository.cache is not None else None
+        init_async_stock_repository(sync_repository, mongo_service, cache_service, redis_service)
+        if not await mongo_service.health_check():
+            logger.warning("⚠️ MongoDB injoignable au démarrage ASGI")
+        logger.info("✅ Mode ASGI initialisé (MongoDB motor, Redis asyncio)")
+
+    async def shutdown():
+        if 'redis' in services:
+            await services['redis'].close()
+        if 'mongo' in services:
+            services['mongo'].close_connection()
+
+    return AsyncDispatcher(flask_app, ASYNC_VIEWS, wsgi_threads=config['ASGI_WSGI_THREADS'],
+                           startup=startup, shutdown=shutdown)
@@ -1,8 +1,37 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from bson import ObjectId
 
+# Champs exposés par Stock.to_dict (stockés + dérivés)
+STOCK_FIELDS = [
+    "id", "product_id", "name", "description", "quantity", "price", "category",
+    "min_stock", "max_stock", "supplier", "sku", "created_at", "updated_at", "version",
+    "stock_value", "low_stock_alert", "over_stock_alert"
+]
+# Champs MongoDB nécessaires au calcul de chaque champ exposé
+FIELD_SOURCES = {
+    "id": ("_id",),
+    "stock_value": ("quantity", "price"),
+    "low_stock_alert": ("quantity", "min_stock"),
+    "over_stock_alert": ("quantity", "max_stock"),
+}
+FIELD_DEFAULTS = {
+    "description": "", "quantity": 0, "price": 0.0, "category": "general",
+    "min_stock": 10, "max_stock": 1000, "supplier": "", "sku": "", "version": 0
+}
+
 class Stock:
+    """Stock compact (__slots__): la forme sérialisée est mémorisée jusqu'à la prochaine mutation.
+
+    Les mutations passent par update_quantity/add_stock/remove_stock ou sont suivies
+    d'un appel à invalidate(). Le dict retourné par to_dict est partagé: ne pas le modifier.
+    ``version`` est incrémentée ($inc) par chaque écriture MongoDB: c'est elle qui fonde
+    l'ETag d'un stock, pas updated_at (horloge du serveur d'API, tronquée à la milliseconde).
+    """
+
+    __slots__ = ('_id', 'product_id', 'name', 'description', 'quantity', 'price', 'category',
+                 'min_stock', 'max_stock', 'supplier', 'sku', 'created_at', 'updated_at', 'version', '_serialized')
+
     def __init__(self, 
                  name: str,
                  description: str,
@@ -16,7 +45,8 @@ class Stock:
                  product_id: str = None,
                  _id: Optional[ObjectId] = None,
                  created_at: Optional[datetime] = None,
-                 updated_at: Optional[datetime] = None):
+                 updated_at: Optional[datetime] = None,
+                 version: int = 1):
         
         self._id = _id or ObjectId()
         self.product_id = product_id or str(self._id)
@@ -31,10 +61,51 @@ class Stock:
         self.sku = sku
         self.created_at = created_at or datetime.utcnow()
         self.updated_at = updated_at or datetime.utcnow()
+        self.version = version
+        self._serialized = None
+
+    @property
+    def stock_value(self) -> float:
+        return self.quantity * self.price
+
+    @property
+    def low_stock_alert(self) -> bool:
+        return self.quantity <= self.min_stock
+
+    @property
+    def over_stock_alert(self) -> bool:
+        return self.quantity >= self.max_stock
+
+    def invalidate(self) -> None:
+        self._serialized = None
     
     def to_dict(self) -> Dict[str, Any]:
+        if self._serialized is None:
+            quantity = self.quantity
+            self._serialized = {
+                "id": str(self._id),
+                "product_id": self.product_id,
+                "name": self.name,
+                "description": self.description,
+                "quantity": quantity,
+                "price": self.price,
+                "category": self.category,
+                "min_stock": self.min_stock,
+                "max_stock": self.max_stock,
+                "supplier": self.supplier,
+                "sku": self.sku,
+                "created_at": self.created_at.isoformat(),
+                "updated_at": self.updated_at.isoformat(),
+                "version": self.version,
+                "stock_value": quantity * self.price,
+                "low_stock_alert": quantity <= self.min_stock,
+                "over_stock_alert": quantity >= self.max_stock
+            }
+        return self._serialized
+
+    def to_document(self) -> Dict[str, Any]:
         return {
-            "id": str(self._id),
+            "_id": self._id,
             "product_id": self.product_id,
             "name": self.name,
             "description": self.description,
@@ -45,13 +116,33 @@ class Stock:
             "max_stock": self.max_stock,
             "supplier": self.supplier,
             "sku": self.sku,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-            "stock_value": self.quantity * self.price,
-            "low_stock_alert": self.quantity <= self.min_stock,
-            "over_stock_alert": self.quantity >= self.max_stock
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "version": self.version
         }
-    
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> 'Stock':
+        """Construction directe depuis un document MongoDB (datetimes natifs, _id ObjectId)"""
+        stock = cls.__new__(cls)
+        get = document.get
+        stock._id = document['_id']
+        stock.product_id = get('product_id') or str(stock._id)
+        stock.name = get('name')
+        stock.description = get('description', '')
+        stock.quantity = get('quantity', 0)
+        stock.price = get('price', 0.0)
+        stock.category = get('category', 'general')
+        stock.min_stock = get('min_stock', 10)
+        stock.max_stock = get('max_stock', 1000)
+        stock.supplier = get('supplier', '')
+        stock.sku = get('sku', '')
+        stock.created_at = get('created_at') or datetime.utcnow()
+        stock.updated_at = get('updated_at') or stock.created_at
+        stock.version = get('version', 0)
+        stock._serialized = None
+        return stock
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Stock':
         _id = data.get('_id')
@@ -79,12 +170,47 @@ class Stock:
             supplier=data.get('supplier', ''),
             sku=data.get('sku', ''),
             created_at=created_at,
-            updated_at=updated_at
+            updated_at=updated_at,
+            version=data.get('version', 1)
         )
     
+    @staticmethod
+    def projection(fields: Iterable[str]) -> Dict[str, int]:
+        """Projection MongoDB couvrant les champs demandés (dérivés inclus)"""
+        projection = {"_id": 1}
+        for field in fields:
+            for source in FIELD_SOURCES.get(field, (field,)):
+                projection[source] = 1
+        return projection
+
+    @staticmethod
+    def serialize_fields(document: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+        """Sérialise uniquement les champs demandés d'un document MongoDB brut"""
+        def value(name):
+            found = document.get(name)
+            return FIELD_DEFAULTS.get(name) if found is None else found
+
+        result = {}
+        for field in fields:
+            if field == "id":
+                result[field] = str(document["_id"])
+            elif field == "stock_value":
+                result[field] = value("quantity") * value("price")
+            elif field == "low_stock_alert":
+                result[field] = value("quantity") <= value("min_stock")
+            elif field == "over_stock_alert":
+                result[field] = value("quantity") >= value("max_stock")
+            elif field in ("created_at", "updated_at"):
+                found = document.get(field)
+                result[field] = found.isoformat() if isinstance(found, datetime) else found
+            else:
+                result[field] = value(field)
+        return result
+
     def update_quantity(self, new_quantity: int) -> None:
         self.quantity = new_quantity
         self.updated_at = datetime.utcnow()
+        self._serialized = None
     
     def add_stock(self, quantity: int) -> None:
         self.update_quantity(self.quantity + quantity)
@@ -95,6 +221,11 @@ class Stock:
         self.update_quantity(self.quantity - quantity)
 
 class StockHistory:
+    """Mouvement de stock compact (__slots__), immuable une fois créé: to_dict est mémorisé"""
+
+    __slots__ = ('_id', 'product_id', 'action', 'quantity_change', 'previous_quantity', 'new_quantity',
+                 'user', 'notes', 'timestamp', '_serialized')
+
     def __init__(self, 
                  product_id: str,
                  action: str,
@@ -115,10 +246,43 @@ class StockHistory:
         self.user = user
         self.notes = notes
         self.timestamp = timestamp or datetime.utcnow()
+        self._serialized = None
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> 'StockHistory':
+        """Construction directe depuis un document MongoDB"""
+        history = cls.__new__(cls)
+        get = document.get
+        history._id = document['_id']
+        history.product_id = document['product_id']
+        history.action = document['action']
+        history.quantity_change = document['quantity_change']
+        history.previous_quantity = document['previous_quantity']
+        history.new_quantity = document['new_quantity']
+        history.user = get('user', 'system')
+        history.notes = get('notes', '')
+        history.timestamp = document['timestamp']
+        history._serialized = None
+        return history
     
     def to_dict(self) -> Dict[str, Any]:
+        if self._serialized is None:
+            self._serialized = {
+                "id": str(self._id),
+                "product_id": self.product_id,
+                "action": self.action,
+                "quantity_change": self.quantity_change,
+                "previous_quantity": self.previous_quantity,
+                "new_quantity": self.new_quantity,
+                "user": self.user,
+                "notes": self.notes,
+                "timestamp": self.timestamp.isoformat()
+            }
+        return self._serialized
+
+    def to_document(self) -> Dict[str, Any]:
         return {
-            "id": str(self._id),
+            "_id": self._id,
             "product_id": self.product_id,
             "action": self.action,
             "quantity_change": self.quantity_change,
@@ -126,5 +290,5 @@ class StockHistory:
             "new_quantity": self.new_quantity,
             "user": self.user,
             "notes": self.notes,
-            "timestamp": self.timestamp.isoformat()
+            "timestamp": self.timestamp
         }
@@ -0,0 +1,124 @@
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+from app.routes.stocks import (_adjusted_response, _created_response, _deleted_response, _duplicate_response,
+                               _error, _list_etag, _list_response, _parse_adjustment, _parse_create,
+                               _parse_fields, _parse_list_params, _parse_update, _stock_response,
+                               _unique_index_missing, _updated_response)
+from app.services.startup import get_warm_up
+from app.services.async_stock_repository import get_async_stock_repository
+from app.utils.http_cache import is_not_modified, not_modified
+
+# Versions asyncio des routes d'E/S des stocks, servies par app.asgi.
+# Lecture des requêtes, validations et réponses sont celles de app.routes.stocks
+# (dont la doc Swagger fait foi): seuls les appels au repository diffèrent.
+
+async def get_all_stocks():
+    """Récupérer les stocks, page par page"""
+    try:
+        params, error = _parse_list_params()
+        if error:
+            return _error(error, 400)
+
+        repository = get_async_stock_repository()
+        # Une seule lecture de la génération: ETag et clé de cache de la page concordent
+        generation = await repository.list_generation()
+        etag = _list_etag(generation)
+        if etag and is_not_modified(etag):
+            return not_modified(etag)
+
+        stocks, next_cursor = await repository.list(**params, generation=generation)
+        return _list_response(stocks, next_cursor, etag)
+
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        return _error(str(e), 500)
+
+async def create_stock():
+    """Créer un nouveau stock"""
+    try:
+        symbol, data, error = _parse_create()
+        if error:
+            return error
+        if not get_warm_up().state['unique_indexes']['ready']:
+            # Création de l'index hors de la boucle d'événements
+            error = await asyncio.to_thread(_unique_index_missing)
+            if error:
+                return error
+
+        try:
+            stock = await get_async_stock_repository().create(symbol, data)
+        except DuplicateKeyError:
+            return _duplicate_response(symbol)
+
+        return _created_response(stock)
+
+    except Exception as e:
+        return _error(str(e), 500)
+
+async def get_stock(symbol):
+    """Récupérer un stock spécifique"""
+    try:
+        symbol = symbol.upper()
+        fields, error = _parse_fields()
+        if error:
+            return _error(error, 400)
+
+        stock, version = await get_async_stock_repository().get_versioned(symbol, fields=fields)
+        return _stock_response(symbol, stock, version, fields)
+
+    except Exception as e:
+        return _error(str(e), 500)
+
+async def update_stock(symbol):
+    """Mettre à jour un stock"""
+    try:
+        symbol = symbol.upper()
+        repository = get_async_stock_repository()
+        data, error = _parse_update(await repository.get(symbol))
+        if error:
+            return error
+
+        return _updated_response(await repository.update(symbol, data))
+
+    except Exception as e:
+        return _error(str(e), 500)
+
+async def adjust_stock(symbol):
+    """Ajuster la quantité d'un stock de façon atomique"""
+    try:
+        symbol = symbol.upper()
+        adjustment, error = _parse_adjustment()
+        if error:
+            return error
+
+        try:
+            result = await get_async_stock_repository().adjust(symbol, **adjustment)
+        except ValueError as e:
+            return _error(str(e), 409)
+
+        return _adjusted_response(result)
+
+    except Exception as e:
+        return _error(str(e), 500)
+
+async def delete_stock(symbol):
+    """Supprimer un stock"""
+    try:
+        symbol = symbol.upper()
+        return _deleted_response(await get_async_stock_repository().delete(symbol), symbol)
+
+    except Exception as e:
+        return _error(str(e), 500)
+
+# Endpoint Flask (blueprint stocks) -> vue asyncio; les autres routes restent servies en WSGI
+ASYNC_VIEWS = {
+    'stocks.get_all_stocks': get_all_stocks,
+    'stocks.create_stock': create_stock,
+    'stocks.get_stock': get_stock,
+    'stocks.update_stock': update_stock,
+    'stocks.adjust_stock': adjust_stock,
+    'stocks.delete_stock': delete_stock,
+}
@@ -1,13 +1,208 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flasgger import swag_from
-from datetime import datetime
-from app.utils.validators import validate_stock_data
+from datetime import datetime, timezone
+import csv
+import io
+import logging
+import os
+from pymongo.errors import DuplicateKeyError
+from app.models.stock import STOCK_FIELDS
+from app.services.history_repository import BUCKETS, DEFAULT_HISTORY_PAGE_SIZE, get_history_repository
+from app.services.startup import get_startup_report, get_warm_up
+from app.services.stock_alerts import ALERT_TYPES
+from app.services.stock_import import IMPORT_FORMATS, import_stocks
+from app.services.stock_repository import DEFAULT_PAGE_SIZE, SORT_FIELDS, get_stock_repository
+from app.utils.http_cache import is_not_modified, make_etag, not_modified, with_cache_headers
+from app.utils.validators import ADJUSTMENT_SCHEMA, STOCK_SCHEMA, QueryValidator, StockValidator
+
+logger = logging.getLogger(__name__)
 
 # Créer le blueprint
 stocks_bp = Blueprint('stocks', __name__)
 
-# Stockage en mémoire (remplacera par MongoDB plus tard)
-stocks_db = {}
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+EXPORT_CHUNK_ROWS = 500
+
+FIELDS_PARAMETER = {
+    'name': 'fields',
+    'in': 'query',
+    'type': 'string',
+    'required': False,
+    'description': 'Comma-separated list of fields to return (e.g. product_id,name,quantity,low_stock_alert)'
+}
+
+IF_NONE_MATCH_PARAMETER = {
+    'name': 'If-None-Match',
+    'in': 'header',
+    'type': 'string',
+    'required': False,
+    'description': 'ETag from a previous response; 304 Not Modified if unchanged'
+}
+
+def _parse_fields():
+    """Lit le paramètre fields= ; retourne (liste ou None, message d'erreur)"""
+    raw = request.args.get('fields', '').strip()
+    if not raw:
+        return None, None
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in STOCK_FIELDS]
+    if unknown:
+        return None, f"Champs inconnus: {', '.join(unknown)}"
+    return fields, None
+
+def _parse_list_params():
+    """Lit les paramètres de GET /stocks; retourne (arguments de repository.list, message d'erreur)"""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return None, 'Le paramètre limit doit être un nombre entier'
+    
+    sort = request.args.get('sort') or None
+    is_valid, error = QueryValidator.validate_pagination_params(1, limit)
+    if is_valid and sort:
+        is_valid, error = QueryValidator.validate_sort_field(sort, SORT_FIELDS)
+    if not is_valid:
+        return None, error
+    
+    fields, error = _parse_fields()
+    if error:
+        return None, error
+    
+    return {
+        'category': request.args.get('category'),
+        'search': request.args.get('search', '').strip(),
+        'sort': sort,
+        'limit': limit,
+        'cursor': request.args.get('cursor') or None,
+        'fields': fields
+    }, None
+
+def _list_etag(generation):
+    if generation is None:
+        return None
+    return make_etag('stocks', generation, sorted(request.args.items(multi=True)))
+
+def _list_response(stocks, next_cursor, etag):
+    return with_cache_headers(jsonify({
+        'stocks': stocks,
+        'count': len(stocks),
+        'next_cursor': next_cursor,
+        'message': 'Stocks retrieved successfully'
+    }), etag)
+
+# Lecture/validation des requêtes et réponses des routes unitaires, partagées avec les
+# vues asyncio (app.routes.async_stocks): les deux modes de service ne peuvent pas diverger
+
+def _error(message, status):
+    return jsonify({'error': message}), status
+
+def _read_json():
+    """Corps JSON de la requête; retourne (données, réponse d'erreur)"""
+    data = request.get_json()
+    if not data:
+        return None, _error('No JSON data provided', 400)
+    return data, None
+
+def _parse_create():
+    """POST /stocks: retourne (symbole, données validées, réponse d'erreur)"""
+    data, error = _read_json()
+    if error:
+        return None, None, error
+    
+    symbol = str(data.get('symbol') or data.get('product_id') or '').strip().upper()
+    if not symbol:
+        return None, None, _error('Champ requis manquant: symbol', 400)
+    
+    is_valid, message = StockValidator.validate_stock_data(data)
+    if not is_valid:
+        return None, None, _error(message, 400)
+    return symbol, data, None
+
+def _unique_index_missing():
+    """503 tant que l'index unique sur product_id n'existe pas (sinon les doublons passeraient)"""
+    if get_warm_up().require('unique_indexes'):
+        return None
+    response, status = _error('Index unique MongoDB non prêt, réessayer plus tard', 503)
+    response.headers['Retry-After'] = '1'
+    return response, status
+
+def _duplicate_response(symbol):
+    return _error(f'Stock with symbol {symbol} already exists', 409)
+
+def _created_response(stock):
+    return jsonify({
+        'stock': stock,
+        'message': 'Stock created successfully'
+    }), 201
+
+def _stock_response(symbol, stock, version, fields):
+    """GET /stocks/<symbol>: 404, 304 si l'ETag du client est à jour, sinon le stock"""
+    if not stock:
+        return _error('Stock not found', 404)
+    
+    etag = make_etag('stock', symbol, version, fields)
+    if is_not_modified(etag):
+        return not_modified(etag)
+    return with_cache_headers(jsonify({'stock': stock}), etag)
+
+def _parse_update(current):
+    """PUT /stocks/<symbol>: valide le document résultant de la mise à jour partielle"""
+    if not current:
+        return None, _error('Stock not found', 404)
+    
+    data, error = _read_json()
+    if error:
+        return None, error
+    
+    is_valid, message = StockValidator.validate_stock_data({**current, **data})
+    if not is_valid:
+        return None, _error(message, 400)
+    return data, None
+
+def _updated_response(stock):
+    if not stock:
+        return _error('Stock not found', 404)
+    return jsonify({
+        'stock': stock,
+        'message': 'Stock updated successfully'
+    })
+
+def _parse_adjustment():
+    """POST /stocks/<symbol>/adjust: retourne (arguments de repository.adjust, réponse d'erreur)"""
+    data, error = _read_json()
+    if error:
+        return None, error
+    
+    is_valid, message = StockValidator.validate_quantity_update(data.get('quantity_change'))
+    if not is_valid:
+        return None, _error(message, 400)
+    return {
+        'quantity_change': int(data['quantity_change']),
+        'user': str(data.get('user') or 'system'),
+        'notes': str(data.get('notes') or '')
+    }, None
+
+def _adjusted_response(result):
+    if result is None:
+        return _error('Stock not found', 404)
+    
+    stock, history = result
+    return jsonify({
+        'stock': stock,
+        'history': history,
+        'message': 'Stock adjusted successfully'
+    })
+
+def _deleted_response(deleted, symbol):
+    if not deleted:
+        return _error('Stock not found', 404)
+    return jsonify({
+        'message': 'Stock deleted successfully',
+        'deleted_symbol': symbol
+    })
 
 @stocks_bp.route('/health', methods=['GET'])
 @swag_from({
@@ -35,6 +230,31 @@ def health_check():
         'version': '1.0.0'
     })
 
+@stocks_bp.route('/ready', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'responses': {
+        200: {
+            'description': 'Dependencies of this worker are warm (MongoDB reachable, indexes reconciled); '
+                           'includes the startup-time report (import time, create_app phases, warm-up durations)'
+        },
+        503: {
+            'description': 'Warm-up still running or a required dependency is unavailable (retried on each call)'
+        }
+    }
+})
+def readiness_check():
+    """Readiness: dépendances préchauffées dans ce worker, et durées de démarrage"""
+    warm_up = get_warm_up()
+    # Relance les étapes en échec (ex: MongoDB indisponible au démarrage)
+    warm_up.start()
+    status = warm_up.status()
+    return jsonify({
+        **status,
+        'pid': os.getpid(),
+        'startup': get_startup_report().to_dict()
+    }), 200 if status['ready'] else 503
+
 @stocks_bp.route('/stocks', methods=['GET'])
 @swag_from({
     'tags': ['Stocks'],
@@ -51,70 +271,81 @@ def health_check():
             'in': 'query', 
             'type': 'string',
             'required': False,
-            'description': 'Search in name or description'
-        }
+            'description': 'Case-insensitive substring search in name, description or symbol; ranked by relevance '
+                           'up to 1000 matches, newest first beyond that'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': DEFAULT_PAGE_SIZE,
+            'description': 'Page size (1-100)'
+        },
+        {
+            'name': 'sort',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'enum': ['created_at', '-created_at', 'name', '-name'],
+            'description': 'Sort order (default: -created_at, or relevance when searching)'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Opaque cursor returned as next_cursor by the previous page'
+        },
+        FIELDS_PARAMETER,
+        IF_NONE_MATCH_PARAMETER
     ],
     'responses': {
         200: {
-            'description': 'List of stocks retrieved successfully',
+            'description': 'Page of stocks retrieved successfully',
             'schema': {
                 'type': 'object',
                 'properties': {
                     'stocks': {
                         'type': 'array',
-                        'items': {
-                            'type': 'object',
-                            'properties': {
-                                'symbol': {'type': 'string'},
-                                'name': {'type': 'string'},
-                                'price': {'type': 'number'},
-                                'currency': {'type': 'string'},
-                                'quantity': {'type': 'integer'},
-                                'category': {'type': 'string'},
-                                'description': {'type': 'string'},
-                                'created_at': {'type': 'string'},
-                                'updated_at': {'type': 'string'}
-                            }
-                        }
+                        'items': {'$ref': '#/definitions/Stock'}
                     },
                     'count': {'type': 'integer'},
+                    'next_cursor': {'type': 'string'},
                     'message': {'type': 'string'}
                 }
             }
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
+        },
+        400: {
+            'description': 'Invalid pagination parameters'
         }
     }
 })
 def get_all_stocks():
-    """Récupérer tous les stocks"""
+    """Récupérer les stocks, page par page"""
     try:
-        category = request.args.get('category')
-        search = request.args.get('search', '').lower()
-        
-        filtered_stocks = []
+        params, error = _parse_list_params()
+        if error:
+            return _error(error, 400)
         
-        for symbol, stock in stocks_db.items():
-            # Filtrer par catégorie
-            if category and stock.get('category') != category:
-                continue
-            
-            # Filtrer par recherche
-            if search:
-                name_match = search in stock.get('name', '').lower()
-                desc_match = search in stock.get('description', '').lower()
-                symbol_match = search in stock.get('symbol', '').lower()
-                if not (name_match or desc_match or symbol_match):
-                    continue
-            
-            filtered_stocks.append(stock)
+        repository = get_stock_repository()
+        # ETag = génération des listes + paramètres: 304 sans MongoDB ni sérialisation.
+        # Une seule lecture de la génération: ETag et clé de cache de la page concordent
+        generation = repository.list_generation()
+        etag = _list_etag(generation)
+        if etag and is_not_modified(etag):
+            return not_modified(etag)
         
-        return jsonify({
-            'stocks': filtered_stocks,
-            'count': len(filtered_stocks),
-            'message': 'Stocks retrieved successfully'
-        })
+        stocks, next_cursor = repository.list(**params, generation=generation)
+        return _list_response(stocks, next_cursor, etag)
         
+    except ValueError as e:
+        return _error(str(e), 400)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _error(str(e), 500)
 
 @stocks_bp.route('/stocks', methods=['POST'])
 @swag_from({
@@ -126,12 +357,12 @@ def get_all_stocks():
             'required': True,
             'schema': {
                 'type': 'object',
-                'required': ['symbol', 'name', 'price'],
+                'required': ['symbol', 'name', 'price', 'quantity', 'category'],
                 'properties': {
                     'symbol': {
                         'type': 'string',
                         'example': 'AAPL',
-                        'description': 'Stock symbol (unique)'
+                        'description': 'Stock symbol, stored as product_id (unique)'
                     },
                     'name': {
                         'type': 'string', 
@@ -143,17 +374,22 @@ def get_all_stocks():
                         'example': 182.63,
                         'description': 'Current stock price'
                     },
-                    'currency': {
-                        'type': 'string',
-                        'example': 'USD',
-                        'description': 'Currency code',
-                        'default': 'USD'
-                    },
                     'quantity': {
                         'type': 'integer',
                         'example': 1000,
-                        'description': 'Available quantity',
-                        'default': 0
+                        'description': 'Available quantity'
+                    },
+                    'min_stock': {
+                        'type': 'integer',
+                        'example': 10,
+                        'description': 'Low stock threshold',
+                        'default': 10
+                    },
+                    'max_stock': {
+                        'type': 'integer',
+                        'example': 1000,
+                        'description': 'Over stock threshold',
+                        'default': 1000
                     },
                     'category': {
                         'type': 'string',
@@ -175,20 +411,7 @@ def get_all_stocks():
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'stock': {
-                        'type': 'object',
-                        'properties': {
-                            'symbol': {'type': 'string'},
-                            'name': {'type': 'string'},
-                            'price': {'type': 'number'},
-                            'currency': {'type': 'string'},
-                            'quantity': {'type': 'integer'},
-                            'category': {'type': 'string'},
-                            'description': {'type': 'string'},
-                            'created_at': {'type': 'string'},
-                            'updated_at': {'type': 'string'}
-                        }
-                    },
+                    'stock': {'$ref': '#/definitions/Stock'},
                     'message': {'type': 'string'}
                 }
             }
@@ -198,48 +421,498 @@ def get_all_stocks():
         },
         409: {
             'description': 'Stock already exists'
+        },
+        503: {
+            'description': 'Unique product_id index not created yet (Retry-After)'
         }
     }
 })
 def create_stock():
     """Créer un nouveau stock"""
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
-        
-        # Validation des données
-        errors = validate_stock_data(data)
-        if errors:
-            return jsonify({'errors': errors}), 400
-        
-        symbol = data['symbol'].upper()
-        
-        # Vérifier si le stock existe déjà
-        if symbol in stocks_db:
-            return jsonify({'error': f'Stock with symbol {symbol} already exists'}), 409
-        
-        # Créer le stock
-        stock = {
-            'symbol': symbol,
-            'name': data['name'],
-            'price': float(data['price']),
-            'currency': data.get('currency', 'USD'),
-            'quantity': int(data.get('quantity', 0)),
-            'category': data.get('category'),
-            'description': data.get('description', ''),
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+        symbol, data, error = _parse_create()
+        if error:
+            return error
+        error = _unique_index_missing()
+        if error:
+            return error
+        
+        # Créer le stock (l'index unique sur product_id garantit l'unicité)
+        try:
+            stock = get_stock_repository().create(symbol, data)
+        except DuplicateKeyError:
+            return _duplicate_response(symbol)
+        
+        return _created_response(stock)
+        
+    except Exception as e:
+        return _error(str(e), 500)
+
+def _get_bulk_items():
+    """Extrait la liste d'items d'un payload bulk (tableau JSON ou {"items": [...]})"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list) or not data:
+        return None, (jsonify({'error': 'A non-empty JSON array of items is required'}), 400)
+    
+    max_items = current_app.config['BULK_MAX_ITEMS']
+    if len(data) > max_items:
+        return None, (jsonify({'error': f'Too many items: {len(data)} > {max_items}'}), 413)
+    
+    return data, None
+
+def _bulk_response(results):
+    """Assemble les résultats par item et les compteurs d'une requête bulk"""
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    
+    status_code = 200 if any(result['status'] != 'error' for result in results) else 400
+    return jsonify({
+        'results': results,
+        'counts': counts,
+        'message': 'Bulk operation completed'
+    }), status_code
+
+def _merge_results(errors, written):
+    """Réinsère les résultats d'écriture aux index des items valides"""
+    results = []
+    for index in sorted(list(errors) + list(written)):
+        result = errors.get(index) or written[index]
+        results.append({'index': index, **result})
+    return results
+
+@stocks_bp.route('/stocks/bulk', methods=['POST'])
+@swag_from({
+    'tags': ['Stocks'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'items': {
+                        'type': 'array',
+                        'description': 'Stocks to create or replace (same fields as POST /stocks)',
+                        'items': {'type': 'object'}
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-item results (created, updated or error)'
+        },
+        400: {
+            'description': 'No valid item'
+        },
+        413: {
+            'description': 'Too many items'
+        },
+        503: {
+            'description': 'Unique product_id index not created yet (Retry-After)'
+        }
+    }
+})
+def bulk_upsert_stocks():
+    """Créer ou mettre à jour des stocks en masse"""
+    try:
+        items, error_response = _get_bulk_items()
+        if error_response:
+            return error_response
+        error_response = _unique_index_missing()
+        if error_response:
+            return error_response
+        
+        # Validation de tout le lot en une passe (schéma compilé), valeurs déjà converties
+        coerced, field_errors = STOCK_SCHEMA.validate(items)
+        errors, valid, positions, seen = {}, [], [], set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = {'status': 'error', 'error': 'Item must be a JSON object'}
+                continue
+            symbol = str(item.get('symbol') or item.get('product_id') or '').strip().upper()
+            if not symbol:
+                errors[index] = {'status': 'error', 'error': 'Champ requis manquant: symbol'}
+                continue
+            if symbol in seen:
+                errors[index] = {'product_id': symbol, 'status': 'error', 'error': 'Symbole en double dans le lot'}
+                continue
+            if index in field_errors:
+                errors[index] = {'product_id': symbol, 'status': 'error', 'error': field_errors[index][0]['error'],
+                                 'errors': field_errors[index]}
+                continue
+            seen.add(symbol)
+            valid.append({**coerced[index], 'product_id': symbol})
+            positions.append(index)
+        
+        written = get_stock_repository().bulk_upsert(valid, coerced=True)
+        return _bulk_response(_merge_results(errors, dict(zip(positions, written))))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stocks_bp.route('/stocks/bulk/adjust', methods=['POST'])
+@swag_from({
+    'tags': ['Stocks'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'items': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'required': ['symbol', 'quantity_change'],
+                            'properties': {
+                                'symbol': {'type': 'string', 'example': 'AAPL'},
+                                'quantity_change': {'type': 'integer', 'example': -5}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-item results (adjusted or error)'
+        },
+        400: {
+            'description': 'No valid item'
+        },
+        413: {
+            'description': 'Too many items'
         }
+    }
+})
+def bulk_adjust_stocks():
+    """Ajuster des quantités en masse"""
+    try:
+        items, error_response = _get_bulk_items()
+        if error_response:
+            return error_response
+        
+        coerced, field_errors = ADJUSTMENT_SCHEMA.validate(items)
+        errors, valid, positions = {}, [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = {'status': 'error', 'error': 'Item must be a JSON object'}
+                continue
+            symbol = str(item.get('symbol') or item.get('product_id') or '').strip().upper()
+            if not symbol:
+                errors[index] = {'status': 'error', 'error': 'Champ requis manquant: symbol'}
+                continue
+            if index in field_errors:
+                errors[index] = {'product_id': symbol, 'status': 'error', 'error': field_errors[index][0]['error'],
+                                 'errors': field_errors[index]}
+                continue
+            valid.append({'product_id': symbol, 'quantity_change': coerced[index]['quantity_change']})
+            positions.append(index)
         
-        # Sauvegarder
-        stocks_db[symbol] = stock
+        written = get_stock_repository().bulk_adjust(valid)
+        return _bulk_response(_merge_results(errors, dict(zip(positions, written))))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _export_ndjson(rows):
+    """Lignes NDJSON par paquets, suivies d'une ligne trailer avec le nombre de lignes"""
+    count, chunk, complete = 0, [], True
+    try:
+        for row in rows:
+            chunk.append(current_app.json.dumps(row))
+            count += 1
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+    except Exception as e:
+        # Les en-têtes sont déjà envoyés: l'échec est signalé dans le trailer
+        logger.error(f"❌ Export interrompu après {count} lignes: {e}")
+        complete = False
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+    yield current_app.json.dumps({'_trailer': {'row_count': count, 'complete': complete}}) + '\n'
+
+def _export_csv(rows, fields):
+    """CSV avec en-tête, suivi d'une ligne trailer '#row_count,<n>' (ou '#error,<n>')"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    count, status = 0, '#row_count'
+    try:
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    except Exception as e:
+        logger.error(f"❌ Export interrompu après {count} lignes: {e}")
+        status = '#error'
+    csv.writer(buffer).writerow([status, count])
+    yield buffer.getvalue()
+
+@stocks_bp.route('/stocks/aggregates', methods=['GET'])
+@swag_from({
+    'tags': ['Stocks'],
+    'responses': {
+        200: {
+            'description': 'Per-category inventory aggregates (item count, total stock value, low/over-stock counts)',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'categories': {
+                        'type': 'object',
+                        'additionalProperties': {
+                            'type': 'object',
+                            'properties': {
+                                'count': {'type': 'integer'},
+                                'stock_value': {'type': 'number', 'format': 'float'},
+                                'low_stock': {'type': 'integer'},
+                                'over_stock': {'type': 'integer'}
+                            }
+                        }
+                    },
+                    'totals': {'type': 'object'},
+                    'source': {'type': 'string', 'enum': ['redis', 'mongodb']}
+                }
+            }
+        }
+    }
+})
+def get_stock_aggregates():
+    """Agrégats d'inventaire par catégorie"""
+    try:
+        categories, source = get_stock_repository().category_aggregates()
+        totals = {metric: sum(summary[metric] for summary in categories.values())
+                  for metric in ('count', 'low_stock', 'over_stock')}
+        totals['stock_value'] = round(sum(summary['stock_value'] for summary in categories.values()), 2)
+        
+        return jsonify({'categories': categories, 'totals': totals, 'source': source})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stocks_bp.route('/stocks/alerts', methods=['GET'])
+@swag_from({
+    'tags': ['Stocks'],
+    'parameters': [
+        {
+            'name': 'type',
+            'in': 'query',
+            'type': 'string',
+            'required': True,
+            'enum': list(ALERT_TYPES),
+            'description': 'low: quantity <= min_stock, over: quantity >= max_stock'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': DEFAULT_PAGE_SIZE,
+            'description': 'Maximum number of stocks (1-100)'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Stocks in alert, most critical first',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'type': {'type': 'string'},
+                    'stocks': {
+                        'type': 'array',
+                        'items': {'$ref': '#/definitions/Stock'}
+                    },
+                    'count': {'type': 'integer'},
+                    'source': {'type': 'string', 'enum': ['redis', 'mongodb']}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid parameters'
+        }
+    }
+})
+def get_stock_alerts():
+    """Stocks en alerte (sous min_stock ou au-dessus de max_stock)"""
+    try:
+        alert_type = request.args.get('type', '')
+        if alert_type not in ALERT_TYPES:
+            return jsonify({'error': f"Le paramètre type doit être l'une des valeurs: {', '.join(ALERT_TYPES)}"}), 400
+        
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'Le paramètre limit doit être un nombre entier'}), 400
+        
+        is_valid, error = QueryValidator.validate_pagination_params(1, limit)
+        if not is_valid:
+            return jsonify({'error': error}), 400
+        
+        stocks, source = get_stock_repository().alerted(alert_type, limit)
         
         return jsonify({
-            'stock': stock,
-            'message': 'Stock created successfully'
-        }), 201
+            'type': alert_type,
+            'stocks': stocks,
+            'count': len(stocks),
+            'source': source
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stocks_bp.route('/stocks/export', methods=['GET'])
+@swag_from({
+    'tags': ['Stocks'],
+    'produces': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'enum': ['ndjson', 'csv'],
+            'default': 'ndjson',
+            'description': 'Export format'
+        },
+        {
+            'name': 'category',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Filter by category'
+        },
+        {
+            'name': 'search',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Search in name, description or symbol'
+        },
+        FIELDS_PARAMETER
+    ],
+    'responses': {
+        200: {
+            'description': 'Streamed rows; the last line is a trailer with the row count '
+                           '({"_trailer": {"row_count": n, "complete": true}} or "#row_count,n")'
+        },
+        400: {
+            'description': 'Invalid format or fields'
+        }
+    }
+})
+def export_stocks():
+    """Exporter l'inventaire en streaming (NDJSON ou CSV)"""
+    try:
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Format non supporté: {export_format}'}), 400
+        
+        fields, error = _parse_fields()
+        if error:
+            return jsonify({'error': error}), 400
+        
+        rows = get_stock_repository().iter_stocks(
+            category=request.args.get('category'),
+            search=request.args.get('search', '').strip(),
+            fields=fields,
+            batch_size=current_app.config['EXPORT_BATCH_SIZE']
+        )
+        if export_format == 'csv':
+            body = _export_csv(rows, fields or STOCK_FIELDS)
+        else:
+            body = _export_ndjson(rows)
+        
+        filename = f"stocks-export-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{export_format}"
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _import_source():
+    """Flux et format d'un import: fichier multipart 'file' ou corps brut de la requête"""
+    import_format = request.args.get('format', '').lower()
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return None, None
+        if not import_format and '.' in (upload.filename or ''):
+            import_format = upload.filename.rsplit('.', 1)[1].lower()
+        return upload.stream, import_format
+    
+    if not import_format:
+        import_format = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    return request.stream, import_format
+
+@stocks_bp.route('/stocks/import', methods=['POST'])
+@swag_from({
+    'tags': ['Stocks'],
+    'consumes': ['multipart/form-data', 'text/csv', 'application/x-ndjson'],
+    'parameters': [
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'enum': ['csv', 'ndjson'],
+            'description': 'Input format (default: from file extension or Content-Type)'
+        },
+        {
+            'name': 'file',
+            'in': 'formData',
+            'type': 'file',
+            'required': False,
+            'description': 'CSV (header row) or NDJSON file; the raw request body is used otherwise'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Import report with per-row errors'
+        },
+        400: {
+            'description': 'Missing upload or unsupported format'
+        },
+        503: {
+            'description': 'Unique product_id index not created yet (Retry-After)'
+        }
+    }
+})
+def import_stocks_file():
+    """Importer des stocks en streaming (CSV ou NDJSON)"""
+    try:
+        stream, import_format = _import_source()
+        if stream is None:
+            return jsonify({'error': 'No file provided'}), 400
+        if import_format not in IMPORT_FORMATS:
+            return jsonify({'error': f'Format non supporté: {import_format}'}), 400
+        error = _unique_index_missing()
+        if error:
+            return error
+        
+        report = import_stocks(
+            get_stock_repository(),
+            stream,
+            import_format,
+            chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+            max_errors=current_app.config['IMPORT_MAX_ERRORS']
+        )
+        return jsonify({**report, 'message': 'Import completed'})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -254,7 +927,9 @@ def create_stock():
             'type': 'string',
             'required': True,
             'description': 'Stock symbol'
-        }
+        },
+        FIELDS_PARAMETER,
+        IF_NONE_MATCH_PARAMETER
     ],
     'responses': {
         200: {
@@ -262,23 +937,13 @@ def create_stock():
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'stock': {
-                        'type': 'object',
-                        'properties': {
-                            'symbol': {'type': 'string'},
-                            'name': {'type': 'string'},
-                            'price': {'type': 'number'},
-                            'currency': {'type': 'string'},
-                            'quantity': {'type': 'integer'},
-                            'category': {'type': 'string'},
-                            'description': {'type': 'string'},
-                            'created_at': {'type': 'string'},
-                            'updated_at': {'type': 'string'}
-                        }
-                    }
+                    'stock': {'$ref': '#/definitions/Stock'}
                 }
             }
         },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
+        },
         404: {
             'description': 'Stock not found'
         }
@@ -288,15 +953,15 @@ def get_stock(symbol):
     """Récupérer un stock spécifique"""
     try:
         symbol = symbol.upper()
-        stock = stocks_db.get(symbol)
-        
-        if not stock:
-            return jsonify({'error': 'Stock not found'}), 404
+        fields, error = _parse_fields()
+        if error:
+            return _error(error, 400)
         
-        return jsonify({'stock': stock})
+        stock, version = get_stock_repository().get_versioned(symbol, fields=fields)
+        return _stock_response(symbol, stock, version, fields)
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _error(str(e), 500)
 
 @stocks_bp.route('/stocks/<symbol>', methods=['PUT'])
 @swag_from({
@@ -326,16 +991,21 @@ def get_stock(symbol):
                         'example': 185.00,
                         'description': 'Current stock price'
                     },
-                    'currency': {
-                        'type': 'string',
-                        'example': 'USD',
-                        'description': 'Currency code'
-                    },
                     'quantity': {
                         'type': 'integer',
                         'example': 1200,
                         'description': 'Available quantity'
                     },
+                    'min_stock': {
+                        'type': 'integer',
+                        'example': 10,
+                        'description': 'Low stock threshold'
+                    },
+                    'max_stock': {
+                        'type': 'integer',
+                        'example': 1000,
+                        'description': 'Over stock threshold'
+                    },
                     'category': {
                         'type': 'string',
                         'example': 'Technology',
@@ -356,24 +1026,14 @@ def get_stock(symbol):
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'stock': {
-                        'type': 'object',
-                        'properties': {
-                            'symbol': {'type': 'string'},
-                            'name': {'type': 'string'},
-                            'price': {'type': 'number'},
-                            'currency': {'type': 'string'},
-                            'quantity': {'type': 'integer'},
-                            'category': {'type': 'string'},
-                            'description': {'type': 'string'},
-                            'created_at': {'type': 'string'},
-                            'updated_at': {'type': 'string'}
-                        }
-                    },
+                    'stock': {'$ref': '#/definitions/Stock'},
                     'message': {'type': 'string'}
                 }
             }
         },
+        400: {
+            'description': 'Validation error'
+        },
         404: {
             'description': 'Stock not found'
         }
@@ -383,34 +1043,225 @@ def update_stock(symbol):
     """Mettre à jour un stock"""
     try:
         symbol = symbol.upper()
-        stock = stocks_db.get(symbol)
+        repository = get_stock_repository()
+        data, error = _parse_update(repository.get(symbol))
+        if error:
+            return error
         
-        if not stock:
-            return jsonify({'error': 'Stock not found'}), 404
+        return _updated_response(repository.update(symbol, data))
         
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
+    except Exception as e:
+        return _error(str(e), 500)
+
+@stocks_bp.route('/stocks/<symbol>/adjust', methods=['POST'])
+@swag_from({
+    'tags': ['Stocks'],
+    'parameters': [
+        {
+            'name': 'symbol',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'Stock symbol'
+        },
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['quantity_change'],
+                'properties': {
+                    'quantity_change': {
+                        'type': 'integer',
+                        'example': -3,
+                        'description': 'Quantity to add (positive) or remove (negative)'
+                    },
+                    'user': {
+                        'type': 'string',
+                        'example': 'picker-42',
+                        'description': 'Author recorded in the stock history',
+                        'default': 'system'
+                    },
+                    'notes': {
+                        'type': 'string',
+                        'example': 'Order #1234',
+                        'description': 'Free-form note recorded in the stock history'
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Quantity adjusted atomically',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'stock': {'$ref': '#/definitions/Stock'},
+                    'history': {'type': 'object'},
+                    'message': {'type': 'string'}
+                }
+            }
+        },
+        400: {
+            'description': 'Validation error'
+        },
+        404: {
+            'description': 'Stock not found'
+        },
+        409: {
+            'description': 'Insufficient stock'
+        }
+    }
+})
+def adjust_stock(symbol):
+    """Ajuster la quantité d'un stock de façon atomique"""
+    try:
+        symbol = symbol.upper()
+        adjustment, error = _parse_adjustment()
+        if error:
+            return error
+        
+        try:
+            result = get_stock_repository().adjust(symbol, **adjustment)
+        except ValueError as e:
+            return _error(str(e), 409)
+        
+        return _adjusted_response(result)
+        
+    except Exception as e:
+        return _error(str(e), 500)
+
+def _parse_datetime_param(name):
+    """Lit un paramètre de date ISO 8601; retourne (datetime UTC naïf ou None, message d'erreur)"""
+    raw = request.args.get(name, '').strip()
+    if not raw:
+        return None, None
+    try:
+        value = datetime.fromisoformat(raw.replace('Z', '+00:00'))
+    except ValueError:
+        return None, f"Le paramètre {name} doit être une date ISO 8601"
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value, None
+
+@stocks_bp.route('/stocks/<symbol>/history', methods=['GET'])
+@swag_from({
+    'tags': ['Stocks'],
+    'parameters': [
+        {
+            'name': 'symbol',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'Stock symbol'
+        },
+        {
+            'name': 'from',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date-time',
+            'required': False,
+            'description': 'Start of the time range (inclusive, ISO 8601, UTC if no offset)'
+        },
+        {
+            'name': 'to',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date-time',
+            'required': False,
+            'description': 'End of the time range (exclusive, ISO 8601, UTC if no offset)'
+        },
+        {
+            'name': 'bucket',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'enum': list(BUCKETS),
+            'description': 'Return precomputed per-hour or per-day rollups (count, net/min/max change, min/max quantity) instead of raw movements'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': DEFAULT_HISTORY_PAGE_SIZE,
+            'description': 'Page size (1-100)'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Opaque cursor returned as next_cursor by the previous page'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Page of stock movements (or rollups), most recent first',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'product_id': {'type': 'string'},
+                    'history': {'type': 'array', 'items': {'type': 'object'}},
+                    'rollups': {'type': 'array', 'items': {'type': 'object'}},
+                    'count': {'type': 'integer'},
+                    'next_cursor': {'type': 'string'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid parameters'
+        },
+        404: {
+            'description': 'Stock not found'
+        }
+    }
+})
+def get_stock_history(symbol):
+    """Historique des mouvements d'un stock (brut ou agrégé par heure/jour)"""
+    try:
+        symbol = symbol.upper()
+        bucket = request.args.get('bucket') or None
+        cursor = request.args.get('cursor') or None
+        
+        try:
+            limit = int(request.args.get('limit', DEFAULT_HISTORY_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'Le paramètre limit doit être un nombre entier'}), 400
         
-        # Mettre à jour les champs
-        updatable_fields = ['name', 'price', 'currency', 'quantity', 'category', 'description']
+        is_valid, error = QueryValidator.validate_pagination_params(1, limit)
+        if not is_valid:
+            return jsonify({'error': error}), 400
         
-        for field in updatable_fields:
-            if field in data:
-                if field in ['price']:
-                    stock[field] = float(data[field])
-                elif field in ['quantity']:
-                    stock[field] = int(data[field])
-                else:
-                    stock[field] = data[field]
+        start, error = _parse_datetime_param('from')
+        if not error:
+            end, error = _parse_datetime_param('to')
+        if error:
+            return jsonify({'error': error}), 400
         
-        stock['updated_at'] = datetime.utcnow().isoformat()
+        if not get_stock_repository().get(symbol, fields=['product_id']):
+            return jsonify({'error': 'Stock not found'}), 404
+        
+        history = get_history_repository()
+        if bucket:
+            entries, next_cursor = history.list_rollups(symbol, bucket, start=start, end=end,
+                                                        limit=limit, cursor=cursor)
+            key = 'rollups'
+        else:
+            entries, next_cursor = history.list(symbol, start=start, end=end, limit=limit, cursor=cursor)
+            key = 'history'
         
         return jsonify({
-            'stock': stock,
-            'message': 'Stock updated successfully'
+            'product_id': symbol,
+            key: entries,
+            'count': len(entries),
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -447,16 +1298,50 @@ def delete_stock(symbol):
     try:
         symbol = symbol.upper()
         
-        if symbol not in stocks_db:
-            return jsonify({'error': 'Stock not found'}), 404
+        # Supprimer le stock (et son entrée de cache)
+        return _deleted_response(get_stock_repository().delete(symbol), symbol)
         
-        # Supprimer le stock
-        del stocks_db[symbol]
+    except Exception as e:
+        return _error(str(e), 500)
+
+@stocks_bp.route('/cache/stats', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'responses': {
+        200: {
+            'description': 'Cache statistics (L1 in-process and L2 Redis hit/miss counts)'
+        }
+    }
+})
+def cache_stats():
+    """Statistiques du cache"""
+    try:
+        cache = get_stock_repository().cache
+        if cache is None:
+            return jsonify({'enabled': False})
         
-        return jsonify({
-            'message': 'Stock deleted successfully',
-            'deleted_symbol': symbol
-        })
+        return jsonify({'enabled': True, **cache.get_stats()})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stocks_bp.route('/history/stats', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'responses': {
+        200: {
+            'description': 'Write-behind history writer statistics for this worker (queue depth, flush latency)'
+        }
+    }
+})
+def history_stats():
+    """Statistiques de l'écriture différée de l'historique"""
+    try:
+        writer = get_history_repository().writer
+        if writer is None:
+            return jsonify({'write_behind': False})
+        
+        return jsonify({'write_behind': True, **writer.get_stats()})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,58 @@
+import logging
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # pragma: no cover - motor n'est requis qu'en mode ASGI
+    AsyncIOMotorClient = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMongoDBService:
+    """Client MongoDB asyncio (motor) du mode ASGI.
+
+    Les index sont créés par MongoDBService au démarrage de l'application Flask: ce
+    service ne fait que lire et écrire. Le client se lie à la boucle d'événements au
+    premier appel, il doit donc être créé dans le processus qui sert les requêtes.
+    """
+
+    def __init__(self, connection_string, database_name, max_pool_size: int = 100):
+        if AsyncIOMotorClient is None:
+            raise RuntimeError("Le mode ASGI nécessite le paquet motor")
+        self.database_name = database_name
+        self.client = AsyncIOMotorClient(
+            connection_string,
+            maxPoolSize=max_pool_size,
+            serverSelectionTimeoutMS=5000,
+            connectTimeoutMS=5000,
+            socketTimeoutMS=5000
+        )
+        self.db = self.client[database_name]
+
+    def get_collection(self, collection_name):
+        return self.db[collection_name]
+
+    async def health_check(self) -> bool:
+        try:
+            await self.client.admin.command('ping')
+            return True
+        except Exception:
+            return False
+
+    def close_connection(self):
+        self.client.close()
+        logger.info("🔌 Connexion MongoDB asyncio fermée")
+
+# Instance globale
+async_mongo_service = None
+
+def init_async_mongo_service(connection_string, database_name, **options):
+    global async_mongo_service
+    async_mongo_service = AsyncMongoDBService(connection_string, database_name, **options)
+    return async_mongo_service
+
+def get_async_mongo_service():
+    global async_mongo_service
+    if async_mongo_service is None:
+        raise RuntimeError("MongoDB asyncio non initialisé")
+    return async_mongo_service
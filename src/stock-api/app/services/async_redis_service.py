@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+import redis.asyncio
+
+from app.services.redis_service import INVALIDATE_TAGS_SCRIPT, RedisCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRedisCacheService:
+    """Pendant asyncio de RedisCacheService pour le mode ASGI.
+
+    Mêmes clés, codec, TTL et tags que le service synchrone, dont il partage le
+    circuit breaker: la sonde de reconnexion reste celle du client synchrone. Avec
+    un ``channel``, chaque écriture publie l'invalidation attendue par les caches L1
+    (TieredCacheService) des routes servies en WSGI. Les invalidations refusées ou en
+    échec rejoignent la file différée du service synchrone, rejouée avant toute lecture.
+    """
+
+    def __init__(self, redis_service: RedisCacheService, max_connections: Optional[int] = None,
+                 channel: Optional[str] = None):
+        self.codec = redis_service.codec
+        self.default_ttl = redis_service.default_ttl
+        self.breaker = redis_service.breaker
+        self.redis_service = redis_service
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self.client = redis.asyncio.Redis(
+            host=redis_service.host,
+            port=redis_service.port,
+            password=redis_service.password,
+            db=redis_service.db,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            retry_on_timeout=True,
+            decode_responses=False,
+            max_connections=max_connections
+        )
+        self._invalidate_tags_script = self.client.register_script(INVALIDATE_TAGS_SCRIPT)
+
+    async def execute(self, command, *args):
+        """Exécute une commande Redis en alimentant le circuit breaker partagé"""
+        try:
+            result = await command(*args)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    def is_connected(self) -> bool:
+        return self.breaker.allow_request()
+
+    async def _ready(self) -> bool:
+        """is_connected, après rejeu des invalidations différées (client synchrone, hors de la boucle)"""
+        if self.redis_service.has_pending_invalidations():
+            return await asyncio.to_thread(self.redis_service.is_connected)
+        return self.is_connected()
+
+    async def _publish(self, keys: Iterable[str]) -> None:
+        if self.channel is None:
+            return
+        try:
+            message = json.dumps({'origin': self.instance_id, 'keys': list(keys), 'pattern': None})
+            await self.execute(self.client.publish, self.channel, message)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur publication invalidation cache: {e}")
+
+    async def get(self, key: str) -> Any:
+        if not await self._ready():
+            return None
+
+        try:
+            value = await self.execute(self.client.get, key)
+            if value:
+                return self.codec.decode(value)
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur récupération cache {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None,
+                  tags: Optional[Iterable[str]] = None, broadcast: bool = True) -> bool:
+        """``broadcast=False`` pour un remplissage après lecture: aucune invalidation publiée"""
+        if not await self._ready():
+            return False
+
+        try:
+            serialized_value = self.codec.encode(value)
+            actual_ttl = ttl if ttl is not None else self.default_ttl
+            pipe = self.client.pipeline(transaction=bool(tags))
+            pipe.setex(key, actual_ttl, serialized_value)
+            # Le set de tags vit au moins aussi longtemps que ses membres
+            tag_ttl = max(actual_ttl, self.default_ttl)
+            for tag in tags or ():
+                pipe.sadd(RedisCacheService.tag_key(tag), key)
+                pipe.expire(RedisCacheService.tag_key(tag), tag_ttl)
+            result = await self.execute(pipe.execute)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur stockage cache {key}: {e}")
+            return False
+        if broadcast:
+            await self._publish([key])
+        return bool(result[0])
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys or not await self._ready():
+            return {}
+
+        try:
+            values = await self.execute(self.client.mget, keys)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur récupération cache multiple ({len(keys)} clés): {e}")
+            return {}
+
+        results = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            try:
+                results[key] = self.codec.decode(value)
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur décodage cache {key}: {e}")
+        return results
+
+    async def delete(self, key: str) -> bool:
+        if not await self._ready():
+            self.redis_service.defer_invalidation(keys=[key])
+            return False
+
+        try:
+            result = await self.execute(self.client.delete, key)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur suppression cache {key}, différée: {e}")
+            self.redis_service.defer_invalidation(keys=[key])
+            return False
+        await self._publish([key])
+        return result > 0
+
+    async def counter(self, key: str, increment: bool = False) -> Optional[int]:
+        """Comme RedisCacheService.counter: clé absente initialisée à l'horodatage courant (ns)"""
+        if not await self._ready():
+            if increment:
+                self.redis_service.defer_invalidation(counters=[key])
+            return None
+
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.set(key, time.time_ns(), nx=True)
+            if increment:
+                pipe.incr(key)
+            else:
+                pipe.get(key)
+            return int((await self.execute(pipe.execute))[1])
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur compteur cache {key}: {e}")
+            if increment:
+                self.redis_service.defer_invalidation(counters=[key])
+            return None
+
+    async def invalidate_tags(self, *tags: str) -> List[str]:
+        if not tags:
+            return []
+        if not await self._ready():
+            self.redis_service.defer_invalidation(tags=tags)
+            return []
+
+        try:
+            tag_keys = [RedisCacheService.tag_key(tag) for tag in tags]
+            invalidated = await self.execute(self._invalidate_tags_script, tag_keys)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur invalidation tags {tags}, différée: {e}")
+            self.redis_service.defer_invalidation(tags=tags)
+            return []
+        keys = [key.decode() if isinstance(key, bytes) else key for key in invalidated]
+        if keys:
+            await self._publish(keys)
+        return keys
+
+    async def close(self) -> None:
+        await self.client.close()
+        logger.info("🔌 Connexion Redis asyncio fermée")
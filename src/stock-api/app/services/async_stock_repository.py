@@ -0,0 +1,303 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from app.models.stock import Stock, StockHistory
+from app.services.inventory_aggregates import AGGREGATE_PROJECTION, InventoryAggregates
+from app.services.stock_alerts import StockAlertIndex
+from app.services.stock_repository import (DEFAULT_PAGE_SIZE, DEFAULT_SORT, DOCUMENT_PROJECTION,
+                                           LIST_GENERATION_KEY, LIST_TAG_ALL, LIST_TAG_CATEGORY,
+                                           MAX_RANKED_CANDIDATES, SEARCH_SOURCE_FIELDS, StockRepository,
+                                           coerce_stock_fields)
+from app.utils.pagination import decode_cursor
+from app.utils.search import SEARCH_FIELDS, build_search_tokens, match_score
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncStockRepository:
+    """Accès asyncio aux stocks (motor + redis.asyncio) pour le mode ASGI.
+
+    Mêmes documents, clés de cache, tags, génération de listes et curseurs que
+    StockRepository, dont il réutilise les requêtes et la sérialisation (``sync``).
+    Agrégats et index d'alertes sont mis à jour par le client redis.asyncio
+    (``redis_service``); seul l'historique sans écriture différée est exécuté hors
+    de la boucle d'événements.
+    """
+
+    def __init__(self, sync_repository: StockRepository, mongo_service, cache_service=None, redis_service=None):
+        self.sync = sync_repository
+        self.mongo_service = mongo_service
+        self.cache = cache_service
+        self.redis = redis_service if redis_service is not None else cache_service
+        self.cache_ttl = sync_repository.cache_ttl
+
+    @property
+    def collection(self):
+        return self.mongo_service.get_collection('stocks')
+
+    async def _cache_get(self, key: str) -> Any:
+        if self.cache is None:
+            return None
+        return await self.cache.get(key)
+
+    async def _cache_set(self, key: str, value: Any, tags: Optional[List[str]] = None) -> None:
+        if self.cache is not None:
+            await self.cache.set(key, value, ttl=self.cache_ttl, tags=tags, broadcast=False)
+
+    async def _cache_delete(self, key: str) -> None:
+        if self.cache is not None:
+            await self.cache.delete(key)
+
+    async def _invalidate_lists(self, *categories: Optional[str]) -> None:
+        if self.cache is None:
+            return
+        tags = {LIST_TAG_ALL}
+        tags.update(f"{LIST_TAG_CATEGORY}{category}" for category in categories if category)
+        await self.cache.invalidate_tags(*tags)
+        await self.cache.counter(LIST_GENERATION_KEY, increment=True)
+
+    async def list_generation(self) -> Optional[int]:
+        if self.cache is None:
+            return None
+        return await self.cache.counter(LIST_GENERATION_KEY)
+
+    async def _track_changes(self, changes) -> None:
+        """Voir StockRepository._track_changes: mêmes HINCRBY/ZADD, en un pipeline redis.asyncio"""
+        if not changes or (self.sync.aggregates is None and self.sync.alerts is None):
+            return
+        if self.redis is None:
+            await asyncio.to_thread(self.sync._track_changes, changes)
+            return
+
+        deltas = InventoryAggregates.deltas(changes) if self.sync.aggregates is not None else {}
+        scores = StockAlertIndex.scores(changes) if self.sync.alerts is not None else {}
+        if not (deltas or scores) or not self.redis.is_connected():
+            return
+        try:
+            pipe = self.redis.client.pipeline(transaction=True)
+            if deltas:
+                InventoryAggregates.queue(pipe, deltas)
+            if scores:
+                StockAlertIndex.queue(pipe, scores)
+            await self.redis.execute(pipe.execute)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur mise à jour agrégats/index d'alertes ({len(changes)} changements): {e}")
+
+    async def _after_write(self, changes, histories: Tuple[StockHistory, ...] = ()) -> None:
+        """Agrégats, index d'alertes et historique, comme les écritures de StockRepository"""
+        await self._track_changes(changes)
+        if not histories:
+            return
+
+        def record():
+            for history in histories:
+                self.sync.history.record(history.to_document())
+
+        # La file d'écriture différée est non bloquante; sinon insert MongoDB synchrone hors de la boucle
+        if self.sync.history.writer is None:
+            await asyncio.to_thread(record)
+        else:
+            record()
+
+    async def get(self, product_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        stock, _ = await self.get_versioned(product_id, fields)
+        return stock
+
+    async def get_versioned(self, product_id: str,
+                            fields: Optional[List[str]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        key = StockRepository.cache_key(product_id)
+        stock = await self._cache_get(key)
+        # Entrée antérieure au champ version: relue depuis MongoDB
+        if stock is None or 'version' not in stock:
+            document = await self.collection.find_one({'product_id': product_id}, DOCUMENT_PROJECTION)
+            if document is None:
+                return None, None
+            stock = Stock.from_document(document).to_dict()
+            await self._cache_set(key, stock)
+
+        if fields:
+            return {field: stock.get(field) for field in fields}, stock['version']
+        return stock, stock['version']
+
+    async def list(self, category: Optional[str] = None, search: Optional[str] = None,
+                   sort: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                   cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                   generation: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Voir StockRepository.list: même pagination, mêmes entrées de cache"""
+        position = decode_cursor(cursor) if cursor else None
+        query: Dict[str, Any] = {'category': category} if category else {}
+        if generation is None:
+            generation = await self.list_generation()
+
+        if search and not sort:
+            if position is None or position.get('sort') == 'relevance':
+                ranked = await self._list_ranked(query, category, search, limit, position, fields, generation)
+                if ranked is not None:
+                    return ranked
+            sort, position = StockRepository._unranked_position(position)
+
+        sort = sort or DEFAULT_SORT
+        key = StockRepository.list_cache_key(category=category, search=search, sort=sort, limit=limit,
+                                             cursor=cursor, fields=fields, generation=generation)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return cached['stocks'], cached['next_cursor']
+
+        query, projection, order = self.sync._keyset_query(query, search, sort, position, fields)
+        documents = self.collection.find(query, projection).sort(order)
+        if not search:
+            documents = documents.limit(limit + 1)
+        page = []
+        async for document in documents:
+            if search and not match_score(document, search):
+                continue
+            page.append(document)
+            if len(page) > limit:
+                break
+        await documents.close()
+
+        stocks, next_cursor = self.sync._keyset_page(page, sort, limit, fields)
+        await self._cache_list(key, {'stocks': stocks, 'next_cursor': next_cursor}, category, generation)
+        return stocks, next_cursor
+
+    async def _cache_list(self, key: str, value: Any, category: Optional[str], generation: Optional[int]) -> None:
+        # Voir StockRepository._cache_list: clé versionnée par la génération lue avant la requête
+        if generation is not None:
+            await self._cache_set(key, value, tags=StockRepository.list_tags(category))
+
+    async def _list_ranked(self, query: Dict[str, Any], category: Optional[str], search: str, limit: int,
+                           position: Optional[Dict[str, Any]], fields: Optional[List[str]] = None,
+                           generation: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        offset = StockRepository._ranked_offset(position)
+        key = StockRepository.list_cache_key(category=category, search=search, sort='relevance', fields=fields,
+                                             generation=generation)
+        ranked = await self._cache_get(key)
+        if ranked is None:
+            projection = self.sync._projection(fields, *SEARCH_FIELDS)
+            documents = await (self.collection.find(self.sync._search_query(query, search), projection)
+                               .limit(MAX_RANKED_CANDIDATES + 1).to_list(None))
+            ranked = self.sync._ranked_entry(documents, search, fields)
+            await self._cache_list(key, ranked, category, generation)
+        if ranked['stocks'] is None:
+            return None
+        return StockRepository._ranked_page(ranked['stocks'], offset, limit)
+
+    async def create(self, product_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insère un stock; lève DuplicateKeyError si le product_id existe déjà"""
+        values = coerce_stock_fields(data)
+        values.setdefault('description', '')
+        stock = Stock(product_id=product_id, **values)
+
+        document = stock.to_document()
+        document['search_tokens'] = build_search_tokens(document)
+        await self.collection.insert_one(document)
+        histories = ()
+        if stock.quantity:
+            histories = (StockHistory(product_id=product_id, action='create', quantity_change=stock.quantity,
+                                      previous_quantity=0, new_quantity=stock.quantity,
+                                      timestamp=stock.created_at),)
+        await self._after_write([(None, document)], histories)
+
+        # Éviction plutôt que write-through, comme StockRepository (écritures concurrentes)
+        await self._cache_delete(StockRepository.cache_key(product_id))
+        await self._invalidate_lists(stock.category)
+        return stock.to_dict()
+
+    async def update(self, product_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        changes = coerce_stock_fields(data)
+        changes['updated_at'] = datetime.utcnow()
+
+        previous = await self.collection.find_one_and_update(
+            {'product_id': product_id},
+            {'$set': changes, '$inc': {'version': 1}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            await self._cache_delete(StockRepository.cache_key(product_id))
+            return None
+
+        current = {**previous, **changes, 'version': previous.get('version', 0) + 1}
+        histories = ()
+        previous_quantity = previous.get('quantity', 0)
+        if 'quantity' in changes and changes['quantity'] != previous_quantity:
+            histories = (StockHistory(product_id=product_id, action='update',
+                                      quantity_change=changes['quantity'] - previous_quantity,
+                                      previous_quantity=previous_quantity, new_quantity=changes['quantity'],
+                                      timestamp=changes['updated_at']),)
+        await self._after_write([(previous, current)], histories)
+        if any(field in changes for field in SEARCH_SOURCE_FIELDS):
+            # Conditionné sur la version: une mise à jour concurrente plus récente garde ses tokens
+            await self.collection.update_one(
+                {'_id': previous['_id'], 'version': current['version']},
+                {'$set': {'search_tokens': build_search_tokens(current)}}
+            )
+
+        result = Stock.from_document(current).to_dict()
+        await self._cache_delete(StockRepository.cache_key(product_id))
+        await self._invalidate_lists(previous.get('category'), result['category'])
+        return result
+
+    async def adjust(self, product_id: str, quantity_change: int, user: str = 'system',
+                     notes: str = '') -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Voir StockRepository.adjust: $inc conditionnel, ValueError si la quantité est insuffisante"""
+        query: Dict[str, Any] = {'product_id': product_id}
+        if quantity_change < 0:
+            query['quantity'] = {'$gte': -quantity_change}
+
+        now = datetime.utcnow()
+        document = await self.collection.find_one_and_update(
+            query,
+            {'$inc': {'quantity': quantity_change, 'version': 1}, '$set': {'updated_at': now}},
+            projection=DOCUMENT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if document is None:
+            if await self.collection.find_one({'product_id': product_id}, {'_id': 1}) is None:
+                return None
+            raise ValueError("Quantité insuffisante en stock")
+
+        previous_quantity = document['quantity'] - quantity_change
+        history = StockHistory(
+            product_id=product_id,
+            action='add' if quantity_change > 0 else 'remove',
+            quantity_change=quantity_change,
+            previous_quantity=previous_quantity,
+            new_quantity=document['quantity'],
+            user=user,
+            notes=notes,
+            timestamp=now
+        )
+        await self._after_write([({**document, 'quantity': previous_quantity}, document)], (history,))
+
+        stock = Stock.from_document(document).to_dict()
+        await self._cache_delete(StockRepository.cache_key(product_id))
+        await self._invalidate_lists(stock['category'])
+        return stock, history.to_dict()
+
+    async def delete(self, product_id: str) -> bool:
+        previous = await self.collection.find_one_and_delete({'product_id': product_id},
+                                                             projection={'product_id': 1, **AGGREGATE_PROJECTION})
+        await self._cache_delete(StockRepository.cache_key(product_id))
+        if previous is None:
+            return False
+        await self._after_write([(previous, None)])
+        await self._invalidate_lists(previous.get('category'))
+        return True
+
+# Instance globale
+async_stock_repository = None
+
+def init_async_stock_repository(sync_repository, mongo_service, cache_service=None, redis_service=None):
+    global async_stock_repository
+    async_stock_repository = AsyncStockRepository(sync_repository, mongo_service, cache_service, redis_service)
+    return async_stock_repository
+
+def get_async_stock_repository():
+    global async_stock_repository
+    if async_stock_repository is None:
+        raise RuntimeError("Stock repository asyncio non initialisé")
+    return async_stock_repository
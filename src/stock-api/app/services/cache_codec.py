@@ -0,0 +1,100 @@
+import json
+import logging
+import pickle
+import zlib
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson est optionnel
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Premier octet d'un pickle protocole >= 2: permet de relire les anciennes entrées
+PICKLE_PROTOCOL_MARKER = 0x80
+
+FLAG_COMPRESSED = 0x01
+
+
+class JsonCodec:
+    """Encodage JSON compact (orjson si disponible, sinon json standard)"""
+
+    format_id = 0x01
+
+    def dumps(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, payload: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
+
+class PickleCodec:
+    """Repli pour les valeurs non sérialisables en JSON"""
+
+    format_id = 0x02
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, payload: bytes) -> Any:
+        return pickle.loads(payload)
+
+
+CODECS: Dict[str, Any] = {
+    'json': JsonCodec(),
+    'pickle': PickleCodec(),
+}
+CODECS_BY_ID = {codec.format_id: codec for codec in CODECS.values()}
+
+
+class CacheCodec:
+    """Codec versionné des valeurs du cache.
+
+    Format: [format_id][flags][payload]. Le payload est compressé (zlib)
+    au-delà de ``compression_threshold`` octets si cela réduit sa taille.
+    Les entrées écrites par l'ancien ``pickle.dumps`` sont relues telles quelles.
+    """
+
+    def __init__(self, codec: str = 'json', compression_threshold: int = 1024,
+                 compression_level: int = 6):
+        if codec not in CODECS:
+            raise ValueError(f"Codec de cache inconnu: {codec}")
+        self.codec = CODECS[codec]
+        self.fallback = CODECS['pickle']
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+    def encode(self, value: Any) -> bytes:
+        codec = self.codec
+        try:
+            payload = codec.dumps(value)
+        except TypeError:
+            codec = self.fallback
+            payload = codec.dumps(value)
+
+        flags = 0
+        if self.compression_threshold and len(payload) >= self.compression_threshold:
+            compressed = zlib.compress(payload, self.compression_level)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= FLAG_COMPRESSED
+
+        return bytes((codec.format_id, flags)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        if data[0] == PICKLE_PROTOCOL_MARKER:
+            return pickle.loads(data)
+
+        codec = CODECS_BY_ID.get(data[0])
+        if codec is None:
+            raise ValueError(f"Format de cache inconnu: {data[0]:#x}")
+
+        payload = data[2:]
+        if data[1] & FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+        return codec.loads(payload)
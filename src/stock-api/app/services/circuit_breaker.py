@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Machine à états de santé d'une connexion: closed / open / half-open.
+
+    - closed: les commandes passent, les échecs consécutifs sont comptés;
+    - open: les commandes sont court-circuitées, un thread sonde la
+      dépendance avec un backoff exponentiel;
+    - half-open: une seule commande d'essai passe; succès -> closed,
+      échec -> open avec un backoff doublé.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name: str, probe: Callable[[], object], failure_threshold: int = 1,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return False
+        with self._lock:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        if self.state == self.CLOSED and self.failures == 0:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"✅ {self.name}: connexion rétablie, circuit fermé")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Exception = None) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self.state = self.OPEN
+                return
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                logger.warning(f"⚠️ {self.name}: circuit ouvert, cache contourné ({error})")
+                self._start_prober()
+
+    def trip(self, error: Exception = None) -> None:
+        """Ouvre le circuit immédiatement (ex: échec de connexion au démarrage)"""
+        with self._lock:
+            self.failures = max(self.failures, self.failure_threshold - 1)
+        self.record_failure(error)
+
+    def _start_prober(self) -> None:
+        if self._prober is not None and self._prober.is_alive():
+            return
+        self._prober = threading.Thread(
+            target=self._probe_loop, name=f"{self.name}-circuit-probe", daemon=True
+        )
+        self._prober.start()
+
+    def _probe_loop(self) -> None:
+        while self.state != self.CLOSED:
+            time.sleep(self.backoff)
+            with self._lock:
+                if self.state == self.OPEN:
+                    self.state = self.HALF_OPEN
+            try:
+                self.probe()
+                self.record_success()
+            except Exception as e:
+                with self._lock:
+                    if self.state == self.HALF_OPEN:
+                        self.backoff = min(self.backoff * 2, self.max_backoff)
+                        self.state = self.OPEN
+                        self._trial_in_flight = False
+                logger.debug(f"{self.name}: sonde en échec, prochain essai dans {self.backoff}s ({e})")
@@ -0,0 +1,229 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING, UpdateOne
+
+from app.models.stock import StockHistory
+from app.utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ('hour', 'day')
+DEFAULT_HISTORY_PAGE_SIZE = 100
+
+
+def bucket_start(timestamp: datetime, bucket: str) -> datetime:
+    """Début de l'intervalle (heure ou jour) contenant timestamp"""
+    if bucket == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class HistoryRepository:
+    """Historique des mouvements de stock et agrégats par heure/jour maintenus à l'écriture.
+
+    Chaque entrée écrite met à jour (upsert $inc/$min/$max) un document par produit et
+    par intervalle dans ``stock_history_rollups``: les tableaux de bord lisent quelques
+    centaines d'agrégats au lieu de parcourir les événements bruts. ``rebuild_rollups``
+    recalcule les intervalles récents depuis l'historique brut (report perdu après un
+    échec d'écriture des agrégats).
+    """
+
+    def __init__(self, mongo_service, history_writer=None):
+        self.mongo_service = mongo_service
+        self.writer = history_writer
+
+    @property
+    def collection(self):
+        return self.mongo_service.get_collection('stock_history')
+
+    @property
+    def rollup_collection(self):
+        return self.mongo_service.get_collection('stock_history_rollups')
+
+    def record(self, document: Dict[str, Any]) -> None:
+        """Écrit une entrée: via le writer différé s'il existe, sinon insert direct + agrégats"""
+        if self.writer is not None:
+            self.writer.record(document)
+            return
+        self.collection.insert_one(document)
+        try:
+            self.apply_rollups([document])
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur mise à jour agrégats d'historique, corrigée à la prochaine réconciliation: {e}")
+
+    @staticmethod
+    def rollup_id(product_id: str, bucket: str, start: datetime) -> str:
+        # _id déterministe: deux workers qui créent le même intervalle ne le dupliquent pas
+        return f"{product_id}|{bucket}|{start.isoformat()}"
+
+    def apply_rollups(self, documents: List[Dict[str, Any]]) -> None:
+        """Reporte des entrées écrites dans les agrégats (un upsert par produit et intervalle)"""
+        rollups: Dict[Tuple[str, str, datetime], Dict[str, Any]] = {}
+        for document in documents:
+            change = document['quantity_change']
+            quantity = document['new_quantity']
+            for bucket in BUCKETS:
+                start = bucket_start(document['timestamp'], bucket)
+                rollup = rollups.setdefault((document['product_id'], bucket, start), {
+                    'count': 0, 'net_change': 0, 'min_change': change, 'max_change': change,
+                    'min_quantity': quantity, 'max_quantity': quantity
+                })
+                rollup['count'] += 1
+                rollup['net_change'] += change
+                rollup['min_change'] = min(rollup['min_change'], change)
+                rollup['max_change'] = max(rollup['max_change'], change)
+                rollup['min_quantity'] = min(rollup['min_quantity'], quantity)
+                rollup['max_quantity'] = max(rollup['max_quantity'], quantity)
+
+        if not rollups:
+            return
+        operations = [
+            UpdateOne(
+                {'_id': self.rollup_id(product_id, bucket, start)},
+                {
+                    '$setOnInsert': {'product_id': product_id, 'bucket': bucket, 'start': start},
+                    '$inc': {'count': rollup['count'], 'net_change': rollup['net_change']},
+                    '$min': {'min_change': rollup['min_change'], 'min_quantity': rollup['min_quantity']},
+                    '$max': {'max_change': rollup['max_change'], 'max_quantity': rollup['max_quantity']}
+                },
+                upsert=True
+            )
+            for (product_id, bucket, start), rollup in rollups.items()
+        ]
+        self.rollup_collection.bulk_write(operations, ordered=False)
+
+    def rebuild_rollups(self, days: float = 2, batch_size: int = 1000) -> int:
+        """Remplace les agrégats des intervalles des ``days`` derniers jours par le calcul
+        depuis l'historique brut (pipeline d'agrégation MongoDB, sans transfert des entrées).
+
+        Une entrée insérée dont le report n'est pas encore appliqué au moment du calcul
+        est comptée deux fois: l'écart est corrigé à la réconciliation suivante.
+        """
+        since = bucket_start(datetime.utcnow() - timedelta(days=days), 'day')
+        day = {'year': {'$year': '$timestamp'}, 'month': {'$month': '$timestamp'},
+               'day': {'$dayOfMonth': '$timestamp'}}
+        starts = {'hour': {'$dateFromParts': {**day, 'hour': {'$hour': '$timestamp'}}},
+                  'day': {'$dateFromParts': day}}
+
+        rebuilt = 0
+        operations = []
+        for bucket in BUCKETS:
+            pipeline = [
+                {'$match': {'timestamp': {'$gte': since}}},
+                {'$group': {
+                    '_id': {'product_id': '$product_id', 'start': starts[bucket]},
+                    'count': {'$sum': 1},
+                    'net_change': {'$sum': '$quantity_change'},
+                    'min_change': {'$min': '$quantity_change'},
+                    'max_change': {'$max': '$quantity_change'},
+                    'min_quantity': {'$min': '$new_quantity'},
+                    'max_quantity': {'$max': '$new_quantity'}
+                }}
+            ]
+            for group in self.collection.aggregate(pipeline, allowDiskUse=True):
+                key = group.pop('_id')
+                product_id, start = key['product_id'], key['start']
+                operations.append(UpdateOne(
+                    {'_id': self.rollup_id(product_id, bucket, start)},
+                    {'$set': {'product_id': product_id, 'bucket': bucket, 'start': start, **group}},
+                    upsert=True
+                ))
+                if len(operations) >= batch_size:
+                    self.rollup_collection.bulk_write(operations, ordered=False)
+                    rebuilt += len(operations)
+                    operations = []
+        if operations:
+            self.rollup_collection.bulk_write(operations, ordered=False)
+            rebuilt += len(operations)
+        logger.info(f"✅ Agrégats d'historique recalculés depuis {since.date()} ({rebuilt} intervalles)")
+        return rebuilt
+
+    @staticmethod
+    def _time_range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, datetime]:
+        time_range = {}
+        if start is not None:
+            time_range['$gte'] = start
+        if end is not None:
+            time_range['$lt'] = end
+        return time_range
+
+    def list(self, product_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             limit: int = DEFAULT_HISTORY_PAGE_SIZE,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Entrées d'un produit, plus récentes d'abord, paginées par clé (timestamp, _id)"""
+        query: Dict[str, Any] = {'product_id': product_id}
+        time_range = self._time_range(start, end)
+        if time_range:
+            query['timestamp'] = time_range
+
+        if cursor:
+            position = decode_cursor(cursor)
+            if not isinstance(position.get('timestamp'), datetime) or not ObjectId.is_valid(position.get('id')):
+                raise ValueError("Curseur de pagination invalide")
+            last_id = ObjectId(position['id'])
+            query['$or'] = [
+                {'timestamp': {'$lt': position['timestamp']}},
+                {'timestamp': position['timestamp'], '_id': {'$lt': last_id}}
+            ]
+
+        documents = list(
+            self.collection.find(query)
+            .sort([('timestamp', DESCENDING), ('_id', DESCENDING)])
+            .limit(limit + 1)
+        )
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            last = documents[-1]
+            next_cursor = encode_cursor({'timestamp': last['timestamp'], 'id': str(last['_id'])})
+        return [StockHistory.from_document(document).to_dict() for document in documents], next_cursor
+
+    def list_rollups(self, product_id: str, bucket: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, limit: int = DEFAULT_HISTORY_PAGE_SIZE,
+                     cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Agrégats d'un produit par intervalle, plus récents d'abord, paginés par début d'intervalle"""
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket doit être l'une des valeurs: {', '.join(BUCKETS)}")
+
+        query: Dict[str, Any] = {'product_id': product_id, 'bucket': bucket}
+        # L'intervalle contenant start est inclus
+        time_range = self._time_range(bucket_start(start, bucket) if start else None, end)
+        if cursor:
+            position = decode_cursor(cursor)
+            if not isinstance(position.get('start'), datetime):
+                raise ValueError("Curseur de pagination invalide")
+            if '$lt' not in time_range or position['start'] < time_range['$lt']:
+                time_range['$lt'] = position['start']
+        if time_range:
+            query['start'] = time_range
+
+        documents = list(
+            self.rollup_collection.find(query, {'_id': 0, 'product_id': 0})
+            .sort('start', DESCENDING)
+            .limit(limit + 1)
+        )
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor({'start': documents[-1]['start']})
+        for document in documents:
+            document['start'] = document['start'].isoformat()
+        return documents, next_cursor
+
+
+# Instance globale
+history_repository = None
+
+def init_history_repository(mongo_service, history_writer=None):
+    global history_repository
+    history_repository = HistoryRepository(mongo_service, history_writer)
+    return history_repository
+
+def get_history_repository():
+    global history_repository
+    if history_repository is None:
+        raise RuntimeError("History repository non initialisé")
+    return history_repository
@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+HISTORY_QUEUE_DEPTH = Gauge(
+    'stock_history_queue_depth', "Entrées d'historique en attente d'écriture (par worker)"
+)
+HISTORY_FLUSH_SECONDS = Histogram(
+    'stock_history_flush_seconds', "Durée des insert_many de l'historique"
+)
+HISTORY_FLUSHED = Counter(
+    'stock_history_entries_flushed_total', "Entrées d'historique écrites"
+)
+HISTORY_DROPPED = Counter(
+    'stock_history_entries_dropped_total', "Entrées d'historique abandonnées (file pleine)"
+)
+
+
+class HistoryWriter:
+    """Écriture différée et groupée des StockHistory (un writer par worker).
+
+    Les entrées sont accumulées en mémoire et écrites par un thread de fond avec
+    insert_many dès que ``batch_size`` entrées sont en attente ou toutes les
+    ``flush_interval`` secondes. ``close`` vide la file à l'arrêt du worker.
+    ``on_flush`` reçoit les entrées effectivement insérées (mise à jour des agrégats).
+    """
+
+    def __init__(self, collection_provider: Callable[[], Any], batch_size: int = 500,
+                 flush_interval: float = 1.0, max_queue: int = 100000,
+                 on_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self._get_collection = collection_provider
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.stats = {'flushed': 0, 'dropped': 0, 'failed_flushes': 0,
+                      'last_flush_seconds': 0.0, 'last_flush_size': 0}
+
+    def _ensure_thread(self) -> None:
+        # Démarrage paresseux: un thread ne survit pas au fork, chaque worker a le sien
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='stock-history-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, document: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._buffer) >= self.max_queue:
+                self._buffer.popleft()
+                self.stats['dropped'] += 1
+                HISTORY_DROPPED.inc()
+            self._buffer.append(document)
+            depth = len(self._buffer)
+        HISTORY_QUEUE_DEPTH.set(depth)
+        self._ensure_thread()
+        if depth >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._buffer)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            written, retry = batch, []
+            try:
+                self._get_collection().insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Un doublon (11000) est une entrée écrite par un essai précédent interrompu (timeout
+                # après insertion): jamais reportée dans les agrégats, elle compte comme écrite
+                errors = {error['index']: error.get('code') for error in e.details.get('writeErrors', [])}
+                written = [document for index, document in enumerate(batch) if errors.get(index, 11000) == 11000]
+                retry = [document for index, document in enumerate(batch) if errors.get(index, 11000) != 11000]
+            except Exception as e:
+                # Écriture partielle possible: les _id sont déjà attribués, le nouvel essai les verra en doublon
+                written, retry = [], batch
+                logger.warning(f"⚠️ Erreur écriture historique ({len(batch)} entrées): {e}")
+            if retry:
+                # Remise en tête de file: les entrées seront retentées au prochain cycle
+                self.stats['failed_flushes'] += 1
+                self._requeue(retry)
+            HISTORY_QUEUE_DEPTH.set(len(self._buffer))
+
+            if written and self.on_flush is not None:
+                try:
+                    self.on_flush(written)
+                except Exception as e:
+                    # Non retenté ($inc non idempotent): HistoryRepository.rebuild_rollups corrige les agrégats
+                    logger.warning(f"⚠️ Erreur post-écriture historique ({len(written)} entrées): {e}")
+
+            elapsed = time.perf_counter() - started
+            HISTORY_FLUSH_SECONDS.observe(elapsed)
+            HISTORY_FLUSHED.inc(len(written))
+            self.stats['flushed'] += len(written)
+            self.stats['last_flush_seconds'] = round(elapsed, 6)
+            self.stats['last_flush_size'] = len(written)
+            if retry:
+                return 0
+
+        if self.queue_depth >= self.batch_size:
+            self._wakeup.set()
+        return len(batch)
+
+    def _requeue(self, documents: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._buffer.extendleft(reversed(documents))
+            overflow = len(self._buffer) - self.max_queue
+            if overflow > 0:
+                for _ in range(overflow):
+                    self._buffer.popleft()
+                self.stats['dropped'] += overflow
+                HISTORY_DROPPED.inc(overflow)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Arrête le thread et écrit tout ce qui reste en file"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while self.queue_depth and time.monotonic() < deadline:
+            if not self.flush():
+                break
+        if self.queue_depth:
+            logger.error(f"❌ {self.queue_depth} entrées d'historique non écrites à l'arrêt")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'queue_depth': self.queue_depth, **self.stats}
@@ -0,0 +1,157 @@
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.models.stock import FIELD_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_KEY_PREFIX = 'stocks:aggregates:category:'
+CATEGORIES_KEY = 'stocks:aggregates:categories'
+
+# Champs MongoDB dont dépend la contribution d'un stock aux agrégats
+AGGREGATE_SOURCE_FIELDS = ('category', 'quantity', 'price', 'min_stock', 'max_stock')
+AGGREGATE_PROJECTION = {field: 1 for field in AGGREGATE_SOURCE_FIELDS}
+COUNT_METRICS = ('count', 'low_stock', 'over_stock')
+
+
+def contribution(document: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Catégorie et contribution d'un document stock aux agrégats"""
+    def value(name):
+        found = document.get(name)
+        return FIELD_DEFAULTS[name] if found is None else found
+
+    quantity = value('quantity')
+    return value('category'), {
+        'count': 1,
+        'stock_value': quantity * value('price'),
+        'low_stock': int(quantity <= value('min_stock')),
+        'over_stock': int(quantity >= value('max_stock'))
+    }
+
+
+def _summary(values: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {metric: int(values.get(metric, 0)) for metric in COUNT_METRICS}
+    summary['stock_value'] = round(float(values.get('stock_value', 0)), 2)
+    return summary
+
+
+def compute_aggregates(collection) -> Dict[str, Dict[str, Any]]:
+    """Agrégats calculés par MongoDB (pipeline d'agrégation, sans transfert des documents)"""
+    def field(name):
+        return {'$ifNull': [f"${name}", FIELD_DEFAULTS[name]]}
+
+    pipeline = [
+        {'$group': {
+            '_id': field('category'),
+            'count': {'$sum': 1},
+            'stock_value': {'$sum': {'$multiply': [field('quantity'), field('price')]}},
+            'low_stock': {'$sum': {'$cond': [{'$lte': [field('quantity'), field('min_stock')]}, 1, 0]}},
+            'over_stock': {'$sum': {'$cond': [{'$gte': [field('quantity'), field('max_stock')]}, 1, 0]}}
+        }}
+    ]
+    return {group['_id']: _summary(group) for group in collection.aggregate(pipeline)}
+
+
+class InventoryAggregates:
+    """Agrégats d'inventaire par catégorie (nombre, valeur, alertes) dans des hashes Redis.
+
+    Chaque écriture applique le delta entre l'ancien et le nouveau document
+    (HINCRBY/HINCRBYFLOAT), la lecture est en O(catégories). ``reconcile`` recalcule
+    tout par un pipeline d'agrégation MongoDB pour corriger la dérive (Redis
+    indisponible lors d'une écriture, arrondis flottants, écritures concurrentes).
+    """
+
+    def __init__(self, redis_service, mongo_service):
+        self.redis = redis_service
+        self.mongo_service = mongo_service
+
+    @property
+    def collection(self):
+        return self.mongo_service.get_collection('stocks')
+
+    @staticmethod
+    def category_key(category: str) -> str:
+        return f"{AGGREGATE_KEY_PREFIX}{category}"
+
+    @staticmethod
+    def deltas(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> Dict[str, Dict[str, Any]]:
+        """Deltas non nuls par catégorie pour des changements (avant, après); None = document absent"""
+        deltas: Dict[str, Dict[str, Any]] = {}
+        for before, after in changes:
+            for document, sign in ((before, -1), (after, 1)):
+                if document is None:
+                    continue
+                category, values = contribution(document)
+                delta = deltas.setdefault(category, {'count': 0, 'stock_value': 0, 'low_stock': 0, 'over_stock': 0})
+                for metric, value in values.items():
+                    delta[metric] += sign * value
+        return {category: delta for category, delta in deltas.items() if any(delta.values())}
+
+    @classmethod
+    def queue(cls, pipe, deltas: Dict[str, Dict[str, Any]]) -> None:
+        """Ajoute les HINCRBY/HINCRBYFLOAT des deltas à un pipeline (client synchrone ou asyncio)"""
+        for category, delta in deltas.items():
+            key = cls.category_key(category)
+            for metric in COUNT_METRICS:
+                if delta[metric]:
+                    pipe.hincrby(key, metric, delta[metric])
+            if delta['stock_value']:
+                pipe.hincrbyfloat(key, 'stock_value', delta['stock_value'])
+        pipe.sadd(CATEGORIES_KEY, *deltas)
+
+    def apply(self, changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Applique des changements (avant, après); None = document absent (création/suppression)"""
+        deltas = self.deltas(changes)
+        if not deltas or not self.redis.is_connected():
+            return
+
+        try:
+            pipe = self.redis.client.pipeline(transaction=True)
+            self.queue(pipe, deltas)
+            self.redis.execute(pipe.execute)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur mise à jour agrégats ({', '.join(deltas)}): {e}")
+
+    def get(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Agrégats par catégorie depuis Redis; None si Redis est indisponible"""
+        if not self.redis.is_connected():
+            return None
+        try:
+            categories = sorted(category.decode() for category in self.redis.execute(self.redis.client.smembers, CATEGORIES_KEY))
+            pipe = self.redis.client.pipeline(transaction=False)
+            for category in categories:
+                pipe.hgetall(self.category_key(category))
+            hashes = self.redis.execute(pipe.execute)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur lecture agrégats: {e}")
+            return None
+
+        aggregates = {}
+        for category, values in zip(categories, hashes):
+            summary = _summary({field.decode(): value for field, value in values.items()})
+            if summary['count'] > 0:
+                aggregates[category] = summary
+        return aggregates
+
+    def compute(self) -> Dict[str, Dict[str, Any]]:
+        return compute_aggregates(self.collection)
+
+    def reconcile(self) -> Dict[str, Dict[str, Any]]:
+        """Remplace les agrégats Redis par le calcul MongoDB.
+
+        Un delta appliqué entre l'agrégation et l'écriture est écrasé: l'écart
+        éventuel est corrigé à la réconciliation suivante.
+        """
+        computed = self.compute()
+        stale = {category.decode() for category in self.redis.execute(self.redis.client.smembers, CATEGORIES_KEY)}
+        pipe = self.redis.client.pipeline(transaction=True)
+        for category in stale | set(computed):
+            pipe.delete(self.category_key(category))
+        pipe.delete(CATEGORIES_KEY)
+        for category, summary in computed.items():
+            pipe.hset(self.category_key(category), mapping=summary)
+        if computed:
+            pipe.sadd(CATEGORIES_KEY, *computed)
+        self.redis.execute(pipe.execute)
+        logger.info(f"✅ Agrégats d'inventaire réconciliés ({len(computed)} catégories)")
+        return computed
@@ -3,6 +3,8 @@ from pymongo.errors import ConnectionFailure, OperationFailure
 import logging
 from datetime import datetime
 
+from app.services.registry import registry
+
 logger = logging.getLogger(__name__)
 
 class MongoDBService:
@@ -14,6 +16,8 @@ class MongoDBService:
         self.connect()
     
     def connect(self):
+        # Ni ping ni création d'index ici: MongoClient se connecte en arrière-plan,
+        # la vérification et les index sont faits par le préchauffage (warm_up)
         try:
             self.client = MongoClient(
                 self.connection_string,
@@ -21,28 +25,50 @@ class MongoDBService:
                 connectTimeoutMS=5000,
                 socketTimeoutMS=5000
             )
-            
-            self.client.admin.command('ping')
             self.db = self.client[self.database_name]
-            self._create_indexes()
             
-            logger.info(f"✅ Connecté à MongoDB: {self.database_name}")
+            logger.info(f"✅ Client MongoDB créé: {self.database_name}")
             
         except ConnectionFailure as e:
             logger.error(f"❌ Erreur de connexion MongoDB: {e}")
             raise
     
-    def _create_indexes(self):
+    def ensure_indexes(self):
+        """Réconciliation des index (idempotente), hors du chemin de démarrage"""
+        return self._create_indexes()
+    
+    def ensure_unique_indexes(self):
+        """Index d'unicité seuls (product_id): préalable à toute écriture qui crée des stocks"""
         try:
             self.db.stocks.create_index([("product_id", ASCENDING)], unique=True)
+            return True
+        except OperationFailure as e:
+            logger.warning(f"⚠️ Erreur création index unique: {e}")
+            return False
+    
+    def _create_indexes(self):
+        if not self.ensure_unique_indexes():
+            return False
+        try:
             self.db.stocks.create_index([("category", ASCENDING)])
             self.db.stocks.create_index([("name", ASCENDING)])
             self.db.stocks.create_index([("quantity", ASCENDING)])
             self.db.stocks.create_index([("created_at", DESCENDING)])
+            # Pagination par clé: tri stable avec _id en départage
+            self.db.stocks.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+            self.db.stocks.create_index([("name", ASCENDING), ("_id", ASCENDING)])
+            # Recherche: index multikey sur les n-grammes, seul ou combiné à la catégorie
+            self.db.stocks.create_index([("search_tokens", ASCENDING)])
+            self.db.stocks.create_index([("category", ASCENDING), ("search_tokens", ASCENDING)])
             self.db.stock_history.create_index([("product_id", ASCENDING), ("timestamp", DESCENDING)])
+            # Historique paginé par clé (timestamp, _id) et agrégats par intervalle
+            self.db.stock_history.create_index([("product_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+            self.db.stock_history_rollups.create_index([("product_id", ASCENDING), ("bucket", ASCENDING), ("start", DESCENDING)])
             logger.info("✅ Index MongoDB créés")
+            return True
         except OperationFailure as e:
             logger.warning(f"⚠️ Erreur création index: {e}")
+            return False
     
     def get_collection(self, collection_name):
         if self.db is None:
@@ -61,16 +87,15 @@ class MongoDBService:
             self.client.close()
             logger.info("🔌 Connexion MongoDB fermée")
 
-# Instance globale
-mongo_service = None
-
+# Service du registre: client créé au premier usage dans chaque processus (MongoClient n'est pas fork-safe)
 def init_mongo_service(connection_string, database_name):
-    global mongo_service
-    mongo_service = MongoDBService(connection_string, database_name)
-    return mongo_service
+    return registry.register(
+        'mongo',
+        lambda: MongoDBService(connection_string, database_name),
+        close=MongoDBService.close_connection
+    )
 
 def get_mongo_service():
-    global mongo_service
-    if mongo_service is None:
+    if not registry.is_registered('mongo'):
         raise RuntimeError("MongoDB service non initialisé")
-    return mongo_service
+    return registry.get('mongo')
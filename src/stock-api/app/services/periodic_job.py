@@ -0,0 +1,57 @@
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+JOB_LOCK_PREFIX = 'jobs:lock:'
+
+
+class PeriodicJob:
+    """Tâches de fond exécutées au démarrage puis toutes les ``interval`` secondes.
+
+    Un verrou Redis (SET NX EX) garantit qu'un seul worker les exécute par intervalle;
+    sans Redis joignable, le cycle est sauté.
+    """
+
+    def __init__(self, name: str, tasks: List[Callable[[], object]], interval: float, redis_service):
+        self.name = name
+        self.tasks = tasks
+        self.interval = interval
+        self.redis = redis_service
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def lock_key(self) -> str:
+        return f"{JOB_LOCK_PREFIX}{self.name}"
+
+    def _acquire_lock(self) -> bool:
+        ttl = max(int(self.interval) - 1, 1)
+        return bool(self.redis.execute(lambda: self.redis.client.set(self.lock_key, b'1', nx=True, ex=ttl)))
+
+    def run_once(self) -> None:
+        for task in self.tasks:
+            try:
+                task()
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur tâche périodique {self.name}: {e}")
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                if self.redis.is_connected() and self._acquire_lock():
+                    self.run_once()
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur verrou tâche périodique {self.name}: {e}")
+            if self._stopped.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -1,47 +1,174 @@
 import redis
 import json
 import logging
-from typing import Any, Optional, Union
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
 from datetime import timedelta
-import pickle
+
+from app.services.cache_codec import CacheCodec
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.registry import registry
 
 logger = logging.getLogger(__name__)
 
+TAG_KEY_PREFIX = 'tag:'
+
+# Supprime atomiquement les clés référencées par les sets de tags puis les sets eux-mêmes
+INVALIDATE_TAGS_SCRIPT = """
+local invalidated = {}
+for _, tag_key in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag_key)
+    for _, member in ipairs(members) do
+        redis.call('UNLINK', member)
+        table.insert(invalidated, member)
+    end
+    redis.call('UNLINK', tag_key)
+end
+return invalidated
+"""
+
 class RedisCacheService:
+    """Cache Redis protégé par un circuit breaker.
+
+    Les lectures et remplissages sont contournés quand le circuit est ouvert. Les
+    invalidations des chemins d'écriture (delete, delete_many, invalidate_tags,
+    counter(increment=True), clear_pattern) ne sont jamais perdues: refusées ou en
+    échec, elles sont différées puis rejouées avant la fermeture du circuit (par la
+    sonde) et avant toute autre commande. Au-delà de ``max_pending_keys`` clés en
+    attente, l'espace de noms de chaque clé (``stock:*``...) est vidé à la place.
+    """
+
     def __init__(self, host: str = 'localhost', port: int = 6379, 
-                 password: str = None, db: int = 0, default_ttl: int = 3600):
+                 password: str = None, db: int = 0, default_ttl: int = 3600,
+                 failure_threshold: int = 1, base_backoff: float = 1.0, max_backoff: float = 60.0,
+                 codec: Optional[CacheCodec] = None, scan_count: int = 500, max_pending_keys: int = 10000):
         self.host = host
         self.port = port
         self.password = password
         self.db = db
         self.default_ttl = default_ttl
         self.client = None
+        self.codec = codec or CacheCodec()
+        self.scan_count = scan_count
+        self._invalidate_tags_script = None
+        self.max_pending_keys = max_pending_keys
+        self._pending = {'keys': set(), 'tags': set(), 'counters': set(), 'patterns': set()}
+        self._pending_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self.breaker = CircuitBreaker(
+            'Redis',
+            probe=self._probe,
+            failure_threshold=failure_threshold,
+            base_backoff=base_backoff,
+            max_backoff=max_backoff
+        )
         self.connect()
     
     def connect(self):
+        # Pas de ping ici: la connexion est établie à la première commande ou par le préchauffage (warm_up)
+        self.client = redis.Redis(
+            host=self.host,
+            port=self.port,
+            password=self.password,
+            db=self.db,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            retry_on_timeout=True,
+            decode_responses=False
+        )
+    
+    def warm_up(self) -> bool:
+        """Vérifie la connexion; en cas d'échec le circuit s'ouvre et sonde Redis en arrière-plan"""
         try:
-            self.client = redis.Redis(
-                host=self.host,
-                port=self.port,
-                password=self.password,
-                db=self.db,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True,
-                decode_responses=False
-            )
-            
             self.client.ping()
+            self.breaker.record_success()
             logger.info("✅ Connecté à Redis avec succès")
-            
-        except redis.ConnectionError as e:
+            return True
+        except (redis.ConnectionError, redis.TimeoutError) as e:
             logger.error(f"❌ Erreur de connexion Redis: {e}")
-            self.client = None
+            self.breaker.trip(e)
+            return False
+    
+    def _ping(self):
+        return self.client.ping()
+    
+    def _probe(self):
+        # Le circuit ne se ferme qu'une fois les invalidations différées appliquées
+        self._ping()
+        self._replay_pending()
+    
+    def defer_invalidation(self, keys: Iterable[str] = (), tags: Iterable[str] = (),
+                           counters: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        """Met de côté des invalidations non appliquées, rejouées au retour de Redis"""
+        with self._pending_lock:
+            pending = self._pending
+            pending['tags'].update(tags)
+            pending['counters'].update(counters)
+            pending['patterns'].update(patterns)
+            pending['keys'].update(key for key in keys if self._namespace(key) not in pending['patterns'])
+            if len(pending['keys']) > self.max_pending_keys:
+                # Trop de clés: on videra leurs espaces de noms
+                pending['patterns'].update(self._namespace(key) for key in pending['keys'])
+                pending['keys'].clear()
+    
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return f"{key.rsplit(':', 1)[0]}:*" if ':' in key else '*'
+    
+    def has_pending_invalidations(self) -> bool:
+        return any(self._pending.values())
+    
+    def _replay_pending(self) -> None:
+        """Applique les invalidations différées; lève une exception (et les conserve) en cas d'échec"""
+        with self._replay_lock:
+            with self._pending_lock:
+                snapshot = {kind: set(values) for kind, values in self._pending.items()}
+            if not any(snapshot.values()):
+                return
+            
+            if snapshot['keys']:
+                self.client.unlink(*snapshot['keys'])
+            if snapshot['tags']:
+                if self._invalidate_tags_script is None:
+                    self._invalidate_tags_script = self.client.register_script(INVALIDATE_TAGS_SCRIPT)
+                self._invalidate_tags_script([self.tag_key(tag) for tag in snapshot['tags']])
+            if snapshot['counters']:
+                pipe = self.client.pipeline(transaction=False)
+                for key in snapshot['counters']:
+                    pipe.set(key, time.time_ns(), nx=True)
+                    pipe.incr(key)
+                pipe.execute()
+            for pattern in snapshot['patterns']:
+                self._unlink_pattern(pattern, execute=lambda command, *args: command(*args))
+            
+            with self._pending_lock:
+                for kind, values in snapshot.items():
+                    self._pending[kind] -= values
+            logger.info(f"✅ Invalidations différées rejouées ({', '.join(f'{len(values)} {kind}' for kind, values in snapshot.items() if values)})")
+    
+    def execute(self, command, *args):
+        """Exécute une commande Redis en alimentant le circuit breaker"""
+        try:
+            result = command(*args)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        return result
     
     def is_connected(self) -> bool:
+        # Aucun aller-retour réseau: l'état du circuit reflète les dernières commandes
+        if self.client is None or not self.breaker.allow_request():
+            return False
+        if not self.has_pending_invalidations():
+            return True
+        # Invalidations différées rejouées avant toute autre commande (dont l'essai d'un circuit semi-ouvert)
         try:
-            return self.client is not None and self.client.ping()
-        except:
+            self.execute(self._replay_pending)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur rejeu des invalidations différées: {e}")
             return False
     
     def get(self, key: str) -> Any:
@@ -49,36 +176,121 @@ class RedisCacheService:
             return None
         
         try:
-            value = self.client.get(key)
+            value = self.execute(self.client.get, key)
             if value:
-                return pickle.loads(value)
+                return self.codec.decode(value)
             return None
         except Exception as e:
             logger.warning(f"⚠️ Erreur récupération cache {key}: {e}")
             return None
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    @staticmethod
+    def tag_key(tag: str) -> str:
+        return f"{TAG_KEY_PREFIX}{tag}"
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None,
+            tags: Optional[Iterable[str]] = None, broadcast: bool = True) -> bool:
+        """Stocke une valeur; les ``tags`` permettent une invalidation groupée (invalidate_tags).
+
+        ``broadcast`` n'a d'effet qu'avec un cache L1 (TieredCacheService)
+        """
         if not self.is_connected():
             return False
         
         try:
-            serialized_value = pickle.dumps(value)
+            serialized_value = self.codec.encode(value)
             actual_ttl = ttl if ttl is not None else self.default_ttl
-            result = self.client.setex(key, actual_ttl, serialized_value)
-            return result
+            if not tags:
+                return self.execute(self.client.setex, key, actual_ttl, serialized_value)
+            
+            # Le set de tags vit au moins aussi longtemps que ses membres
+            tag_ttl = max(actual_ttl, self.default_ttl)
+            pipe = self.client.pipeline(transaction=True)
+            pipe.setex(key, actual_ttl, serialized_value)
+            for tag in tags:
+                pipe.sadd(self.tag_key(tag), key)
+                pipe.expire(self.tag_key(tag), tag_ttl)
+            result = self.execute(pipe.execute)
+            return bool(result[0])
         except Exception as e:
             logger.warning(f"⚠️ Erreur stockage cache {key}: {e}")
             return False
     
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Lit plusieurs clés en un seul MGET; seules les entrées présentes et décodables sont retournées"""
+        keys = list(keys)
+        if not keys or not self.is_connected():
+            return {}
+        
+        try:
+            values = self.execute(self.client.mget, keys)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur récupération cache multiple ({len(keys)} clés): {e}")
+            return {}
+        
+        results = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            try:
+                results[key] = self.codec.decode(value)
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur décodage cache {key}: {e}")
+        return results
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None,
+                 ttls: Optional[Dict[str, int]] = None, broadcast: bool = True) -> int:
+        """Stocke plusieurs valeurs dans un pipeline; ``ttls`` fixe un TTL par clé (``broadcast``: voir set)"""
+        if not items or not self.is_connected():
+            return 0
+        
+        default_ttl = ttl if ttl is not None else self.default_ttl
+        ttls = ttls or {}
+        pipe = self.client.pipeline(transaction=False)
+        queued = 0
+        for key, value in items.items():
+            try:
+                serialized_value = self.codec.encode(value)
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur encodage cache {key}: {e}")
+                continue
+            pipe.setex(key, ttls.get(key, default_ttl), serialized_value)
+            queued += 1
+        
+        if not queued:
+            return 0
+        try:
+            return sum(1 for result in self.execute(pipe.execute) if result)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur stockage cache multiple ({queued} clés): {e}")
+            return 0
+    
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        if not self.is_connected():
+            self.defer_invalidation(keys=keys)
+            return 0
+        
+        try:
+            return self.execute(self.client.unlink, *keys)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur suppression cache multiple ({len(keys)} clés), différée: {e}")
+            self.defer_invalidation(keys=keys)
+            return 0
+    
     def delete(self, key: str) -> bool:
         if not self.is_connected():
+            self.defer_invalidation(keys=[key])
             return False
         
         try:
-            result = self.client.delete(key)
+            result = self.execute(self.client.delete, key)
             return result > 0
         except Exception as e:
-            logger.warning(f"⚠️ Erreur suppression cache {key}: {e}")
+            logger.warning(f"⚠️ Erreur suppression cache {key}, différée: {e}")
+            self.defer_invalidation(keys=[key])
             return False
     
     def exists(self, key: str) -> bool:
@@ -86,30 +298,86 @@ class RedisCacheService:
             return False
         
         try:
-            return self.client.exists(key) > 0
+            return self.execute(self.client.exists, key) > 0
         except Exception as e:
             logger.warning(f"⚠️ Erreur vérification cache {key}: {e}")
             return False
     
+    def counter(self, key: str, increment: bool = False) -> Optional[int]:
+        """Lit (ou incrémente) un compteur partagé, p. ex. une génération de collection.
+
+        Une clé absente est initialisée à l'horodatage courant (ns): après une perte
+        de la clé, le compteur ne reprend jamais une valeur déjà servie. Un incrément
+        impossible est différé (voir defer_invalidation).
+        """
+        if not self.is_connected():
+            if increment:
+                self.defer_invalidation(counters=[key])
+            return None
+        
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.set(key, time.time_ns(), nx=True)
+            if increment:
+                pipe.incr(key)
+            else:
+                pipe.get(key)
+            return int(self.execute(pipe.execute)[1])
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur compteur cache {key}: {e}")
+            if increment:
+                self.defer_invalidation(counters=[key])
+            return None
+    
+    def invalidate_tags(self, *tags: str) -> List[str]:
+        """Invalide toutes les clés associées aux tags: O(clés taguées), sans KEYS"""
+        if not tags:
+            return []
+        if not self.is_connected():
+            self.defer_invalidation(tags=tags)
+            return []
+        
+        try:
+            if self._invalidate_tags_script is None:
+                self._invalidate_tags_script = self.client.register_script(INVALIDATE_TAGS_SCRIPT)
+            tag_keys = [self.tag_key(tag) for tag in tags]
+            invalidated = self.execute(self._invalidate_tags_script, tag_keys)
+            return [key.decode() if isinstance(key, bytes) else key for key in invalidated]
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur invalidation tags {tags}, différée: {e}")
+            self.defer_invalidation(tags=tags)
+            return []
+    
     def clear_pattern(self, pattern: str) -> int:
+        """Supprime les clés d'un motif ad hoc via SCAN + UNLINK, sans bloquer le serveur"""
         if not self.is_connected():
+            self.defer_invalidation(patterns=[pattern])
             return 0
         
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                return self.client.delete(*keys)
-            return 0
+            return self._unlink_pattern(pattern, self.execute)
         except Exception as e:
-            logger.warning(f"⚠️ Erreur nettoyage cache {pattern}: {e}")
+            logger.warning(f"⚠️ Erreur nettoyage cache {pattern}, différé: {e}")
+            self.defer_invalidation(patterns=[pattern])
             return 0
     
+    def _unlink_pattern(self, pattern: str, execute) -> int:
+        deleted = 0
+        cursor = 0
+        while True:
+            cursor, keys = execute(self.client.scan, cursor, pattern, self.scan_count)
+            if keys:
+                deleted += execute(self.client.unlink, *keys)
+            if cursor == 0:
+                return deleted
+    
     def get_stats(self) -> dict:
         if not self.is_connected():
-            return {"connected": False}
+            return {"connected": False, "circuit": self.breaker.state,
+                    "pending_invalidations": {kind: len(values) for kind, values in self._pending.items()}}
         
         try:
-            info = self.client.info()
+            info = self.execute(self.client.info)
             hits = info.get('keyspace_hits', 0)
             misses = info.get('keyspace_misses', 0)
             total = hits + misses
@@ -117,6 +385,7 @@ class RedisCacheService:
             
             return {
                 "connected": True,
+                "circuit": self.breaker.state,
                 "used_memory": info.get('used_memory', 0),
                 "used_memory_human": info.get('used_memory_human', '0B'),
                 "keyspace_hits": hits,
@@ -127,22 +396,26 @@ class RedisCacheService:
             }
         except Exception as e:
             logger.warning(f"⚠️ Erreur récupération stats Redis: {e}")
-            return {"connected": False}
+            return {"connected": False, "circuit": self.breaker.state}
     
     def _calculate_hit_rate(self, hits: int, misses: int) -> float:
         total = hits + misses
         return (hits / total * 100) if total > 0 else 0.0
+    
+    def close(self):
+        if self.client:
+            self.client.close()
+            logger.info("🔌 Connexion Redis fermée")
 
-# Instance globale
-redis_cache = None
-
-def init_redis_service(host: str, port: int, password: str, db: int, ttl: int):
-    global redis_cache
-    redis_cache = RedisCacheService(host, port, password, db, ttl)
-    return redis_cache
+# Service du registre: client et circuit breaker créés au premier usage dans chaque processus
+def init_redis_service(host: str, port: int, password: str, db: int, ttl: int, **options):
+    return registry.register(
+        'redis',
+        lambda: RedisCacheService(host, port, password, db, ttl, **options),
+        close=RedisCacheService.close
+    )
 
 def get_redis_service():
-    global redis_cache
-    if redis_cache is None:
+    if not registry.is_registered('redis'):
         raise RuntimeError("Redis service non initialisé")
-    return redis_cache
+    return registry.get('redis')
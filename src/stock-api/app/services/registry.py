@@ -0,0 +1,144 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """Référence stable vers un service du registre.
+
+    Les attributs sont lus sur l'instance du processus courant: les repositories
+    gardent cette référence et suivent la recréation des clients après un fork.
+    """
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, registry: 'ServiceRegistry', name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._registry.get(self._name), attribute)
+
+    def __repr__(self) -> str:
+        return f"<LazyService {self._name}>"
+
+
+class ServiceRegistry:
+    """Registre fork-safe des services à connexions (MongoDB, Redis, cache L1).
+
+    Un service est déclaré par une fabrique et créé au premier usage dans chaque
+    processus: le maître gunicorn (preload_app) n'ouvre aucune connexion et un
+    worker forké abandonne les instances héritées pour créer les siennes. Les tâches
+    de fond (threads) sont déclarées via ``on_process_start`` et démarrées une fois
+    par processus; ``close`` vide les files d'écriture puis ferme les clients.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._closers: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._process_hooks: List[Callable[[], None]] = []
+        self._close_hooks: List[Callable[[], None]] = []
+        self._started_hooks = 0
+        self._pid = os.getpid()
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 close: Optional[Callable[[Any], None]] = None) -> LazyService:
+        """Déclare (ou remplace) un service; retourne sa référence paresseuse"""
+        with self._lock:
+            self._factories[name] = factory
+            self._closers[name] = close
+            self._instances.pop(name, None)
+        return LazyService(self, name)
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._factories
+
+    def get(self, name: str) -> Any:
+        self._check_pid()
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                if name not in self._factories:
+                    raise RuntimeError(f"Service non initialisé: {name}")
+                instance = self._factories[name]()
+                self._instances[name] = instance
+        return instance
+
+    def on_process_start(self, hook: Callable[[], None]) -> None:
+        self._process_hooks.append(hook)
+
+    def on_close(self, hook: Callable[[], None]) -> None:
+        self._close_hooks.append(hook)
+
+    def start_process(self) -> None:
+        """Démarre les tâches de fond pas encore lancées dans ce processus"""
+        self._check_pid()
+        if self._started_hooks == len(self._process_hooks):
+            return
+        with self._lock:
+            hooks = self._process_hooks[self._started_hooks:]
+            self._started_hooks = len(self._process_hooks)
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur démarrage tâche de fond: {e}")
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self.after_fork()
+
+    def after_fork(self) -> None:
+        """Dans le processus enfant: oublie les instances du parent sans fermer leurs sockets"""
+        # Un verrou tenu par un autre thread au moment du fork ne serait jamais relâché
+        self._lock = threading.RLock()
+        self._instances = {}
+        self._started_hooks = 0
+        self._pid = os.getpid()
+        logger.info(f"🔁 Services réinitialisés après fork (pid {self._pid})")
+
+    def close(self) -> None:
+        """Vide les files d'écriture puis ferme les clients créés dans ce processus"""
+        if self._pid != os.getpid():
+            return
+        for hook in self._close_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur arrêt tâche de fond: {e}")
+        with self._lock:
+            instances, self._instances = self._instances, {}
+        for name, instance in reversed(list(instances.items())):
+            close = self._closers.get(name)
+            if close is None:
+                continue
+            try:
+                close(instance)
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur fermeture service {name}: {e}")
+
+    def reset(self) -> None:
+        """Oublie toutes les déclarations (nouvelle application dans le même processus)"""
+        self.close()
+        with self._lock:
+            self._factories.clear()
+            self._closers.clear()
+            self._process_hooks.clear()
+            self._close_hooks.clear()
+            self._started_hooks = 0
+
+# Instance globale
+registry = ServiceRegistry()
+atexit.register(registry.close)
+
+def get_registry() -> ServiceRegistry:
+    return registry
@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SECONDS = Gauge('stock_api_startup_seconds', 'Durée des phases de démarrage du processus', ['phase'])
+
+
+class StartupReport:
+    """Durées de démarrage: import de l'application puis phases de create_app.
+
+    Mesuré une fois dans le processus qui importe l'application (le maître gunicorn
+    avec preload_app): les workers forkés héritent du rapport.
+    """
+
+    def __init__(self):
+        self.import_seconds: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self._last = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(seconds, 4)
+        STARTUP_SECONDS.labels(phase=name).set(seconds)
+
+    def record_import(self, seconds: float) -> None:
+        self.import_seconds = round(seconds, 4)
+        STARTUP_SECONDS.labels(phase='import').set(seconds)
+
+    def start(self) -> None:
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """Enregistre la phase écoulée depuis start() ou la phase précédente"""
+        now = time.perf_counter()
+        self.record(name, now - self._last)
+        self._last = now
+
+    @property
+    def create_app_seconds(self) -> float:
+        return round(sum(self.phases.values()), 4)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'import_seconds': self.import_seconds,
+            'create_app_seconds': self.create_app_seconds,
+            'phases': dict(self.phases)
+        }
+
+
+class WarmUp:
+    """Préchauffage des dépendances d'un processus, hors du chemin de démarrage.
+
+    Les étapes (ping MongoDB, index, ping Redis, spec Swagger) s'exécutent dans un
+    thread; une étape qui retourne False ou lève une exception est retentée au
+    prochain ``start`` (ex: sonde de readiness). Le processus est prêt quand toutes
+    les étapes ``required`` ont réussi.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any], bool]]):
+        self.steps = steps
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._thread = None
+        self._started = None
+        self.ready_seconds: Optional[float] = None
+        self.state: Dict[str, Dict[str, Any]] = {
+            name: {'ready': False, 'required': required, 'seconds': None, 'error': None}
+            for name, _, required in self.steps
+        }
+
+    def start(self) -> None:
+        if self._pid != os.getpid():
+            # État et verrou hérités d'un processus parent
+            self._lock = threading.Lock()
+            self._reset()
+        with self._lock:
+            if self.is_complete() or (self._thread is not None and self._thread.is_alive()):
+                return
+            if self._started is None:
+                self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name='warm-up', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        for name, step, _ in self.steps:
+            if not self.state[name]['ready']:
+                self._run_step(name, step)
+
+        if self.is_ready() and self.ready_seconds is None:
+            self.ready_seconds = round(time.perf_counter() - self._started, 4)
+            STARTUP_SECONDS.labels(phase='warm_up').set(self.ready_seconds)
+            logger.info(f"✅ Dépendances prêtes en {self.ready_seconds}s (pid {os.getpid()})")
+
+    def _run_step(self, name: str, step: Callable[[], Any]) -> bool:
+        state = self.state[name]
+        started = time.perf_counter()
+        try:
+            ready = step() is not False
+            state['ready'], state['error'] = ready, None if ready else 'indisponible'
+        except Exception as e:
+            state['ready'], state['error'] = False, str(e)
+        state['seconds'] = round(time.perf_counter() - started, 4)
+        STARTUP_SECONDS.labels(phase=f"warm_up_{name}").set(state['seconds'])
+        if not state['ready']:
+            logger.warning(f"⚠️ Préchauffage {name} en échec: {state['error']}")
+        return state['ready']
+
+    def require(self, name: str) -> bool:
+        """Exécute l'étape ``name`` dans le thread appelant si elle n'a pas encore réussi.
+
+        Pour les écritures qui ne peuvent pas attendre le thread de préchauffage
+        (ex: création de stocks avant l'index unique). Les étapes sont idempotentes:
+        une exécution concurrente avec le thread de préchauffage est sans effet.
+        """
+        if self._pid != os.getpid():
+            self.start()
+        if self.state[name]['ready']:
+            return True
+        for step_name, step, _ in self.steps:
+            if step_name == name:
+                return self._run_step(name, step)
+        raise KeyError(name)
+
+    def is_ready(self) -> bool:
+        return all(state['ready'] for state in self.state.values() if state['required'])
+
+    def is_complete(self) -> bool:
+        return all(state['ready'] for state in self.state.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'ready': self.is_ready(),
+            'ready_seconds': self.ready_seconds,
+            'dependencies': {name: dict(state) for name, state in self.state.items()}
+        }
+
+# Instance globale (rapport du processus qui importe l'application)
+startup_report = StartupReport()
+warm_up = None
+
+def init_warm_up(steps):
+    global warm_up
+    warm_up = WarmUp(steps)
+    return warm_up
+
+def get_warm_up():
+    global warm_up
+    if warm_up is None:
+        raise RuntimeError("Préchauffage non initialisé")
+    return warm_up
+
+def get_startup_report():
+    return startup_report
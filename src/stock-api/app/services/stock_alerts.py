@@ -0,0 +1,131 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.stock import FIELD_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+ALERT_TYPES = ('low', 'over')
+ALERT_KEY_PREFIX = 'stocks:alerts:'
+# Champs MongoDB dont dépendent les marges d'alerte
+ALERT_SOURCE_FIELDS = ('quantity', 'min_stock', 'max_stock')
+
+
+def alert_margins(document: Dict[str, Any]) -> Dict[str, int]:
+    """Marges par type d'alerte: l'alerte est active quand la marge est <= 0"""
+    def value(name):
+        found = document.get(name)
+        return FIELD_DEFAULTS[name] if found is None else found
+
+    quantity = value('quantity')
+    return {'low': quantity - value('min_stock'), 'over': value('max_stock') - quantity}
+
+
+class StockAlertIndex:
+    """Index ordonné des alertes de stock: un sorted set Redis par type, scoré par la marge.
+
+    ``low``: quantity - min_stock, ``over``: max_stock - quantity. Les produits en
+    alerte sont ceux de score <= 0, lus par ZRANGEBYSCORE en O(log n + limit), les plus
+    critiques d'abord. ``rebuild`` reconstruit les sets depuis MongoDB (dérive).
+    """
+
+    def __init__(self, redis_service, mongo_service, batch_size: int = 1000):
+        self.redis = redis_service
+        self.mongo_service = mongo_service
+        self.batch_size = batch_size
+
+    @property
+    def collection(self):
+        return self.mongo_service.get_collection('stocks')
+
+    @staticmethod
+    def alert_key(alert_type: str) -> str:
+        return f"{ALERT_KEY_PREFIX}{alert_type}"
+
+    @staticmethod
+    def scores(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> Dict[str, Optional[Dict[str, int]]]:
+        """Marges par product_id pour des changements (avant, après); None pour une suppression"""
+        scores: Dict[str, Optional[Dict[str, int]]] = {}
+        for before, after in changes:
+            product_id = (after or before)['product_id']
+            scores[product_id] = alert_margins(after) if after is not None else None
+        return scores
+
+    @classmethod
+    def queue(cls, pipe, scores: Dict[str, Optional[Dict[str, int]]]) -> None:
+        """Ajoute les ZADD/ZREM des scores à un pipeline (client synchrone ou asyncio)"""
+        for alert_type in ALERT_TYPES:
+            key = cls.alert_key(alert_type)
+            updated = {product_id: margins[alert_type] for product_id, margins in scores.items() if margins}
+            removed = [product_id for product_id, margins in scores.items() if margins is None]
+            if updated:
+                pipe.zadd(key, updated)
+            if removed:
+                pipe.zrem(key, *removed)
+
+    def apply(self, changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Met à jour les scores pour des changements (avant, après); après = None pour une suppression"""
+        scores = self.scores(changes)
+        if not scores or not self.redis.is_connected():
+            return
+        try:
+            pipe = self.redis.client.pipeline(transaction=False)
+            self.queue(pipe, scores)
+            self.redis.execute(pipe.execute)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur mise à jour index d'alertes ({len(scores)} produits): {e}")
+
+    def query(self, alert_type: str, limit: int) -> Optional[List[str]]:
+        """product_id en alerte, les plus critiques d'abord; None si Redis est indisponible"""
+        if not self.redis.is_connected():
+            return None
+        try:
+            members = self.redis.execute(
+                lambda: self.redis.client.zrangebyscore(self.alert_key(alert_type), '-inf', 0, start=0, num=limit)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur lecture index d'alertes {alert_type}: {e}")
+            return None
+        return [member.decode() for member in members]
+
+    def rebuild(self) -> int:
+        """Reconstruit les sorted sets depuis MongoDB dans des clés temporaires, puis RENAME atomique.
+
+        Une écriture appliquée pendant la reconstruction peut être écrasée: elle est
+        rattrapée à la prochaine écriture du produit ou à la reconstruction suivante.
+        """
+        temporary = {alert_type: f"{self.alert_key(alert_type)}:rebuild" for alert_type in ALERT_TYPES}
+        self.redis.execute(self.redis.client.delete, *temporary.values())
+
+        indexed = 0
+        batch: Dict[str, Dict[str, int]] = {alert_type: {} for alert_type in ALERT_TYPES}
+        cursor = self.collection.find({}, {'_id': 0, 'product_id': 1, **{field: 1 for field in ALERT_SOURCE_FIELDS}})
+        try:
+            for document in cursor.batch_size(self.batch_size):
+                margins = alert_margins(document)
+                for alert_type in ALERT_TYPES:
+                    batch[alert_type][document['product_id']] = margins[alert_type]
+                indexed += 1
+                if indexed % self.batch_size == 0:
+                    self._write_batch(temporary, batch)
+        finally:
+            cursor.close()
+        self._write_batch(temporary, batch)
+
+        pipe = self.redis.client.pipeline(transaction=True)
+        for alert_type in ALERT_TYPES:
+            if indexed:
+                pipe.rename(temporary[alert_type], self.alert_key(alert_type))
+            else:
+                pipe.delete(self.alert_key(alert_type))
+        self.redis.execute(pipe.execute)
+        logger.info(f"✅ Index d'alertes reconstruit ({indexed} stocks)")
+        return indexed
+
+    def _write_batch(self, keys: Dict[str, str], batch: Dict[str, Dict[str, int]]) -> None:
+        pipe = self.redis.client.pipeline(transaction=False)
+        for alert_type, scores in batch.items():
+            if scores:
+                pipe.zadd(keys[alert_type], scores)
+                scores.clear()
+        self.redis.execute(pipe.execute)
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import logging
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from app.utils.validators import STOCK_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+
+class _RawReader(io.RawIOBase):
+    """Vue io d'un flux binaire qui n'expose que read(): le SpooledTemporaryFile d'un
+    upload multipart n'a pas readable() avant Python 3.11 et TextIOWrapper le refuse"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def iter_records(stream: BinaryIO, import_format: str) -> Iterator[Tuple[int, Any]]:
+    """Lit un flux binaire ligne à ligne et produit (numéro de ligne, enregistrement).
+
+    Un enregistrement illisible est produit sous forme d'exception pour être
+    rapporté comme erreur de ligne sans interrompre l'import. Les lignes trailer
+    d'un export (``#row_count,<n>`` en CSV, ``{"_trailer": ...}`` en NDJSON) sont
+    ignorées: un export se réimporte tel quel.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(_RawReader(stream)), encoding='utf-8-sig', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            first = row.get(reader.fieldnames[0]) or ''
+            if first.startswith('#'):
+                continue
+            # Les cellules vides valent "champ absent" (valeurs par défaut du modèle)
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"JSON invalide: {e}")
+            continue
+        if isinstance(record, dict) and '_trailer' in record:
+            continue
+        yield line_number, record
+
+
+class StockImporter:
+    """Import par lots: validation du lot en une passe (STOCK_SCHEMA) puis un bulk_write par lot"""
+
+    def __init__(self, repository, chunk_size: int = 1000, max_errors: int = 1000):
+        self.repository = repository
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.report = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0,
+                       'errors': [], 'errors_truncated': False}
+
+    def _error(self, row: int, error: str, product_id: str = None, field_errors: List[Dict[str, str]] = None) -> None:
+        self.report['failed'] += 1
+        if len(self.report['errors']) >= self.max_errors:
+            self.report['errors_truncated'] = True
+            return
+        entry = {'row': row, 'error': error}
+        if product_id:
+            entry['product_id'] = product_id
+        if field_errors:
+            entry['errors'] = field_errors
+        self.report['errors'].append(entry)
+
+    def _flush(self, chunk: List[Dict[str, Any]], rows: List[int]) -> None:
+        if not chunk:
+            return
+        coerced, field_errors = STOCK_SCHEMA.validate(chunk)
+        valid, valid_rows = [], []
+        for index, (row, record, values) in enumerate(zip(rows, chunk, coerced)):
+            if index in field_errors:
+                self._error(row, field_errors[index][0]['error'], record['product_id'], field_errors[index])
+                continue
+            valid.append({**values, 'product_id': record['product_id']})
+            valid_rows.append(row)
+
+        for row, result in zip(valid_rows, self.repository.bulk_upsert(valid, coerced=True)):
+            if result['status'] == 'error':
+                self._error(row, result['error'], result['product_id'])
+            else:
+                self.report[result['status']] += 1
+        chunk.clear()
+        rows.clear()
+
+    def run(self, records) -> Dict[str, Any]:
+        chunk: List[Dict[str, Any]] = []
+        rows: List[int] = []
+        seen = set()
+        for row, record in records:
+            self.report['rows'] += 1
+            if isinstance(record, Exception):
+                self._error(row, str(record))
+                continue
+            if not isinstance(record, dict):
+                self._error(row, 'Enregistrement invalide: objet attendu')
+                continue
+
+            symbol = str(record.get('symbol') or record.get('product_id') or '').strip().upper()
+            if not symbol:
+                self._error(row, 'Champ requis manquant: symbol')
+                continue
+
+            # Un même symbole deux fois dans un lot: on écrit le lot en cours d'abord (la dernière ligne gagne)
+            if symbol in seen or len(chunk) >= self.chunk_size:
+                self._flush(chunk, rows)
+                seen.clear()
+            seen.add(symbol)
+            chunk.append({**record, 'product_id': symbol})
+            rows.append(row)
+
+        self._flush(chunk, rows)
+        logger.info(f"✅ Import terminé: {self.report['rows']} lignes, "
+                    f"{self.report['created']} créées, {self.report['updated']} mises à jour, "
+                    f"{self.report['failed']} en erreur")
+        return self.report
+
+
+def import_stocks(repository, stream: BinaryIO, import_format: str,
+                  chunk_size: int = 1000, max_errors: int = 1000) -> Dict[str, Any]:
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Format non supporté: {import_format}")
+    importer = StockImporter(repository, chunk_size=chunk_size, max_errors=max_errors)
+    return importer.run(iter_records(stream, import_format))
@@ -0,0 +1,775 @@
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.models.stock import FIELD_DEFAULTS, Stock, StockHistory
+from app.services.history_repository import HistoryRepository
+from app.services.inventory_aggregates import AGGREGATE_PROJECTION, compute_aggregates
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.search import (LEGACY_PREFIX_MARKER, SEARCH_FIELDS, build_search_tokens, match_score,
+                              query_tokens)
+
+logger = logging.getLogger(__name__)
+
+STOCK_CACHE_PREFIX = 'stock:'
+LIST_CACHE_PREFIX = 'stocks:list:'
+# Tags d'invalidation des listes: toutes catégories confondues / par catégorie
+LIST_TAG_ALL = 'stocks:list:all'
+LIST_TAG_CATEGORY = 'stocks:list:category:'
+# Génération des listes: incrémentée à chaque écriture, base des ETags de liste
+LIST_GENERATION_KEY = 'stocks:list:generation'
+
+UPDATABLE_FIELDS = ['name', 'description', 'quantity', 'price', 'category',
+                    'min_stock', 'max_stock', 'supplier', 'sku']
+INT_FIELDS = ['quantity', 'min_stock', 'max_stock']
+FLOAT_FIELDS = ['price']
+SEARCH_SOURCE_FIELDS = ['name', 'description']
+
+# Pagination par clé sur les index (created_at, _id) et (name, _id)
+SORT_FIELDS = ['created_at', 'name']
+DEFAULT_SORT = '-created_at'
+DEFAULT_PAGE_SIZE = 50
+# Recherche classée par pertinence jusqu'à ce nombre de candidats; au-delà, plus récents d'abord (keyset)
+MAX_RANKED_CANDIDATES = 1000
+
+# Résultats par item des ajustements en masse, sous une clé par lot (retirée après relecture)
+BULK_ADJUSTMENTS_FIELD = 'bulk_adjustments'
+
+# Champs internes jamais renvoyés aux clients
+DOCUMENT_PROJECTION = {'search_tokens': 0, BULK_ADJUSTMENTS_FIELD: 0}
+
+
+def coerce_stock_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertit les champs numériques d'un payload déjà validé"""
+    values = {}
+    for field in UPDATABLE_FIELDS:
+        if field not in data or data[field] is None:
+            continue
+        if field in INT_FIELDS:
+            values[field] = int(data[field])
+        elif field in FLOAT_FIELDS:
+            values[field] = float(data[field])
+        else:
+            values[field] = data[field]
+    return values
+
+
+class StockRepository:
+    """Accès aux stocks: MongoDB comme source de vérité, Redis en read-through, clé évincée à chaque écriture"""
+
+    def __init__(self, mongo_service, cache_service=None, cache_ttl: int = 300, history_repository=None,
+                 aggregates=None, alerts=None):
+        self.mongo_service = mongo_service
+        self.cache = cache_service
+        self.cache_ttl = cache_ttl
+        self.history = history_repository or HistoryRepository(mongo_service)
+        self.aggregates = aggregates
+        self.alerts = alerts
+
+    @property
+    def collection(self):
+        return self.mongo_service.get_collection('stocks')
+
+    @staticmethod
+    def cache_key(product_id: str) -> str:
+        return f"{STOCK_CACHE_PREFIX}{product_id}"
+
+    def _cache_get(self, key: str) -> Any:
+        if self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _cache_set(self, key: str, value: Any, tags: Optional[List[str]] = None) -> None:
+        if self.cache is not None:
+            # Remplissage après lecture MongoDB: les écritures évincent la clé, rien à diffuser
+            self.cache.set(key, value, ttl=self.cache_ttl, tags=tags, broadcast=False)
+
+    def _cache_delete(self, key: str) -> None:
+        if self.cache is not None:
+            self.cache.delete(key)
+
+    @staticmethod
+    def _projection(fields: Optional[List[str]], *required: str) -> Dict[str, int]:
+        if not fields:
+            return DOCUMENT_PROJECTION
+        return Stock.projection([*fields, *required])
+
+    @staticmethod
+    def _serialize(document: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if not fields:
+            return Stock.from_document(document).to_dict()
+        return Stock.serialize_fields(document, fields)
+
+    @staticmethod
+    def list_cache_key(**params) -> str:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"{LIST_CACHE_PREFIX}{digest}"
+
+    @staticmethod
+    def list_tags(category: Optional[str]) -> List[str]:
+        return [f"{LIST_TAG_CATEGORY}{category}"] if category else [LIST_TAG_ALL]
+
+    def _invalidate_lists(self, *categories: Optional[str]) -> None:
+        """Invalide les listes non filtrées et celles des catégories touchées"""
+        if self.cache is None:
+            return
+        tags = {LIST_TAG_ALL}
+        tags.update(f"{LIST_TAG_CATEGORY}{category}" for category in categories if category)
+        self.cache.invalidate_tags(*tags)
+        self.cache.counter(LIST_GENERATION_KEY, increment=True)
+
+    def list_generation(self) -> Optional[int]:
+        """Génération courante des listes; None sans cache partagé (pas d'ETag sans lecture)"""
+        if self.cache is None:
+            return None
+        return self.cache.counter(LIST_GENERATION_KEY)
+
+    def get(self, product_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Lit un stock; avec ``fields``, seule cette sélection est renvoyée.
+
+        L'entrée de cache reste unique par produit (évincée à chaque écriture, invalidation O(1)):
+        la sélection est découpée dans l'entrée complète.
+        """
+        stock, _ = self.get_versioned(product_id, fields)
+        return stock
+
+    def get_versioned(self, product_id: str,
+                      fields: Optional[List[str]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """Comme ``get``, avec la version du stock (compteur incrémenté à chaque écriture) pour les ETags"""
+        key = self.cache_key(product_id)
+        stock = self._cache_get(key)
+        # Entrée antérieure au champ version: relue depuis MongoDB
+        if stock is None or 'version' not in stock:
+            document = self.collection.find_one({'product_id': product_id}, DOCUMENT_PROJECTION)
+            if document is None:
+                return None, None
+            stock = Stock.from_document(document).to_dict()
+            self._cache_set(key, stock)
+
+        if fields:
+            return {field: stock.get(field) for field in fields}, stock['version']
+        return stock, stock['version']
+
+    def get_many(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Lecture groupée: un MGET pour le cache, un $in MongoDB pour les absents"""
+        results: Dict[str, Dict[str, Any]] = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(self.cache_key(product_id) for product_id in product_ids)
+            for product_id in product_ids:
+                stock = cached.get(self.cache_key(product_id))
+                if stock is not None:
+                    results[product_id] = stock
+
+        missing = [product_id for product_id in product_ids if product_id not in results]
+        if not missing:
+            return results
+
+        loaded = {}
+        for document in self.collection.find({'product_id': {'$in': missing}}, DOCUMENT_PROJECTION):
+            stock = Stock.from_document(document).to_dict()
+            results[stock['product_id']] = stock
+            loaded[self.cache_key(stock['product_id'])] = stock
+        if self.cache is not None and loaded:
+            self.cache.set_many(loaded, ttl=self.cache_ttl, broadcast=False)
+        return results
+
+    def _search_query(self, query: Dict[str, Any], search: str) -> Dict[str, Any]:
+        tokens = query_tokens(search)
+        if tokens:
+            # Candidats via l'index multikey search_tokens, vérifiés ensuite par match_score
+            return {**query, 'search_tokens': {'$all': tokens}}
+        pattern = re.compile(re.escape(search), re.IGNORECASE)
+        return {**query, '$or': [
+            {'name': pattern},
+            {'description': pattern},
+            {'product_id': pattern}
+        ]}
+
+    def list(self, category: Optional[str] = None, search: Optional[str] = None,
+             sort: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+             cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+             generation: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retourne une page de stocks et le curseur de la page suivante (None en fin de liste).
+
+        Sans ``sort``, une recherche est classée par pertinence (au plus
+        MAX_RANKED_CANDIDATES candidats, sinon plus récents d'abord); sinon la pagination
+        est par clé (keyset) sur (champ de tri, _id) et ne dépend pas de la profondeur.
+        ``fields`` restreint la projection MongoDB et les champs dérivés calculés.
+        ``generation`` est celle lue pour l'ETag de la réponse (lue ici si absente).
+        Lève ValueError si le curseur est invalide ou ne correspond pas au tri.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        query: Dict[str, Any] = {'category': category} if category else {}
+        if generation is None:
+            generation = self.list_generation()
+
+        if search and not sort:
+            if position is None or position.get('sort') == 'relevance':
+                ranked = self._list_ranked(query, category, search, limit, position, fields, generation)
+                if ranked is not None:
+                    return ranked
+            sort, position = self._unranked_position(position)
+
+        sort = sort or DEFAULT_SORT
+        key = self.list_cache_key(category=category, search=search, sort=sort, limit=limit,
+                                  cursor=cursor, fields=fields, generation=generation)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached['stocks'], cached['next_cursor']
+
+        stocks, next_cursor = self._list_keyset(query, search, sort, limit, position, fields)
+        self._cache_list(key, {'stocks': stocks, 'next_cursor': next_cursor}, category, generation)
+        return stocks, next_cursor
+
+    def _cache_list(self, key: str, value: Any, category: Optional[str], generation: Optional[int]) -> None:
+        # La clé contient la génération lue avant la requête MongoDB: une page calculée avant
+        # une écriture concurrente est rangée sous l'ancienne génération, que plus personne ne lit
+        if generation is not None:
+            self._cache_set(key, value, tags=self.list_tags(category))
+
+    def _list_keyset(self, query: Dict[str, Any], search: Optional[str], sort: str, limit: int,
+                     position: Optional[Dict[str, Any]],
+                     fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        query, projection, order = self._keyset_query(query, search, sort, position, fields)
+        documents = self.collection.find(query, projection).sort(order)
+        if not search:
+            documents = documents.limit(limit + 1)
+
+        page = []
+        for document in documents:
+            if search and not match_score(document, search):
+                continue
+            page.append(document)
+            if len(page) > limit:
+                break
+        return self._keyset_page(page, sort, limit, fields)
+
+    def _keyset_query(self, query: Dict[str, Any], search: Optional[str], sort: str,
+                      position: Optional[Dict[str, Any]],
+                      fields: Optional[List[str]] = None) -> Tuple[Dict[str, Any], Dict[str, int], List[Tuple[str, int]]]:
+        """Filtre, projection et tri d'une page keyset sur (champ de tri, _id)"""
+        field = sort.lstrip('-')
+        direction = DESCENDING if sort.startswith('-') else ASCENDING
+
+        if position is not None:
+            if position.get('sort') != sort or not ObjectId.is_valid(position.get('id')):
+                raise ValueError("Le curseur ne correspond pas au tri demandé")
+            operator = '$lt' if direction == DESCENDING else '$gt'
+            last_id = ObjectId(position['id'])
+            query = {'$and': [query, {'$or': [
+                {field: {operator: position['value']}},
+                {field: position['value'], '_id': {operator: last_id}}
+            ]}]}
+
+        if search:
+            query = self._search_query(query, search)
+
+        projection = self._projection(fields, field, *(SEARCH_FIELDS if search else ()))
+        return query, projection, [(field, direction), ('_id', direction)]
+
+    def _keyset_page(self, page: List[Dict[str, Any]], sort: str, limit: int,
+                     fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Sérialise jusqu'à ``limit`` documents (lus: limit + 1) et calcule le curseur suivant"""
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            field = sort.lstrip('-')
+            next_cursor = encode_cursor({'sort': sort, 'value': last.get(field), 'id': str(last['_id'])})
+        return [self._serialize(document, fields) for document in page], next_cursor
+
+    def _list_ranked(self, query: Dict[str, Any], category: Optional[str], search: str, limit: int,
+                     position: Optional[Dict[str, Any]], fields: Optional[List[str]] = None,
+                     generation: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        offset = self._ranked_offset(position)
+
+        # Le classement complet est mis en cache: les pages suivantes sont de simples découpes
+        key = self.list_cache_key(category=category, search=search, sort='relevance', fields=fields,
+                                  generation=generation)
+        ranked = self._cache_get(key)
+        if ranked is None:
+            projection = self._projection(fields, *SEARCH_FIELDS)
+            documents = list(self.collection.find(self._search_query(query, search), projection)
+                             .limit(MAX_RANKED_CANDIDATES + 1))
+            ranked = self._ranked_entry(documents, search, fields)
+            self._cache_list(key, ranked, category, generation)
+        if ranked['stocks'] is None:
+            return None
+        return self._ranked_page(ranked['stocks'], offset, limit)
+
+    def _ranked_entry(self, documents: List[Dict[str, Any]], search: str,
+                      fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Entrée de cache d'une recherche classée; ``stocks`` None au-delà de MAX_RANKED_CANDIDATES"""
+        if len(documents) > MAX_RANKED_CANDIDATES:
+            return {'stocks': None}
+        return {'stocks': self._rank(documents, search, fields)}
+
+    @staticmethod
+    def _unranked_position(position: Optional[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Tri et position d'une recherche trop large pour être classée: plus récents d'abord"""
+        if position is None or position.get('sort') == 'relevance':
+            # Classement devenu impossible entre deux pages: reprise au début
+            return DEFAULT_SORT, None
+        if position.get('sort') != DEFAULT_SORT:
+            raise ValueError("Le curseur ne correspond pas au tri demandé")
+        return DEFAULT_SORT, position
+
+    @staticmethod
+    def _ranked_offset(position: Optional[Dict[str, Any]]) -> int:
+        if position is not None and position.get('sort') != 'relevance':
+            raise ValueError("Le curseur ne correspond pas au tri demandé")
+        return int(position.get('offset', 0)) if position else 0
+
+    def _rank(self, documents, search: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Classe les candidats par pertinence (match_score) puis par nom"""
+        ranked = []
+        for document in documents:
+            score = match_score(document, search)
+            if score:
+                ranked.append((-score, document.get('name') or '', document))
+        ranked.sort(key=lambda entry: entry[:2])
+        return [self._serialize(document, fields) for _, _, document in ranked]
+
+    @staticmethod
+    def _ranked_page(stocks: List[Dict[str, Any]], offset: int,
+                     limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        next_cursor = None
+        if offset + limit < len(stocks):
+            next_cursor = encode_cursor({'sort': 'relevance', 'offset': offset + limit})
+        return stocks[offset:offset + limit], next_cursor
+
+    def iter_stocks(self, category: Optional[str] = None, search: Optional[str] = None,
+                    fields: Optional[List[str]] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Parcourt les stocks filtrés via un curseur MongoDB par lots (mémoire constante, ordre _id)"""
+        query: Dict[str, Any] = {'category': category} if category else {}
+        if search:
+            query = self._search_query(query, search)
+
+        projection = self._projection(fields, *(SEARCH_FIELDS if search else ()))
+        cursor = self.collection.find(query, projection).sort('_id', ASCENDING).batch_size(batch_size)
+        try:
+            for document in cursor:
+                if search and not match_score(document, search):
+                    continue
+                yield self._serialize(document, fields)
+        finally:
+            cursor.close()
+
+    def create(self, product_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insère un stock; lève DuplicateKeyError si le product_id existe déjà"""
+        values = coerce_stock_fields(data)
+        values.setdefault('description', '')
+        stock = Stock(product_id=product_id, **values)
+
+        document = stock.to_document()
+        document['search_tokens'] = build_search_tokens(document)
+        self.collection.insert_one(document)
+        self._track_changes([(None, document)])
+        if stock.quantity:
+            self._record_history(product_id, 'create', stock.quantity, 0, stock.quantity,
+                                 timestamp=stock.created_at)
+
+        # Éviction plutôt que write-through (voir update)
+        self._cache_delete(self.cache_key(product_id))
+        self._invalidate_lists(stock.category)
+        return stock.to_dict()
+
+    def update(self, product_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        changes = coerce_stock_fields(data)
+        changes['updated_at'] = datetime.utcnow()
+
+        previous = self.collection.find_one_and_update(
+            {'product_id': product_id},
+            {'$set': changes, '$inc': {'version': 1}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            self._cache_delete(self.cache_key(product_id))
+            return None
+
+        current = {**previous, **changes, 'version': previous.get('version', 0) + 1}
+        self._track_changes([(previous, current)])
+        if 'quantity' in changes and changes['quantity'] != previous.get('quantity', 0):
+            self._record_history(product_id, 'update', changes['quantity'] - previous.get('quantity', 0),
+                                 previous.get('quantity', 0), changes['quantity'],
+                                 timestamp=changes['updated_at'])
+        if any(field in changes for field in SEARCH_SOURCE_FIELDS):
+            # Conditionné sur la version: une mise à jour concurrente plus récente garde ses tokens
+            self.collection.update_one(
+                {'_id': previous['_id'], 'version': current['version']},
+                {'$set': {'search_tokens': build_search_tokens(current)}}
+            )
+
+        # Éviction plutôt que write-through: deux PUT concurrents peuvent finir dans le désordre,
+        # la version écrite en dernier en cache ne serait pas forcément la plus récente
+        result = Stock.from_document(current).to_dict()
+        self._cache_delete(self.cache_key(product_id))
+        self._invalidate_lists(previous.get('category'), result['category'])
+        return result
+
+    def _track_changes(self, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Reporte des écritures (document avant, document après) dans les agrégats et l'index d'alertes"""
+        if not changes:
+            return
+        if self.aggregates is not None:
+            self.aggregates.apply(changes)
+        if self.alerts is not None:
+            self.alerts.apply(changes)
+
+    def category_aggregates(self) -> Tuple[Dict[str, Dict[str, Any]], str]:
+        """Agrégats par catégorie et leur source: Redis (maintenus) ou calcul MongoDB en secours"""
+        if self.aggregates is not None:
+            aggregates = self.aggregates.get()
+            if aggregates is not None:
+                return aggregates, 'redis'
+        return compute_aggregates(self.collection), 'mongodb'
+
+    def alerted(self, alert_type: str, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], str]:
+        """Stocks en alerte (low/over), les plus critiques d'abord, et la source de l'index"""
+        flag = f"{alert_type}_stock_alert"
+        product_ids = self.alerts.query(alert_type, limit) if self.alerts is not None else None
+        if product_ids is not None:
+            stocks = self.get_many(product_ids)
+            # Une entrée d'index en retard sur le document est ignorée
+            return [stocks[product_id] for product_id in product_ids
+                    if product_id in stocks and stocks[product_id][flag]], 'redis'
+
+        # Secours sans Redis: parcours MongoDB, trié par marge
+        def field(name):
+            return {'$ifNull': [f"${name}", FIELD_DEFAULTS[name]]}
+
+        if alert_type == 'low':
+            margin = {'$subtract': [field('quantity'), field('min_stock')]}
+        else:
+            margin = {'$subtract': [field('max_stock'), field('quantity')]}
+        pipeline = [
+            {'$addFields': {'alert_margin': margin}},
+            {'$match': {'alert_margin': {'$lte': 0}}},
+            {'$sort': {'alert_margin': ASCENDING, 'product_id': ASCENDING}},
+            {'$limit': limit}
+        ]
+        return [Stock.from_document(document).to_dict() for document in self.collection.aggregate(pipeline)], 'mongodb'
+
+    def _invalidate_many(self, product_ids: List[str], categories) -> None:
+        if self.cache is None:
+            return
+        self.cache.delete_many(self.cache_key(product_id) for product_id in product_ids)
+        self._invalidate_lists(*categories)
+
+    def _bulk_write(self, operations: List[UpdateOne]) -> Dict[str, Any]:
+        """bulk_write non ordonné; retourne le rapport même en cas d'erreurs partielles"""
+        try:
+            return self.collection.bulk_write(operations, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            return e.details
+
+    def bulk_upsert(self, items: List[Dict[str, Any]], coerced: bool = False) -> List[Dict[str, Any]]:
+        """Crée ou remplace des stocks validés (clé product_id) en un seul bulk_write.
+
+        ``coerced``: items issus de STOCK_SCHEMA.validate, déjà filtrés et convertis.
+        Retourne un résultat par item, dans l'ordre: status created/updated/error.
+        """
+        if not items:
+            return []
+
+        now = datetime.utcnow()
+        product_ids = [item['product_id'] for item in items]
+        previous_documents = {
+            document['product_id']: document
+            for document in self.collection.find({'product_id': {'$in': product_ids}},
+                                                 {'product_id': 1, **AGGREGATE_PROJECTION,
+                                                  **{field: 1 for field in SEARCH_SOURCE_FIELDS}})
+        }
+        # Champs de recherche stockés: un item sans description ne doit pas effacer ses tokens
+        search_sources = {product_id: {field: document.get(field) for field in SEARCH_SOURCE_FIELDS}
+                          for product_id, document in previous_documents.items()}
+
+        operations = []
+        written = []
+        for item in items:
+            if coerced:
+                values = {field: value for field, value in item.items() if field != 'product_id'}
+            else:
+                values = coerce_stock_fields(item)
+            document = Stock(product_id=item['product_id'], created_at=now, updated_at=now,
+                             **{'description': '', **values}).to_document()
+            set_fields = {field: document[field] for field in values}
+            set_fields['updated_at'] = now
+            source = {**document, **search_sources.get(item['product_id'], {}),
+                      **{field: values[field] for field in SEARCH_SOURCE_FIELDS if field in values}}
+            search_sources[item['product_id']] = {field: source.get(field) for field in SEARCH_SOURCE_FIELDS}
+            set_fields['search_tokens'] = build_search_tokens(source)
+            on_insert = {field: value for field, value in document.items()
+                         if field not in set_fields and field not in ('product_id', 'version')}
+            operations.append(UpdateOne(
+                {'product_id': item['product_id']},
+                {'$set': set_fields, '$setOnInsert': on_insert, '$inc': {'version': 1}},
+                upsert=True
+            ))
+            written.append((document, set_fields))
+
+        report = self._bulk_write(operations)
+        created = {upserted['index'] for upserted in report.get('upserted', [])}
+        errors = {error['index']: error.get('errmsg', 'Erreur d\'écriture') for error in report.get('writeErrors', [])}
+
+        results = []
+        changes = []
+        current = dict(previous_documents)
+        for index, product_id in enumerate(product_ids):
+            if index in errors:
+                results.append({'product_id': product_id, 'status': 'error', 'error': errors[index]})
+            else:
+                results.append({'product_id': product_id, 'status': 'created' if index in created else 'updated'})
+                # Un même produit deux fois dans le lot: l'état "avant" est celui laissé par l'item précédent
+                document, set_fields = written[index]
+                before = current.get(product_id)
+                current[product_id] = {**before, **set_fields} if before is not None else document
+                changes.append((before, current[product_id]))
+                previous_quantity = before.get('quantity', 0) if before is not None else 0
+                new_quantity = current[product_id]['quantity']
+                if new_quantity != previous_quantity:
+                    self._record_history(product_id, 'update' if before is not None else 'create',
+                                         new_quantity - previous_quantity, previous_quantity,
+                                         new_quantity, notes='bulk', timestamp=now)
+
+        self._track_changes(changes)
+        categories = {document.get('category') for document in previous_documents.values()}
+        categories.update(item.get('category') for item in items)
+        self._invalidate_many(product_ids, categories)
+        return results
+
+    @staticmethod
+    def _adjustment_pipeline(key: str, items: List[Tuple[int, int]], now: datetime) -> List[Dict[str, Any]]:
+        """Pipeline de mise à jour appliquant les ajustements (position, delta) d'un produit dans l'ordre.
+
+        Un ajustement qui ferait passer la quantité sous zéro est ignoré (comme ``adjust``);
+        la quantité obtenue (ou null si refusé) est notée sous ``<key>.<position>``.
+        """
+        pipeline = [{'$set': {f"{key}.before": '$quantity', f"{key}.applied": 0}}]
+        for position, change in items:
+            quantity = {'$add': ['$quantity', change]}
+            allowed = {'$gte': [quantity, 0]} if change < 0 else True
+            pipeline.append({'$set': {
+                'quantity': {'$cond': [allowed, quantity, '$quantity']},
+                f"{key}.{position}": {'$cond': [allowed, quantity, None]},
+                f"{key}.applied": {'$add': [f"${key}.applied", {'$cond': [allowed, 1, 0]}]}
+            }})
+        applied = {'$gt': [f"${key}.applied", 0]}
+        pipeline.append({'$set': {
+            'updated_at': {'$cond': [applied, now, '$updated_at']},
+            'version': {'$cond': [applied, {'$add': [{'$ifNull': ['$version', 0]}, 1]}, '$version']}
+        }})
+        return pipeline
+
+    def bulk_adjust(self, adjustments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Applique des ajustements de quantité en un seul bulk_write, dans l'ordre du lot.
+
+        Une mise à jour par produit (pipeline conditionnel, voir ``_adjustment_pipeline``):
+        ``[+3, -10]`` sur une quantité de 1 applique +3 et refuse -10. Chaque produit note
+        le résultat de ses ajustements sous une clé propre au lot, relue en une requête
+        $in puis retirée. Après une erreur réseau, les écritures déjà appliquées sont
+        relues, reportées (cache, agrégats, historique) et retournées.
+        """
+        if not adjustments:
+            return []
+
+        grouped: Dict[str, List[Tuple[int, int]]] = {}
+        for position, adjustment in enumerate(adjustments):
+            grouped.setdefault(adjustment['product_id'], []).append((position, int(adjustment['quantity_change'])))
+
+        now = datetime.utcnow()
+        batch_id = str(ObjectId())
+        key = f"{BULK_ADJUSTMENTS_FIELD}.{batch_id}"
+        product_ids = list(grouped)
+        operations = [UpdateOne({'product_id': product_id}, self._adjustment_pipeline(key, items, now))
+                      for product_id, items in grouped.items()]
+
+        failure = None
+        write_errors: Dict[str, str] = {}
+        documents: Optional[Dict[str, Dict[str, Any]]] = None
+        changes = []
+
+        def outcome_of(document):
+            return (document or {}).get(BULK_ADJUSTMENTS_FIELD, {}).get(batch_id)
+
+        try:
+            try:
+                report = self._bulk_write(operations)
+                write_errors = {product_ids[error['index']]: error.get('errmsg', 'Erreur d\'écriture')
+                                for error in report.get('writeErrors', [])}
+            except PyMongoError as e:
+                # Écriture partielle possible: la relecture des résultats notés fait foi
+                failure = str(e)
+                logger.warning(f"⚠️ Ajustement en masse interrompu ({len(adjustments)} items): {e}")
+
+            documents = {
+                document['product_id']: document
+                for document in self.collection.find({'product_id': {'$in': product_ids}},
+                                                     {'product_id': 1, key: 1, **AGGREGATE_PROJECTION})
+            }
+            for product_id, items in grouped.items():
+                document = documents.get(product_id)
+                outcome = outcome_of(document)
+                if outcome is None:
+                    continue
+                quantity = outcome['before']
+                for position, change in items:
+                    result = outcome.get(str(position))
+                    if result is None:
+                        continue
+                    self._record_history(product_id, 'add' if change > 0 else 'remove', change,
+                                         result - change, result, notes='bulk', timestamp=now)
+                    quantity = result
+                if quantity != outcome['before']:
+                    changes.append(({**document, 'quantity': outcome['before']}, {**document, 'quantity': quantity}))
+        except PyMongoError as e:
+            failure = failure or str(e)
+            logger.warning(f"⚠️ Relecture de l'ajustement en masse impossible: {e}")
+        finally:
+            self._track_changes(changes)
+            if documents is None:
+                # Résultats inconnus: tous les produits du lot sont évincés
+                self._invalidate_many(product_ids, [])
+            else:
+                noted = {product_id: outcome_of(document) for product_id, document in documents.items()}
+                touched = [product_id for product_id, outcome in noted.items() if outcome and outcome.get('applied')]
+                if touched:
+                    self._invalidate_many(touched, {documents[product_id].get('category') for product_id in touched})
+                try:
+                    self.collection.update_many({'product_id': {'$in': [product_id for product_id, outcome
+                                                                        in noted.items() if outcome]}},
+                                                {'$unset': {key: ''}})
+                except PyMongoError as e:
+                    logger.warning(f"⚠️ Nettoyage des résultats d'ajustement impossible: {e}")
+
+        results = []
+        for position, adjustment in enumerate(adjustments):
+            product_id = adjustment['product_id']
+            document = documents.get(product_id) if documents is not None else None
+            outcome = outcome_of(document)
+            if product_id in write_errors:
+                results.append({'product_id': product_id, 'status': 'error', 'error': write_errors[product_id]})
+            elif outcome is not None and outcome.get(str(position)) is not None:
+                results.append({'product_id': product_id, 'status': 'adjusted', 'quantity': outcome[str(position)]})
+            elif outcome is not None:
+                results.append({'product_id': product_id, 'status': 'error', 'error': 'Quantité insuffisante en stock'})
+            elif documents is None:
+                results.append({'product_id': product_id, 'status': 'error', 'error': f"Résultat inconnu: {failure}"})
+            elif document is None:
+                results.append({'product_id': product_id, 'status': 'error', 'error': 'Stock not found'})
+            else:
+                results.append({'product_id': product_id, 'status': 'error', 'error': f"Ajustement non appliqué: {failure}"})
+        return results
+
+    def _record_history(self, product_id: str, action: str, quantity_change: int, previous_quantity: int,
+                        new_quantity: int, user: str = 'system', notes: str = '',
+                        timestamp: Optional[datetime] = None) -> StockHistory:
+        """Enregistre un mouvement de stock (écriture différée ou directe selon HistoryRepository)"""
+        history = StockHistory(
+            product_id=product_id,
+            action=action,
+            quantity_change=quantity_change,
+            previous_quantity=previous_quantity,
+            new_quantity=new_quantity,
+            user=user,
+            notes=notes,
+            timestamp=timestamp
+        )
+        self.history.record(history.to_document())
+        return history
+
+    def adjust(self, product_id: str, quantity_change: int, user: str = 'system',
+               notes: str = '') -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Ajuste la quantité en un seul find_one_and_update conditionnel ($inc).
+
+        Le refus d'un passage sous zéro est fait par MongoDB (pas de lecture-modification-écriture).
+        Retourne (stock, historique), None si le stock n'existe pas; lève ValueError si la
+        quantité est insuffisante.
+        """
+        query: Dict[str, Any] = {'product_id': product_id}
+        if quantity_change < 0:
+            query['quantity'] = {'$gte': -quantity_change}
+
+        now = datetime.utcnow()
+        document = self.collection.find_one_and_update(
+            query,
+            {'$inc': {'quantity': quantity_change, 'version': 1}, '$set': {'updated_at': now}},
+            projection=DOCUMENT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if document is None:
+            if self.collection.find_one({'product_id': product_id}, {'_id': 1}) is None:
+                return None
+            raise ValueError("Quantité insuffisante en stock")
+
+        self._track_changes([({**document, 'quantity': document['quantity'] - quantity_change}, document)])
+        history = self._record_history(
+            product_id,
+            'add' if quantity_change > 0 else 'remove',
+            quantity_change,
+            document['quantity'] - quantity_change,
+            document['quantity'],
+            user=user,
+            notes=notes,
+            timestamp=now
+        )
+
+        stock = Stock.from_document(document).to_dict()
+        self._cache_delete(self.cache_key(product_id))
+        self._invalidate_lists(stock['category'])
+        return stock, history.to_dict()
+
+    def backfill_search_tokens(self, batch_size: int = 1000) -> int:
+        """Calcule search_tokens pour les documents créés avant l'indexation de la recherche,
+        ou indexés avec l'ancien format (préfixes de mots au lieu des sous-chaînes de 1-2 caractères)"""
+        updated = 0
+        operations = []
+        legacy = re.compile(f"^{re.escape(LEGACY_PREFIX_MARKER)}")
+        cursor = self.collection.find({'$or': [{'search_tokens': {'$exists': False}},
+                                               {'search_tokens': legacy}]},
+                                      {'product_id': 1, 'name': 1, 'description': 1})
+        for document in cursor.batch_size(batch_size):
+            operations.append(UpdateOne({'_id': document['_id']},
+                                        {'$set': {'search_tokens': build_search_tokens(document)}}))
+            if len(operations) >= batch_size:
+                updated += self.collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += self.collection.bulk_write(operations, ordered=False).modified_count
+        if updated:
+            logger.info(f"✅ search_tokens calculés pour {updated} stocks")
+        return updated
+
+    def delete(self, product_id: str) -> bool:
+        previous = self.collection.find_one_and_delete({'product_id': product_id},
+                                                       projection={'product_id': 1, **AGGREGATE_PROJECTION})
+        self._cache_delete(self.cache_key(product_id))
+        if previous is None:
+            return False
+        self._track_changes([(previous, None)])
+        self._invalidate_lists(previous.get('category'))
+        return True
+
+
+# Instance globale
+stock_repository = None
+
+def init_stock_repository(mongo_service, cache_service=None, cache_ttl: int = 300, history_repository=None,
+                          aggregates=None, alerts=None):
+    global stock_repository
+    stock_repository = StockRepository(mongo_service, cache_service, cache_ttl, history_repository,
+                                       aggregates, alerts)
+    return stock_repository
+
+def get_stock_repository():
+    global stock_repository
+    if stock_repository is None:
+        raise RuntimeError("Stock repository non initialisé")
+    return stock_repository
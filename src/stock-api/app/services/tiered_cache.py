@@ -0,0 +1,282 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTTLCache:
+    """Cache LRU en mémoire du worker, borné en taille et en durée de vie"""
+
+    def __init__(self, max_size: int = 1024, ttl: int = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        actual_ttl = min(ttl, self.ttl) if ttl is not None else self.ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + actual_ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCacheService:
+    """Cache à deux niveaux: L1 en mémoire par worker devant le cache Redis (L2).
+
+    Les invalidations (écritures, delete, clear_pattern) sont diffusées sur un canal
+    Redis pub/sub pour que les autres workers évincent leur copie L1; un remplissage
+    après lecture MongoDB (``broadcast=False``) n'invalide rien. Sans abonnement
+    (Redis indisponible), L1 est désactivé et l'abonnement retenté toutes les
+    ``listener_retry`` secondes une fois le circuit breaker refermé.
+    Les valeurs retournées par L1 sont partagées: ne pas les modifier en place.
+    """
+
+    def __init__(self, redis_cache, max_size: int = 1024, ttl: int = 30,
+                 channel: str = 'stock-api:cache-invalidation', listener_retry: float = 30.0):
+        self.l2 = redis_cache
+        self.l1 = LocalTTLCache(max_size=max_size, ttl=ttl)
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self.stats = {'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0}
+        self._invalidation_count = 0
+        self.listener_retry = listener_retry
+        self._pubsub = None
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._next_listener_attempt = 0.0
+        self.start_listener()
+
+    def start_listener(self) -> None:
+        if self._listener is not None or not self._listener_lock.acquire(blocking=False):
+            return
+        try:
+            if self._listener is not None or not self.l2.is_connected():
+                return
+            self._next_listener_attempt = time.monotonic() + self.listener_retry
+            # Entrées mises en L1 avant une coupure: aucune invalidation reçue depuis
+            self.l1.clear()
+            self._pubsub = self.l2.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: self._handle_message})
+            self._listener = self._pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._handle_listener_error
+            )
+            logger.info(f"✅ Écoute des invalidations de cache sur {self.channel}")
+        except Exception as e:
+            logger.warning(f"⚠️ Abonnement aux invalidations impossible, cache L1 désactivé: {e}")
+            if self._pubsub is not None:
+                self._pubsub.close()
+            self._pubsub = None
+            self._listener = None
+        finally:
+            self._listener_lock.release()
+
+    def _retry_listener(self) -> None:
+        # État du breaker lu directement: is_connected() consommerait l'essai d'un circuit semi-ouvert
+        if (self._listener is None and time.monotonic() >= self._next_listener_attempt
+                and self.l2.breaker.state == self.l2.breaker.CLOSED):
+            self.start_listener()
+
+    def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def _handle_message(self, message) -> None:
+        try:
+            payload = json.loads(message['data'])
+        except (TypeError, ValueError):
+            return
+        if payload.get('origin') == self.instance_id:
+            return
+        self._invalidate_local(payload.get('keys', []), payload.get('pattern'))
+
+    def _handle_listener_error(self, error, pubsub, thread) -> None:
+        # Des messages ont pu être perdus: on vide L1 plutôt que de servir des données périmées
+        logger.warning(f"⚠️ Erreur écoute invalidations cache: {error}")
+        self._invalidation_count += 1
+        self.l1.clear()
+        time.sleep(1.0)
+
+    def _invalidate_local(self, keys, pattern: Optional[str] = None) -> None:
+        self._invalidation_count += 1
+        if pattern:
+            self.l1.clear()
+            return
+        for key in keys:
+            self.l1.delete(key)
+
+    def _publish(self, keys=(), pattern: Optional[str] = None) -> None:
+        if not self.l2.is_connected():
+            return
+        try:
+            message = json.dumps({'origin': self.instance_id, 'keys': list(keys), 'pattern': pattern})
+            self.l2.execute(self.l2.client.publish, self.channel, message)
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur publication invalidation cache: {e}")
+
+    @property
+    def l1_enabled(self) -> bool:
+        return self._listener is not None
+
+    def get(self, key: str) -> Any:
+        self._retry_listener()
+        if self.l1_enabled:
+            value = self.l1.get(key)
+            if value is not None:
+                self.stats['l1_hits'] += 1
+                return value
+            self.stats['l1_misses'] += 1
+
+        invalidation_count = self._invalidation_count
+        value = self.l2.get(key)
+        if value is None:
+            self.stats['l2_misses'] += 1
+            return None
+
+        self.stats['l2_hits'] += 1
+        # Ne pas repeupler L1 si une invalidation est arrivée pendant la lecture L2
+        if self.l1_enabled and invalidation_count == self._invalidation_count:
+            self.l1.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None,
+            tags: Optional[Iterable[str]] = None, broadcast: bool = True) -> bool:
+        """``broadcast=False`` pour un remplissage après lecture: la valeur n'a pas changé, rien à invalider"""
+        result = self.l2.set(key, value, ttl, tags=tags)
+        if self.l1_enabled:
+            self.l1.set(key, value, ttl)
+        if broadcast:
+            self._publish(keys=[key])
+        return result
+
+    def delete(self, key: str) -> bool:
+        self.l1.delete(key)
+        result = self.l2.delete(key)
+        self._publish(keys=[key])
+        return result
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        self._retry_listener()
+        keys = list(keys)
+        results = {}
+        missing = keys
+        if self.l1_enabled:
+            missing = []
+            for key in keys:
+                value = self.l1.get(key)
+                if value is None:
+                    missing.append(key)
+                else:
+                    results[key] = value
+            self.stats['l1_hits'] += len(results)
+            self.stats['l1_misses'] += len(missing)
+
+        if not missing:
+            return results
+
+        invalidation_count = self._invalidation_count
+        found = self.l2.get_many(missing)
+        self.stats['l2_hits'] += len(found)
+        self.stats['l2_misses'] += len(missing) - len(found)
+        if self.l1_enabled and invalidation_count == self._invalidation_count:
+            for key, value in found.items():
+                self.l1.set(key, value)
+        results.update(found)
+        return results
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None,
+                 ttls: Optional[Dict[str, int]] = None, broadcast: bool = True) -> int:
+        result = self.l2.set_many(items, ttl, ttls)
+        if self.l1_enabled:
+            for key, value in items.items():
+                self.l1.set(key, value, (ttls or {}).get(key, ttl))
+        if broadcast:
+            self._publish(keys=items.keys())
+        return result
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        for key in keys:
+            self.l1.delete(key)
+        result = self.l2.delete_many(keys)
+        self._publish(keys=keys)
+        return result
+
+    def exists(self, key: str) -> bool:
+        if self.l1_enabled and self.l1.get(key) is not None:
+            return True
+        return self.l2.exists(key)
+
+    def counter(self, key: str, increment: bool = False) -> Optional[int]:
+        # Partagé entre workers: jamais servi depuis L1
+        return self.l2.counter(key, increment)
+
+    def invalidate_tags(self, *tags: str) -> List[str]:
+        keys = self.l2.invalidate_tags(*tags)
+        for key in keys:
+            self.l1.delete(key)
+        if keys:
+            self._publish(keys=keys)
+        return keys
+
+    def clear_pattern(self, pattern: str) -> int:
+        self.l1.clear()
+        result = self.l2.clear_pattern(pattern)
+        self._publish(pattern=pattern)
+        return result
+
+    @staticmethod
+    def _hit_rate(hits: int, misses: int) -> float:
+        total = hits + misses
+        return round(hits / total * 100, 2) if total > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        stats = self.l2.get_stats()
+        stats['l1'] = {
+            'enabled': self.l1_enabled,
+            'size': len(self.l1),
+            'max_size': self.l1.max_size,
+            'ttl': self.l1.ttl,
+            'hits': self.stats['l1_hits'],
+            'misses': self.stats['l1_misses'],
+            'hit_rate': self._hit_rate(self.stats['l1_hits'], self.stats['l1_misses'])
+        }
+        stats['l2'] = {
+            'hits': self.stats['l2_hits'],
+            'misses': self.stats['l2_misses'],
+            'hit_rate': self._hit_rate(self.stats['l2_hits'], self.stats['l2_misses'])
+        }
+        return stats
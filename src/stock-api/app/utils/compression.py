@@ -0,0 +1,178 @@
+import logging
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+from app.services.tiered_cache import LocalTTLCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli est optionnel
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard est optionnel
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml')
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush_block(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush_block(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush_block(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> Dict[str, Callable[[int], object]]:
+    """Encodages utilisables, par ordre de préférence serveur"""
+    encodings = {}
+    if zstandard is not None:
+        encodings['zstd'] = _ZstdStream
+    if brotli is not None:
+        encodings['br'] = _BrotliStream
+    encodings['gzip'] = _GzipStream
+    return encodings
+
+
+def negotiate(accept_encodings, encodings: Iterable[str]) -> Optional[str]:
+    """Encodage de plus haute qualité accepté par le client; à égalité, préférence serveur"""
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class ResponseCompressor:
+    """Compression négociée (Accept-Encoding) des réponses au-delà d'un seuil.
+
+    Les réponses en streaming sont compressées au fil de l'eau (un bloc vidé par
+    morceau produit). Les corps compressés des réponses portant un ETag sont gardés
+    en mémoire par (ETag, encodage): une réponse chaude n'est compressée qu'une fois.
+    L'ETag d'une réponse compressée devient faible, comme le fait nginx.
+    """
+
+    def __init__(self, min_size: int = 1024, levels: Optional[Dict[str, int]] = None, cache_size: int = 256,
+                 cache_ttl: int = 300):
+        self.min_size = min_size
+        self.levels = levels or {}
+        self.encodings = available_encodings()
+        self.cache = LocalTTLCache(max_size=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+
+    @staticmethod
+    def _is_compressible(response: Response) -> bool:
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+    def _stream(self, encoding: str):
+        return self.encodings[encoding](self.levels.get(encoding, 6))
+
+    def _compress_body(self, body: bytes, encoding: str) -> bytes:
+        stream = self._stream(encoding)
+        return stream.compress(body) + stream.finish()
+
+    def _compress_iter(self, chunks: Iterable, encoding: str) -> Iterator[bytes]:
+        stream = self._stream(encoding)
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                data = stream.compress(chunk) + stream.flush_block()
+                if data:
+                    yield data
+            yield stream.finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def __call__(self, response: Response) -> Response:
+        if (response.status_code < 200 or response.status_code in (204, 304) or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or not self._is_compressible(response)):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = negotiate(request.accept_encodings, self.encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_iter(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            etag, _ = response.get_etag()
+            cache_key = f"{etag}:{encoding}" if etag and self.cache is not None else None
+            compressed = self.cache.get(cache_key) if cache_key else None
+            if compressed is None:
+                compressed = self._compress_body(body, encoding)
+                if cache_key:
+                    self.cache.set(cache_key, compressed)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app: Flask) -> Optional[ResponseCompressor]:
+    """Branche la compression des réponses (after_request) selon la configuration"""
+    if not app.config['COMPRESSION_ENABLED']:
+        return None
+    compressor = ResponseCompressor(
+        min_size=app.config['COMPRESSION_MIN_SIZE'],
+        levels={
+            'gzip': app.config['COMPRESSION_GZIP_LEVEL'],
+            'br': app.config['COMPRESSION_BROTLI_LEVEL'],
+            'zstd': app.config['COMPRESSION_ZSTD_LEVEL']
+        },
+        cache_size=app.config['COMPRESSION_CACHE_SIZE']
+    )
+    app.after_request(compressor)
+    logger.info(f"✅ Compression des réponses activée ({', '.join(compressor.encodings)})")
+    return compressor
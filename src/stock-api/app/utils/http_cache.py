@@ -0,0 +1,39 @@
+import hashlib
+import json
+from typing import Any
+
+from flask import Response, current_app, request
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fort (non quoté) dérivé d'une version de ressource et des paramètres de la représentation"""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cache_control() -> str:
+    return f"public, max-age={current_app.config['HTTP_CACHE_MAX_AGE']}, must-revalidate"
+
+
+def is_not_modified(etag: str) -> bool:
+    # If-None-Match se compare en mode faible (RFC 9110)
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag: str) -> Response:
+    """Réponse 304 sans corps: ni lecture MongoDB ni sérialisation"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control()
+    return response
+
+
+def with_cache_headers(response: Response, etag: str = None) -> Response:
+    """Pose ETag et Cache-Control; sans ETag de version, ETag calculé sur le corps (304 via make_conditional)"""
+    if etag:
+        response.set_etag(etag)
+    else:
+        response.add_etag()
+        response.make_conditional(request)
+    response.headers['Cache-Control'] = cache_control()
+    return response
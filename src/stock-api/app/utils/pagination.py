@@ -0,0 +1,38 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+DATETIME_MARKER = '$dt'
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {DATETIME_MARKER: value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and DATETIME_MARKER in value:
+        return datetime.fromisoformat(value[DATETIME_MARKER])
+    return value
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode une position de pagination en curseur opaque (base64 url-safe)"""
+    payload = {key: _encode_value(value) for key, value in position.items()}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Décode un curseur produit par encode_cursor; lève ValueError s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Curseur de pagination invalide")
+    if not isinstance(payload, dict):
+        raise ValueError("Curseur de pagination invalide")
+    return {key: _decode_value(value) for key, value in payload.items()}
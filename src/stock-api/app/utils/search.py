@@ -0,0 +1,58 @@
+import re
+from typing import Any, Dict, List, Optional
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+NGRAM_SIZE = 3
+# Ancien format des tokens (préfixes de mots marqués 'p:'), recalculé par le backfill
+LEGACY_PREFIX_MARKER = 'p:'
+
+# Champs indexés pour la recherche, par ordre de pertinence
+SEARCH_FIELDS = ('product_id', 'name', 'description')
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return WORD_PATTERN.findall((text or '').lower())
+
+
+def _word_tokens(word: str) -> List[str]:
+    """Sous-chaînes de 1 à 3 caractères d'un mot: une recherche courte reste une recherche de sous-chaîne"""
+    return [word[i:i + size] for size in range(1, NGRAM_SIZE + 1) for i in range(len(word) - size + 1)]
+
+
+def build_search_tokens(document: Dict[str, Any]) -> List[str]:
+    """Tokens stockés dans ``search_tokens`` (index multikey) pour un document stock"""
+    tokens = set()
+    for field in SEARCH_FIELDS:
+        for word in _words(document.get(field)):
+            tokens.update(_word_tokens(word))
+    return sorted(tokens)
+
+
+def query_tokens(search: str) -> Optional[List[str]]:
+    """Tokens que tout document correspondant doit contenir (filtre $all).
+
+    Trigrammes des mots de 3 caractères ou plus, le mot lui-même sinon.
+    Retourne None si la requête ne contient aucun mot (résolue sans l'index).
+    """
+    tokens = set()
+    for word in _words(search):
+        if len(word) < NGRAM_SIZE:
+            tokens.add(word)
+        else:
+            tokens.update(word[i:i + NGRAM_SIZE] for i in range(len(word) - NGRAM_SIZE + 1))
+    return sorted(tokens) or None
+
+
+def match_score(document: Dict[str, Any], search: str) -> int:
+    """Vérifie un candidat et calcule son score (0 = pas de correspondance).
+
+    La requête doit être une sous-chaîne (insensible à la casse) de product_id,
+    name ou description; correspondance exacte > début de champ > ailleurs.
+    """
+    search = search.strip().lower()
+    score = 0
+    for weight, field in zip((100, 10, 1), SEARCH_FIELDS):
+        value = (document.get(field) or '').lower()
+        if search in value:
+            score += weight * (3 if value == search else 2 if value.startswith(search) else 1)
+    return score
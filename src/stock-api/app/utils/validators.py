@@ -1,5 +1,7 @@
+import operator
 import re
-from typing import Optional, Dict, Any
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 class StockValidator:
     
@@ -50,7 +52,7 @@ class StockValidator:
         
         if ('min_stock' in data and 'max_stock' in data and 
             data['min_stock'] is not None and data['max_stock'] is not None):
-            if data['max_stock'] <= data['min_stock']:
+            if int(data['max_stock']) <= int(data['min_stock']):
                 return False, "Le stock maximum doit être supérieur au stock minimum"
         
         return True, None
@@ -65,6 +67,198 @@ class StockValidator:
         except (ValueError, TypeError):
             return False, "La modification de quantité doit être un nombre entier"
 
+FieldError = Dict[str, str]
+
+
+class FieldRule:
+    """Règle d'un champ du schéma: type (str|int|float|any), présence et bornes"""
+
+    __slots__ = ('name', 'kind', 'required', 'min_length', 'max_length', 'minimum', 'nonzero', 'messages')
+
+    def __init__(self, name: str, kind: str = 'any', required: bool = False, min_length: int = None,
+                 max_length: int = None, minimum: float = None, nonzero: bool = False,
+                 messages: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.min_length = min_length
+        self.max_length = max_length
+        self.minimum = minimum
+        self.nonzero = nonzero
+        self.messages = {'required': f"Champ requis manquant: {name}", **(messages or {})}
+
+
+class BatchValidator:
+    """Schéma compilé validant un lot d'enregistrements colonne par colonne.
+
+    Chaque règle traite la colonne entière: conversion via map(int/float) et bornes
+    via min()/max() sur toute la colonne (boucles en C), avec repli élément par élément
+    seulement si la colonne contient une valeur absente ou invalide. ``validate``
+    retourne les valeurs converties par enregistrement (None si invalide) et les
+    erreurs par indice d'enregistrement: toutes, avec leur champ (``{'field', 'error'}``),
+    champs requis manquants en premier comme StockValidator.
+    """
+
+    CONVERTERS: Dict[str, Callable[[Any], Any]] = {'int': int, 'float': float}
+
+    def __init__(self, rules: Sequence[FieldRule],
+                 checks: Sequence[Callable[[Dict[str, List[Any]]], Iterable[Tuple[int, FieldError]]]] = ()):
+        self.rules = tuple(rules)
+        self.checks = tuple(checks)
+
+    def validate(self, records: Sequence[Any]) -> Tuple[List[Optional[Dict[str, Any]]], Dict[int, List[FieldError]]]:
+        not_objects = [index for index, record in enumerate(records) if not isinstance(record, dict)]
+        items = [record if isinstance(record, dict) else {} for record in records] if not_objects else records
+        errors: Dict[int, List[FieldError]] = {}
+
+        columns, complete = {}, []
+        for rule in self.rules:
+            columns[rule.name], has_all = self._check_column(rule, [item.get(rule.name) for item in items], errors)
+            if has_all:
+                complete.append(rule.name)
+        for check in self.checks:
+            for index, error in check(columns):
+                errors.setdefault(index, []).append(error)
+
+        # Colonnes sans trou: dicts construits en C par zip; les autres complétées champ par champ
+        if complete:
+            values = list(map(dict, map(zip, repeat(complete), zip(*(columns[name] for name in complete)))))
+        else:
+            values = [{} for _ in items]
+        for name, column in columns.items():
+            if name in complete:
+                continue
+            for index, value in enumerate(column):
+                if value is not None:
+                    values[index][name] = value
+
+        for index in not_objects:
+            errors[index] = [{'field': '', 'error': 'Enregistrement invalide: objet attendu'}]
+        for index, record_errors in errors.items():
+            values[index] = None
+            record_errors.sort(key=lambda error: error.get('code') != 'required')
+            for error in record_errors:
+                error.pop('code', None)
+        return values, errors
+
+    def _check_column(self, rule: FieldRule, column: List[Any],
+                      errors: Dict[int, List[FieldError]]) -> Tuple[List[Any], bool]:
+        """Colonne convertie alignée sur l'entrée (None pour une valeur absente ou invalide)
+        et indicateur "aucune valeur None"."""
+        if not column:
+            return column, False
+        converter = self.CONVERTERS.get(rule.kind)
+        if converter is not None:
+            # Chemin rapide: colonne entièrement convertible (None lève TypeError), bornes vérifiées en bloc
+            try:
+                converted = list(map(converter, column))
+            except (ValueError, TypeError):
+                converted = None
+            if converted is not None and self._column_in_bounds(rule, converted):
+                return converted, True
+        elif rule.kind == 'str':
+            try:
+                lengths = list(map(len, map(str.strip, column)))
+            except TypeError:
+                lengths = None
+            if lengths is not None and self._lengths_in_bounds(rule, lengths):
+                return column, True
+        else:
+            complete = None not in column
+            if complete or not rule.required:
+                return column, complete
+
+        checked = []
+        for position, value in enumerate(column):
+            if value is None:
+                if rule.required:
+                    errors.setdefault(position, []).append(
+                        {'field': rule.name, 'error': rule.messages['required'], 'code': 'required'})
+                checked.append(None)
+                continue
+            converted, message = self._check_value(rule, converter, value)
+            if message:
+                errors.setdefault(position, []).append({'field': rule.name, 'error': message})
+            checked.append(converted)
+        return checked, None not in checked
+
+    @staticmethod
+    def _column_in_bounds(rule: FieldRule, converted: List[Any]) -> bool:
+        if rule.minimum is not None and min(converted) < rule.minimum:
+            return False
+        return not rule.nonzero or 0 not in converted
+
+    @staticmethod
+    def _lengths_in_bounds(rule: FieldRule, lengths: List[int]) -> bool:
+        shortest, longest = min(lengths), max(lengths)
+        return (shortest > 0 and (rule.min_length is None or shortest >= rule.min_length)
+                and (rule.max_length is None or longest <= rule.max_length))
+
+    @staticmethod
+    def _check_value(rule: FieldRule, converter, value: Any) -> Tuple[Any, Optional[str]]:
+        if converter is not None:
+            try:
+                converted = converter(value)
+            except (ValueError, TypeError):
+                return None, rule.messages['type']
+            if rule.minimum is not None and converted < rule.minimum:
+                return None, rule.messages['minimum']
+            if rule.nonzero and converted == 0:
+                return None, rule.messages['nonzero']
+            return converted, None
+
+        if rule.kind == 'str':
+            if not isinstance(value, str):
+                return None, rule.messages['length']
+            length = len(value.strip())
+            if not length or (rule.min_length is not None and length < rule.min_length) \
+                    or (rule.max_length is not None and length > rule.max_length):
+                return None, rule.messages['length']
+        return value, None
+
+
+def _check_stock_bounds(columns: Dict[str, List[Any]]) -> Iterable[Tuple[int, FieldError]]:
+    minimum, maximum = columns['min_stock'], columns['max_stock']
+    try:
+        if not any(map(operator.le, maximum, minimum)):
+            return ()
+    except TypeError:
+        pass  # valeurs absentes: vérification enregistrement par enregistrement
+    error = "Le stock maximum doit être supérieur au stock minimum"
+    return [(index, {'field': 'max_stock', 'error': error})
+            for index, (low, high) in enumerate(zip(minimum, maximum))
+            if low is not None and high is not None and high <= low]
+
+
+# Mêmes règles et messages que StockValidator.validate_stock_data
+STOCK_SCHEMA = BatchValidator([
+    FieldRule('name', 'str', required=True, min_length=2, max_length=100,
+              messages={'length': "Le nom doit contenir entre 2 et 100 caractères"}),
+    FieldRule('description'),
+    FieldRule('quantity', 'int', required=True, minimum=0,
+              messages={'type': "La quantité doit être un nombre entier",
+                        'minimum': "La quantité ne peut pas être négative"}),
+    FieldRule('price', 'float', required=True, minimum=0,
+              messages={'type': "Le prix doit être un nombre", 'minimum': "Le prix ne peut pas être négatif"}),
+    FieldRule('category', 'str', required=True, min_length=2, max_length=50,
+              messages={'length': "La catégorie doit contenir entre 2 et 50 caractères"}),
+    FieldRule('min_stock', 'int', minimum=0,
+              messages={'type': "Le stock minimum doit être un nombre entier",
+                        'minimum': "Le stock minimum ne peut pas être négatif"}),
+    FieldRule('max_stock', 'int', minimum=0,
+              messages={'type': "Le stock maximum doit être un nombre entier",
+                        'minimum': "Le stock maximum ne peut pas être négatif"}),
+    FieldRule('supplier'),
+    FieldRule('sku'),
+], checks=[_check_stock_bounds])
+
+ADJUSTMENT_SCHEMA = BatchValidator([
+    FieldRule('quantity_change', 'int', required=True, nonzero=True,
+              messages={'type': "La modification de quantité doit être un nombre entier",
+                        'nonzero': "La modification de quantité ne peut pas être zéro"}),
+])
+
+
 class QueryValidator:
     
     @staticmethod
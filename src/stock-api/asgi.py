@@ -0,0 +1,12 @@
+from app.asgi import create_asgi_app
+import os
+
+app = create_asgi_app()
+
+if __name__ == '__main__':
+    import uvicorn
+
+    host = os.environ.get('API_HOST', '0.0.0.0')
+    port = int(os.environ.get('API_PORT', 8000))
+
+    uvicorn.run(app, host=host, port=port)
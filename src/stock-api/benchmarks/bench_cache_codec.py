@@ -0,0 +1,60 @@
+"""Microbenchmark du codec de cache: pickle historique vs CacheCodec.
+
+Usage (depuis src/stock-api):
+    python -m benchmarks.bench_cache_codec [--iterations 20000]
+"""
+import argparse
+import pickle
+import timeit
+
+from app.models.stock import Stock
+from app.services.cache_codec import CacheCodec
+
+
+def make_stock(index: int) -> Stock:
+    return Stock(
+        name=f"Produit {index}",
+        description="Article de démonstration pour le benchmark du cache",
+        quantity=index % 500,
+        price=19.99 + index,
+        category=f"categorie-{index % 10}",
+        supplier="Fournisseur SA",
+        sku=f"SKU-{index:06d}",
+        product_id=f"PRD{index:06d}"
+    )
+
+
+class LegacyPickle:
+    def encode(self, value):
+        return pickle.dumps(value)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+def run(iterations: int) -> None:
+    payloads = {
+        'stock (1)': make_stock(1).to_dict(),
+        'liste (100)': [make_stock(i).to_dict() for i in range(100)],
+    }
+    codecs = {
+        'pickle (actuel)': LegacyPickle(),
+        'json': CacheCodec('json', compression_threshold=0),
+        'json + zlib': CacheCodec('json', compression_threshold=1024),
+    }
+
+    print(f"{'payload':<14}{'codec':<18}{'octets':>10}{'encode µs':>12}{'decode µs':>12}")
+    for payload_name, payload in payloads.items():
+        count = iterations if payload_name == 'stock (1)' else max(iterations // 100, 1)
+        for codec_name, codec in codecs.items():
+            data = codec.encode(payload)
+            assert codec.decode(data) == payload
+            encode = timeit.timeit(lambda: codec.encode(payload), number=count) / count * 1e6
+            decode = timeit.timeit(lambda: codec.decode(data), number=count) / count * 1e6
+            print(f"{payload_name:<14}{codec_name:<18}{len(data):>10}{encode:>12.2f}{decode:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,43 @@
+"""Microbenchmark des réponses JSON: jsonify (provider Flask par défaut) vs FastJSONProvider.
+
+Usage (depuis src/stock-api):
+    python -m benchmarks.bench_json_provider [--iterations 20000]
+"""
+import argparse
+import timeit
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.json_provider import FastJSONProvider, orjson
+from benchmarks.bench_cache_codec import make_stock
+
+
+def make_app(provider_class) -> Flask:
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    return app
+
+
+def run(iterations: int) -> None:
+    providers = {
+        'jsonify (actuel)': make_app(DefaultJSONProvider),
+        'orjson' if orjson is not None else 'fast (json)': make_app(FastJSONProvider),
+    }
+    sizes = (1, 100, 1000)
+
+    print(f"{'stocks':>8}  {'provider':<18}{'octets':>10}{'µs/réponse':>14}{'réponses/s':>14}")
+    for size in sizes:
+        payload = {'stocks': [make_stock(i).to_dict() for i in range(size)], 'count': size}
+        count = max(iterations // size, 20)
+        for name, app in providers.items():
+            with app.app_context():
+                body = jsonify(payload).get_data()
+                seconds = timeit.timeit(lambda: jsonify(payload).get_data(), number=count) / count
+            print(f"{size:>8}  {name:<18}{len(body):>10}{seconds * 1e6:>14.1f}{1 / seconds:>14.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,51 @@
+"""Temps de démarrage à froid: import de l'application et phases de create_app.
+
+Chaque mesure tourne dans un nouvel interpréteur (imports non mis en cache).
+create_app n'ouvre aucune connexion: MongoDB et Redis ne sont pas nécessaires.
+
+Usage (depuis src/stock-api):
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+from app.services.startup import get_startup_report
+create_app()
+total = time.perf_counter() - started
+print(json.dumps({'total': total, **get_startup_report().to_dict()}))
+"""
+
+
+def measure() -> dict:
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], capture_output=True, text=True, check=True).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    report['process'] = time.perf_counter() - started
+    return report
+
+
+def run(runs: int) -> None:
+    reports = [measure() for _ in range(runs)]
+    rows = [('processus (interpréteur compris)', [r['process'] for r in reports]),
+            ('import + create_app', [r['total'] for r in reports]),
+            ('import', [r['import_seconds'] for r in reports]),
+            ('create_app', [r['create_app_seconds'] for r in reports])]
+    rows += [(f"  {phase}", [r['phases'][phase] for r in reports]) for phase in reports[0]['phases']]
+
+    print(f"{'phase':<34}{'médiane ms':>12}{'min ms':>10}{'max ms':>10}")
+    for name, values in rows:
+        print(f"{name:<34}{statistics.median(values) * 1e3:>12.1f}{min(values) * 1e3:>10.1f}{max(values) * 1e3:>10.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    run(parser.parse_args().runs)
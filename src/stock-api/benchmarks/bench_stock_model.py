@@ -0,0 +1,100 @@
+"""Microbenchmark du modèle Stock: ancienne classe à __dict__ vs Stock compact (__slots__).
+
+Usage (depuis src/stock-api):
+    python -m benchmarks.bench_stock_model [--count 10000]
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models.stock import Stock
+
+
+class LegacyStock:
+    """Ancienne représentation: attributs dans un __dict__, to_dict recalculé à chaque appel"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    @classmethod
+    def from_dict(cls, data):
+        created_at = data.get('created_at')
+        if created_at and isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        updated_at = data.get('updated_at')
+        if updated_at and isinstance(updated_at, str):
+            updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+        _id = data.get('_id')
+        if _id and not isinstance(_id, ObjectId):
+            _id = ObjectId(_id)
+        return cls(_id=_id, product_id=data.get('product_id'), name=data.get('name'),
+                   description=data.get('description', ''), quantity=data.get('quantity', 0),
+                   price=data.get('price', 0.0), category=data.get('category', 'general'),
+                   min_stock=data.get('min_stock', 10), max_stock=data.get('max_stock', 1000),
+                   supplier=data.get('supplier', ''), sku=data.get('sku', ''),
+                   created_at=created_at, updated_at=updated_at)
+
+    def to_dict(self):
+        return {
+            "id": str(self._id), "product_id": self.product_id, "name": self.name,
+            "description": self.description, "quantity": self.quantity, "price": self.price,
+            "category": self.category, "min_stock": self.min_stock, "max_stock": self.max_stock,
+            "supplier": self.supplier, "sku": self.sku,
+            "created_at": self.created_at.isoformat(), "updated_at": self.updated_at.isoformat(),
+            "stock_value": self.quantity * self.price,
+            "low_stock_alert": self.quantity <= self.min_stock,
+            "over_stock_alert": self.quantity >= self.max_stock
+        }
+
+
+def make_document(index: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        '_id': ObjectId(), 'product_id': f"PRD{index:06d}", 'name': f"Produit {index}",
+        'description': "Article de démonstration pour le benchmark du modèle", 'quantity': index % 500,
+        'price': 19.99 + index, 'category': f"categorie-{index % 10}", 'min_stock': 10,
+        'max_stock': 1000, 'supplier': "Fournisseur SA", 'sku': f"SKU-{index:06d}",
+        'created_at': now, 'updated_at': now
+    }
+
+
+def measure(build, documents):
+    tracemalloc.start()
+    started = time.perf_counter()
+    objects = [build(document) for document in documents]
+    build_seconds = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for stock in objects:
+        stock.to_dict()
+    first_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for stock in objects:
+        stock.to_dict()
+    second_seconds = time.perf_counter() - started
+    return build_seconds, memory, first_seconds, second_seconds
+
+
+def run(count: int) -> None:
+    documents = [make_document(i) for i in range(count)]
+    variants = {
+        'dict (actuel)': LegacyStock.from_dict,
+        'slots': Stock.from_document,
+    }
+    print(f"{count} stocks")
+    print(f"{'modèle':<16}{'construction ms':>17}{'mémoire Ko':>13}{'to_dict ms':>13}{'2e to_dict ms':>15}")
+    for name, build in variants.items():
+        build_seconds, memory, first_seconds, second_seconds = measure(build, documents)
+        print(f"{name:<16}{build_seconds * 1e3:>17.1f}{memory / 1024:>13.0f}"
+              f"{first_seconds * 1e3:>13.1f}{second_seconds * 1e3:>15.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000)
+    run(parser.parse_args().count)
@@ -0,0 +1,70 @@
+"""Microbenchmark de la validation d'un lot: StockValidator par enregistrement vs STOCK_SCHEMA.
+
+Le chemin par enregistrement inclut la conversion coerce_stock_fields qui suivait la
+validation; STOCK_SCHEMA retourne directement les valeurs converties.
+
+Usage (depuis src/stock-api):
+    python -m benchmarks.bench_validators [--count 100000] [--invalid 0.01]
+"""
+import argparse
+import time
+
+from app.services.stock_repository import coerce_stock_fields
+from app.utils.validators import STOCK_SCHEMA, StockValidator
+
+
+def make_record(index: int, invalid: bool) -> dict:
+    record = {
+        'symbol': f"PRD{index:06d}", 'name': f"Produit {index}", 'description': "Article du benchmark",
+        'quantity': index % 500, 'price': 19.99 + index, 'category': f"categorie-{index % 10}",
+        'min_stock': 10, 'max_stock': 1000, 'supplier': "Fournisseur SA", 'sku': f"SKU-{index:06d}"
+    }
+    if invalid:
+        record['quantity'] = -1
+        record['price'] = 'gratuit'
+    return record
+
+
+def per_record(records):
+    values, errors = [], []
+    for record in records:
+        is_valid, error = StockValidator.validate_stock_data(record)
+        values.append(coerce_stock_fields(record) if is_valid else None)
+        errors.append(error)
+    return values, errors
+
+
+def batch(records):
+    return STOCK_SCHEMA.validate(records)
+
+
+def measure(validate, records, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        validate(records)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(count: int, invalid_ratio: float) -> None:
+    step = int(1 / invalid_ratio) if invalid_ratio > 0 else 0
+    records = [make_record(i, bool(step) and i % step == 0) for i in range(count)]
+
+    per_record_values, _ = per_record(records)
+    batch_values, _ = batch(records)
+    assert per_record_values == batch_values, "Les deux validations divergent"
+
+    print(f"{count} enregistrements, {invalid_ratio:.1%} invalides")
+    print(f"{'validation':<24}{'ms':>10}{'µs/enreg.':>12}")
+    for name, validate in (('par enregistrement', per_record), ('lot (STOCK_SCHEMA)', batch)):
+        seconds = measure(validate, records)
+        print(f"{name:<24}{seconds * 1e3:>10.1f}{seconds * 1e6 / count:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--invalid', type=float, default=0.01)
+    arguments = parser.parse_args()
+    run(arguments.count, arguments.invalid)
@@ -11,6 +11,10 @@ class Config:
     REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', 'XXXXXX')
     REDIS_DB = int(os.environ.get('REDIS_DB', 0))
     REDIS_TTL = int(os.environ.get('REDIS_TTL', 3600))  # 1 heure
+    # Circuit breaker Redis: échecs avant ouverture, backoff exponentiel des sondes (secondes)
+    REDIS_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('REDIS_BREAKER_FAILURE_THRESHOLD', 1))
+    REDIS_BREAKER_BASE_BACKOFF = float(os.environ.get('REDIS_BREAKER_BASE_BACKOFF', 1.0))
+    REDIS_BREAKER_MAX_BACKOFF = float(os.environ.get('REDIS_BREAKER_MAX_BACKOFF', 60.0))
     
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -23,9 +27,54 @@ class Config:
     
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     
+    # Nombre maximum d'éléments par requête bulk
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+    # Taille des lots du curseur MongoDB pour l'export en streaming
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    # Import en streaming: lignes par bulk_write, erreurs détaillées au maximum dans le rapport
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+    IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', 1000))
+    
+    # Historique des mouvements: écriture différée par lots (insert_many) dans chaque worker
+    HISTORY_WRITE_BEHIND = os.environ.get('HISTORY_WRITE_BEHIND', 'true').lower() == 'true'
+    HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 500))
+    HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 1.0))
+    HISTORY_MAX_QUEUE = int(os.environ.get('HISTORY_MAX_QUEUE', 100000))
+    # Agrégats heure/jour de l'historique recalculés à chaque réconciliation sur les N derniers jours
+    HISTORY_ROLLUP_RECONCILE_DAYS = float(os.environ.get('HISTORY_ROLLUP_RECONCILE_DAYS', 2))
+    # Agrégats par catégorie et index d'alertes (Redis): réconciliation MongoDB toutes les N secondes, 0 = désactivée
+    AGGREGATES_RECONCILE_INTERVAL = int(os.environ.get('AGGREGATES_RECONCILE_INTERVAL', 300))
+    
+    # Mode ASGI (asgi:app): pools des clients asyncio, threads des routes restées en WSGI
+    ASYNC_MONGODB_MAX_POOL_SIZE = int(os.environ.get('ASYNC_MONGODB_MAX_POOL_SIZE', 100))
+    ASYNC_REDIS_MAX_CONNECTIONS = int(os.environ.get('ASYNC_REDIS_MAX_CONNECTIONS', 200))
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 32))
+    
     # Cache configuration
     CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'true').lower() == 'true'
     CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))  # 5 minutes par défaut
+    # Codec des valeurs en cache (json|pickle), compression zlib au-delà du seuil (octets)
+    CACHE_CODEC = os.environ.get('CACHE_CODEC', 'json')
+    CACHE_COMPRESSION_THRESHOLD = int(os.environ.get('CACHE_COMPRESSION_THRESHOLD', 1024))
+    CACHE_COMPRESSION_LEVEL = int(os.environ.get('CACHE_COMPRESSION_LEVEL', 6))
+    
+    # Cache L1 en mémoire par worker devant Redis (invalidation via pub/sub)
+    L1_CACHE_ENABLED = os.environ.get('L1_CACHE_ENABLED', 'false').lower() == 'true'
+    L1_CACHE_MAX_SIZE = int(os.environ.get('L1_CACHE_MAX_SIZE', 1024))
+    L1_CACHE_TTL = int(os.environ.get('L1_CACHE_TTL', 30))  # secondes
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'stock-api:cache-invalidation')
+    
+    # Cache HTTP (ETag + Cache-Control): durée de fraîcheur annoncée à Kong/clients, 0 = revalidation systématique
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+    
+    # Compression négociée des réponses (zstd si installé, brotli, gzip) au-delà du seuil (octets)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_LEVEL = int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 4))
+    COMPRESSION_ZSTD_LEVEL = int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3))
+    # Corps compressés gardés en mémoire par worker (clé ETag + encodage), 0 = désactivé
+    COMPRESSION_CACHE_SIZE = int(os.environ.get('COMPRESSION_CACHE_SIZE', 256))
 
 class DevelopmentConfig(Config):
     DEBUG = True
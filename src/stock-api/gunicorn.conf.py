@@ -0,0 +1,29 @@
+import os
+
+# Configuration Gunicorn: gunicorn -c gunicorn.conf.py run:app (ou asgi:app avec -k uvicorn.workers.UvicornWorker)
+#
+# preload_app: l'application est importée une seule fois dans le maître puis partagée
+# en copy-on-write par les workers forkés. create_app n'ouvre aucune connexion: le
+# registre de services crée les clients MongoDB/Redis au premier usage dans chaque worker.
+
+bind = os.environ.get('GUNICORN_BIND', f"{os.environ.get('API_HOST', '0.0.0.0')}:{os.environ.get('API_PORT', 8000)}")
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Dans le worker: abandon des clients hérités du maître, démarrage des tâches de fond"""
+    from app.services.registry import registry
+    registry.after_fork()
+    registry.start_process()
+
+
+def worker_exit(server, worker):
+    """Vide l'historique en file puis ferme les connexions du worker"""
+    from app.services.registry import registry
+    registry.close()
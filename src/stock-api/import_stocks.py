@@ -0,0 +1,51 @@
+"""Import en masse de stocks depuis un fichier CSV ou NDJSON.
+
+Usage:
+    python import_stocks.py inventaire.csv
+    python import_stocks.py --format ndjson --chunk-size 5000 export.ndjson
+"""
+import argparse
+import json
+import sys
+
+from app import create_app
+from app.services.startup import get_warm_up
+from app.services.stock_import import IMPORT_FORMATS, import_stocks
+from app.services.stock_repository import get_stock_repository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse de stocks (CSV/NDJSON)")
+    parser.add_argument('path', help="Fichier à importer ('-' pour l'entrée standard)")
+    parser.add_argument('--format', choices=IMPORT_FORMATS,
+                        help="Format du fichier (par défaut: extension du fichier)")
+    parser.add_argument('--chunk-size', type=int, help="Lignes par bulk_write")
+    args = parser.parse_args()
+
+    import_format = args.format or args.path.rsplit('.', 1)[-1].lower()
+    if import_format not in IMPORT_FORMATS:
+        parser.error(f"Format non supporté: {import_format} (utiliser --format)")
+
+    app = create_app()
+    chunk_size = args.chunk_size or app.config['IMPORT_CHUNK_SIZE']
+    # L'index unique sur product_id doit exister avant d'insérer (sinon doublons)
+    if not get_warm_up().require('unique_indexes'):
+        sys.stderr.write("Index unique MongoDB non disponible, import annulé\n")
+        return 2
+
+    with app.app_context():
+        if args.path == '-':
+            report = import_stocks(get_stock_repository(), sys.stdin.buffer, import_format,
+                                   chunk_size=chunk_size, max_errors=app.config['IMPORT_MAX_ERRORS'])
+        else:
+            with open(args.path, 'rb') as stream:
+                report = import_stocks(get_stock_repository(), stream, import_format,
+                                       chunk_size=chunk_size, max_errors=app.config['IMPORT_MAX_ERRORS'])
+
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write('\n')
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,6 +17,11 @@ if [ ! -f .env ]; then
     cp .env.example .env
 fi
 
-# Démarrer l'application
+# Démarrer l'application (SERVER_MODE=asgi: routes d'E/S des stocks en asyncio)
+SERVER_MODE=${SERVER_MODE:-$(grep -E '^SERVER_MODE=' .env | cut -d= -f2)}
+if [ "$SERVER_MODE" = "asgi" ]; then
+    echo "🏃 Démarrage de Gunicorn (workers Uvicorn, mode ASGI)..."
+    exec gunicorn -c gunicorn.conf.py --worker-class uvicorn.workers.UvicornWorker asgi:app
+fi
 echo "🏃 Démarrage de Gunicorn..."
-exec gunicorn --bind 0.0.0.0:8000 --workers 4 --timeout 120 --access-logfile - --error-logfile - run:app
+exec gunicorn -c gunicorn.conf.py run:app
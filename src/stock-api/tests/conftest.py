@@ -0,0 +1,72 @@
+"""Fixtures: application complète sur MongoDB (mongomock) et Redis (fakeredis) en mémoire.
+
+Les services sont des instances globales initialisées par create_app: l'application est
+créée une fois par session, et chaque test repart de bases vides.
+"""
+import os
+
+# Lu à l'import de config: historique écrit de façon synchrone, pas de réconciliation
+# périodique, sondes du circuit breaker rapprochées
+os.environ.setdefault('HISTORY_WRITE_BEHIND', 'false')
+os.environ.setdefault('AGGREGATES_RECONCILE_INTERVAL', '0')
+os.environ.setdefault('REDIS_BREAKER_BASE_BACKOFF', '0.05')
+os.environ.setdefault('REDIS_BREAKER_MAX_BACKOFF', '0.2')
+
+import fakeredis
+import mongomock
+import pytest
+import redis
+
+import app.services.mongo_service as mongo_module
+
+
+@pytest.fixture(scope='session')
+def app():
+    store = mongomock.store.ServerStore()
+    server = fakeredis.FakeServer()
+
+    def mongo_client(*args, **kwargs):
+        return mongomock.MongoClient(*args, _store=store, **kwargs)
+
+    class FakeRedis(fakeredis.FakeRedis):
+        def __init__(self, *args, **kwargs):
+            for option in ('host', 'port', 'password', 'socket_connect_timeout',
+                           'socket_timeout', 'retry_on_timeout'):
+                kwargs.pop(option, None)
+            super().__init__(*args, server=server, **kwargs)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(mongo_module, 'MongoClient', mongo_client)
+        patch.setattr(redis, 'Redis', FakeRedis)
+        patch.setattr(redis, 'StrictRedis', FakeRedis)
+        from app import create_app
+        from app.services.registry import registry
+        yield create_app()
+        # Avant la fin de la capture des logs par pytest (sinon fermeture à atexit)
+        registry.close()
+
+
+@pytest.fixture
+def client(app):
+    from app.services.mongo_service import get_mongo_service
+    from app.services.redis_service import get_redis_service
+
+    mongo_service = get_mongo_service()
+    for name in mongo_service.db.list_collection_names():
+        mongo_service.db.drop_collection(name)
+    mongo_service.ensure_indexes()
+    redis_service = get_redis_service()
+    redis_service.client.flushall()
+    with app.app_context():
+        yield app.test_client()
+
+
+@pytest.fixture
+def repository(client):
+    from app.services.stock_repository import get_stock_repository
+    return get_stock_repository()
+
+
+def stock_payload(symbol, **fields):
+    return {'symbol': symbol, 'name': f'Stock {symbol}', 'price': 2.0, 'quantity': 5,
+            'category': 'tools', **fields}
@@ -0,0 +1,87 @@
+from pymongo.errors import AutoReconnect
+
+from tests.conftest import stock_payload
+
+
+def _search(client, term):
+    return [stock['product_id'] for stock in client.get('/stocks', query_string={'search': term}).get_json()['stocks']]
+
+
+def test_bulk_upsert_keeps_search_tokens_of_stored_fields(client):
+    client.post('/stocks', json=stock_payload('SP1', name='Widget', description='sprocket part'))
+
+    response = client.post('/stocks/bulk', json={'items': [stock_payload('SP1', name='Gadget')]})
+
+    assert response.get_json()['results'] == [{'index': 0, 'product_id': 'SP1', 'status': 'updated'}]
+    # La description n'est pas dans l'item: ses tokens viennent du document stocké
+    assert _search(client, 'sprocket') == ['SP1']
+    assert _search(client, 'gadget') == ['SP1']
+    assert _search(client, 'widget') == []
+
+
+def test_bulk_upsert_indexes_created_stocks(client):
+    client.post('/stocks/bulk', json={'items': [stock_payload('NEW1', name='Hammer', description='claw')]})
+
+    assert _search(client, 'hammer') == ['NEW1']
+    assert _search(client, 'claw') == ['NEW1']
+
+
+def test_bulk_adjust_applies_items_in_request_order(client):
+    client.post('/stocks', json=stock_payload('X1', quantity=1))
+    client.post('/stocks', json=stock_payload('X2', quantity=5))
+
+    response = client.post('/stocks/bulk/adjust', json={'items': [
+        {'symbol': 'X1', 'quantity_change': 3},
+        {'symbol': 'X1', 'quantity_change': -10},
+        {'symbol': 'NOPE', 'quantity_change': 1},
+        {'symbol': 'X2', 'quantity_change': -5},
+        {'symbol': 'X1', 'quantity_change': -4},
+        {'symbol': 'x2', 'quantity_change': -1},
+    ]})
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(result['status'], result.get('quantity'), result.get('error')) for result in results] == [
+        ('adjusted', 4, None),
+        ('error', None, 'Quantité insuffisante en stock'),
+        ('error', None, 'Stock not found'),
+        ('adjusted', 0, None),
+        ('adjusted', 0, None),
+        ('error', None, 'Quantité insuffisante en stock'),
+    ]
+    assert client.get('/stocks/X1').get_json()['stock']['quantity'] == 0
+    assert client.get('/stocks/X2').get_json()['stock']['quantity'] == 0
+
+    history = client.get('/stocks/X1/history').get_json()['history']
+    assert sorted(entry['quantity_change'] for entry in history if entry['action'] != 'create') == [-4, 3]
+
+
+def test_bulk_adjust_reports_partial_failure(client, repository, monkeypatch):
+    client.post('/stocks', json=stock_payload('Y1', quantity=5))
+    client.post('/stocks', json=stock_payload('Y2', quantity=5))
+    # Entrées en cache, à invalider malgré l'échec
+    client.get('/stocks/Y1')
+    client.get('/stocks/Y2')
+
+    collection_type = type(repository.collection)
+    bulk_write = collection_type.bulk_write
+
+    def first_operation_only(self, operations, **kwargs):
+        bulk_write(self, operations[:1], **kwargs)
+        raise AutoReconnect('connexion perdue')
+
+    monkeypatch.setattr(collection_type, 'bulk_write', first_operation_only)
+    results = repository.bulk_adjust([
+        {'product_id': 'Y1', 'quantity_change': 3},
+        {'product_id': 'Y2', 'quantity_change': 2},
+    ])
+    monkeypatch.setattr(collection_type, 'bulk_write', bulk_write)
+
+    assert results[0] == {'product_id': 'Y1', 'status': 'adjusted', 'quantity': 8}
+    assert results[1]['status'] == 'error'
+    assert results[1]['error'].startswith('Ajustement non appliqué')
+    assert client.get('/stocks/Y1').get_json()['stock']['quantity'] == 8
+    assert client.get('/stocks/Y2').get_json()['stock']['quantity'] == 5
+    assert client.get('/stocks/aggregates').get_json()['totals']['stock_value'] == 26.0
+    # Marqueurs de lot retirés des documents
+    assert repository.collection.find_one({'product_id': 'Y1'}).get('bulk_adjustments') == {}
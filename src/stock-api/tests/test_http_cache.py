@@ -0,0 +1,65 @@
+import pytest
+
+from tests.conftest import stock_payload
+
+
+@pytest.fixture
+def stock(client):
+    client.post('/stocks', json=stock_payload('V1'))
+    return client.get('/stocks/V1')
+
+
+def test_unchanged_stock_is_not_modified(client, stock):
+    etag = stock.headers['ETag']
+
+    response = client.get('/stocks/V1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('write', [
+    lambda client: client.post('/stocks/V1/adjust', json={'quantity_change': 1}),
+    lambda client: client.put('/stocks/V1', json={'name': 'Renamed'}),
+    lambda client: client.post('/stocks/bulk/adjust', json={'items': [{'symbol': 'V1', 'quantity_change': 1}]}),
+    lambda client: client.post('/stocks/bulk', json={'items': [stock_payload('V1', quantity=9)]}),
+], ids=['adjust', 'update', 'bulk_adjust', 'bulk_upsert'])
+def test_write_changes_stock_etag(client, stock, write):
+    etag, version = stock.headers['ETag'], stock.get_json()['stock']['version']
+
+    assert write(client).status_code in (200, 201)
+    response = client.get('/stocks/V1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['stock']['version'] == version + 1
+
+
+def test_successive_writes_in_same_millisecond_change_etag(client, stock, monkeypatch):
+    import app.services.stock_repository as stock_repository
+    from datetime import datetime
+
+    frozen = datetime(2026, 1, 1)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return frozen
+
+    monkeypatch.setattr(stock_repository, 'datetime', FrozenDatetime)
+    client.post('/stocks/V1/adjust', json={'quantity_change': 1})
+    etag = client.get('/stocks/V1').headers['ETag']
+    client.post('/stocks/V1/adjust', json={'quantity_change': 1})
+
+    assert client.get('/stocks/V1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_write_changes_list_etag(client, stock):
+    etag = client.get('/stocks').headers['ETag']
+    assert client.get('/stocks', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/stocks/V1/adjust', json={'quantity_change': 1})
+
+    response = client.get('/stocks', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['stocks'][0]['quantity'] == 6
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+import redis
+
+from app.services.redis_service import get_redis_service
+from tests.conftest import stock_payload
+
+
+def _wait_closed(breaker, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while breaker.state != breaker.CLOSED and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return breaker.state == breaker.CLOSED
+
+
+class RedisOutage:
+    """Redis injoignable pour le circuit breaker: commandes court-circuitées, sondes en échec"""
+
+    def __init__(self, redis_service, monkeypatch):
+        self.redis_service = redis_service
+        self.monkeypatch = monkeypatch
+        self.ping = redis_service.client.ping
+
+    def open(self):
+        def unreachable(*args, **kwargs):
+            raise redis.ConnectionError('redis indisponible')
+
+        self.monkeypatch.setattr(self.redis_service.client, 'ping', unreachable)
+        self.redis_service.breaker.trip(redis.ConnectionError('redis indisponible'))
+
+    def close(self):
+        self.monkeypatch.setattr(self.redis_service.client, 'ping', self.ping)
+        assert _wait_closed(self.redis_service.breaker)
+
+
+@pytest.fixture
+def redis_outage(client, monkeypatch):
+    outage = RedisOutage(get_redis_service(), monkeypatch)
+    yield outage
+    outage.close()
+
+
+def test_writes_while_breaker_open_evict_cache_on_recovery(client, redis_outage):
+    redis_service = get_redis_service()
+    client.post('/stocks', json=stock_payload('B1'))
+    assert client.get('/stocks/B1').get_json()['stock']['quantity'] == 5
+    list_etag = client.get('/stocks').headers['ETag']
+    redis_outage.open()
+
+    # Circuit ouvert: l'écriture ne passe que par MongoDB, les évictions sont différées
+    assert client.post('/stocks/B1/adjust', json={'quantity_change': 3}).status_code == 200
+    assert redis_service.has_pending_invalidations()
+    assert redis_service.client.exists('stock:B1')
+
+    redis_outage.close()
+
+    assert not redis_service.has_pending_invalidations()
+    assert not redis_service.client.exists('stock:B1')
+    assert client.get('/stocks/B1').get_json()['stock']['quantity'] == 8
+    assert client.get('/stocks', headers={'If-None-Match': list_etag}).status_code == 200
+
+
+def test_pending_keys_collapse_to_namespace_pattern(client):
+    redis_service = get_redis_service()
+    redis_service.max_pending_keys = 2
+    try:
+        redis_service.defer_invalidation(keys=['stock:A', 'stock:B', 'stock:C'])
+        assert redis_service._pending['keys'] == set()
+        assert redis_service._pending['patterns'] == {'stock:*'}
+    finally:
+        redis_service.max_pending_keys = 10000
+        redis_service._replay_pending()
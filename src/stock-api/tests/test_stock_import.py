@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+from tests.conftest import stock_payload
+
+ROUND_TRIP_FIELDS = ('product_id', 'name', 'description', 'quantity', 'price', 'category',
+                     'min_stock', 'max_stock', 'supplier', 'sku')
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def _inventory(client):
+    stocks = client.get('/stocks', query_string={'limit': 100}).get_json()['stocks']
+    return {stock['product_id']: {field: stock[field] for field in ROUND_TRIP_FIELDS} for stock in stocks}
+
+
+@pytest.fixture
+def inventory(client):
+    client.post('/stocks', json=stock_payload('A1', description='vis, "cruciforme"', supplier='Acme'))
+    client.post('/stocks', json=stock_payload('B2', name='Écrou', quantity=0, price=0.25,
+                                              category='food', min_stock=2, max_stock=50, sku='SKU-2'))
+    return _inventory(client)
+
+
+def _clear(client, inventory):
+    for symbol in inventory:
+        assert client.delete(f'/stocks/{symbol}').status_code == 200
+    assert _inventory(client) == {}
+
+
+@pytest.mark.parametrize('import_format', ['csv', 'ndjson'])
+def test_export_import_round_trip(client, inventory, import_format):
+    exported = client.get('/stocks/export', query_string={'format': import_format}).get_data()
+    _clear(client, inventory)
+
+    response = client.post('/stocks/import', query_string={'format': import_format},
+                           data=exported, content_type=CONTENT_TYPES[import_format])
+
+    report = response.get_json()
+    assert response.status_code == 200
+    assert (report['rows'], report['created'], report['failed']) == (2, 2, 0)
+    assert _inventory(client) == inventory
+
+
+@pytest.mark.parametrize('import_format', ['csv', 'ndjson'])
+def test_multipart_import_round_trip(client, inventory, import_format):
+    exported = client.get('/stocks/export', query_string={'format': import_format}).get_data()
+    _clear(client, inventory)
+
+    response = client.post('/stocks/import', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(exported), f'inventaire.{import_format}')})
+
+    assert response.get_json()['created'] == 2
+    assert _inventory(client) == inventory
+
+
+def test_import_updates_existing_and_reports_bad_rows(client, inventory):
+    data = ('symbol,name,price,quantity,category\n'
+            'a1,Vis longue,1.5,12,tools\n'
+            'c3,Boulon,x,3,tools\n'
+            ',Sans symbole,1,1,tools\n')
+
+    report = client.post('/stocks/import', query_string={'format': 'csv'},
+                         data=data, content_type='text/csv').get_json()
+
+    assert (report['rows'], report['updated'], report['created'], report['failed']) == (3, 1, 0, 2)
+    assert sorted(error['row'] for error in report['errors']) == [3, 4]
+    assert client.get('/stocks/A1').get_json()['stock']['quantity'] == 12
+    assert client.get('/stocks/C3').status_code == 404